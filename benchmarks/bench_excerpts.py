@@ -0,0 +1,77 @@
+"""
+Объем страниц лент и данных запроса ленты: полный текст постов против
+сохраненного начала текста (Post.excerpt).
+
+    python benchmarks/bench_excerpts.py [символов в посте]
+"""
+
+import sys
+from io import StringIO
+
+from common import report, setup_django, temporary_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.template.loader import render_to_string  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from posts.cache import CARD_TEMPLATE  # noqa: E402
+from posts.models import Post  # noqa: E402
+from posts.seeding import WORDS, seed  # noqa: E402
+
+
+def payload(queryset):
+    """
+    Байты значений всех строк, которые возвращает запрос.
+    """
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return sum(len(str(value).encode()) for row in cursor.fetchall()
+                   for value in row if value is not None)
+
+
+def full_text_cards(posts):
+    # карточки в том виде, в котором они выводили весь текст
+    size = 0
+    for post in posts:
+        post.excerpt, post.is_truncated = post.text, False
+        size += len(render_to_string(
+            CARD_TEMPLATE, {'post': post, 'show_group': True}
+        ).encode())
+    return size
+
+
+def main():
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    per_page = settings.ELEMENTS_PER_PAGE
+    with temporary_database():
+        seed(users=20, posts=1000, random_seed=1)
+        text = ' '.join(WORDS * (length // len(' '.join(WORDS)) + 1))
+        Post.objects.update(text=text[:length])
+        call_command('backfill_excerpts', all=True, stdout=StringIO())
+
+        feed = Post.objects.select_related('author', 'group')[:per_page]
+        full_query = payload(feed)
+        excerpt_query = payload(feed.defer('text'))
+        page = len(Client().get('/').content)
+        posts = list(feed)
+        excerpt_cards = sum(len(render_to_string(
+            CARD_TEMPLATE, {'post': post, 'show_group': True}
+        ).encode()) for post in posts)
+        full_page = page - excerpt_cards + full_text_cards(posts)
+
+    report(f'Главная страница, {per_page} постов по {length} символов', [
+        ('данные запроса, полный текст', f'{full_query:>8} байт'),
+        ('данные запроса, начало текста', f'{excerpt_query:>8} байт'),
+        ('страница, полный текст', f'{full_page:>8} байт'),
+        ('страница, начало текста', f'{page:>8} байт'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Сравнивает рендеринг навигации по страницам: полный page_range
+(как было раньше) и окно вокруг текущей страницы (page_window).
+"""
+
+from common import measure, report, setup_django
+
+setup_django()
+
+from django.core.paginator import Paginator  # noqa: E402
+from django.template import Context, Template  # noqa: E402
+from django.template.loader import get_template  # noqa: E402
+
+# Прежняя версия posts/includes/paginator.html в сокращенном виде
+FULL_RANGE_TEMPLATE = Template("""
+<ul class="pagination">
+{% for i in page.paginator.page_range %}
+  {% if page.number == i %}
+    <li class="page-item active"><span class="page-link">{{ i }}</span></li>
+  {% else %}
+    <li class="page-item">
+      <a class="page-link" href="?page={{ i }}">{{ i }}</a>
+    </li>
+  {% endif %}
+{% endfor %}
+</ul>
+""")
+
+PAGE_COUNTS = (10, 1000, 200000)
+
+
+def main():
+    window_template = get_template('posts/includes/paginator.html')
+    rows = []
+    for num_pages in PAGE_COUNTS:
+        paginator = Paginator(range(num_pages * 10), 10)
+        page = paginator.page(num_pages // 2 or 1)
+        context = {'page': page}
+        full_html = FULL_RANGE_TEMPLATE.render(Context(context))
+        window_html = window_template.render(context)
+        repeat = 3 if num_pages > 1000 else 20
+        full_ms = measure(
+            lambda: FULL_RANGE_TEMPLATE.render(Context(context)), repeat
+        )
+        window_ms = measure(lambda: window_template.render(context), repeat)
+        rows.append((
+            f'{num_pages} страниц',
+            f'полный: {full_ms:9.2f} мс {len(full_html):>10} байт | '
+            f'окно: {window_ms:6.2f} мс {len(window_html):>6} байт'
+        ))
+    report('Навигация по страницам', rows)
+
+
+if __name__ == '__main__':
+    main()
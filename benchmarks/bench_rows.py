@@ -0,0 +1,58 @@
+"""
+Память и время чтения страницы ленты: экземпляры Post с автором и
+группой (select_related) против строк PostRow из values_list()
+(posts/rows.py).
+
+    python benchmarks/bench_rows.py [постов на странице]
+"""
+
+import sys
+import tracemalloc
+
+from common import measure, report, setup_django, temporary_database
+
+setup_django()
+
+from posts.models import Post  # noqa: E402
+from posts.rows import post_rows  # noqa: E402
+from posts.seeding import seed  # noqa: E402
+
+
+def peak_memory(func):
+    """
+    Пиковый объем памяти, выделенной во время вызова, в килобайтах.
+    """
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    per_page = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    with temporary_database():
+        seed(users=20, posts=1000, random_seed=1)
+        instances = Post.objects.select_related(
+            'author', 'group'
+        ).defer('text')[:per_page]
+        rows = post_rows(Post.objects.all())[:per_page]
+
+        results = []
+        for name, queryset in (('экземпляры Post', instances),
+                               ('строки PostRow', rows)):
+            def load():
+                return list(queryset.all())
+
+            results.append((f'{name}, память',
+                            f'{peak_memory(load):8.1f} КБ'))
+            results.append((f'{name}, время',
+                            f'{measure(load, number=20):8.2f} мс'))
+    report(f'Страница ленты из {per_page} постов', results)
+
+
+if __name__ == '__main__':
+    main()
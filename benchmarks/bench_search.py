@@ -0,0 +1,84 @@
+"""
+Сравнивает поиск по тексту постов через LIKE '%q%' (icontains, как
+в старой админке) и через индекс FTS5 на сгенерированном корпусе.
+
+    python benchmarks/bench_search.py [число постов]
+"""
+
+import random
+import sys
+
+from common import measure, report, setup_django, temporary_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+
+from posts.models import Post, User  # noqa: E402
+from posts.search import search_posts  # noqa: E402
+
+VOCABULARY_SIZE = 20000
+WORDS_PER_POST = (20, 120)
+BATCH_SIZE = 5000
+
+
+def make_vocabulary(rng):
+    alphabet = 'абвгдеёжзийклмнопрстуфхцчшщыэюя'
+    return [
+        ''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 10)))
+        for _ in range(VOCABULARY_SIZE)
+    ]
+
+
+def fill_corpus(posts_count, rng):
+    vocabulary = make_vocabulary(rng)
+    # распределение слов по закону Ципфа: немного частых, много редких
+    weights = [1 / rank for rank in range(1, VOCABULARY_SIZE + 1)]
+    author = User.objects.create_user(username='bench')
+    for start in range(0, posts_count, BATCH_SIZE):
+        size = min(BATCH_SIZE, posts_count - start)
+        Post.objects.bulk_create(
+            Post(author=author, text=' '.join(rng.choices(
+                vocabulary, weights, k=rng.randint(*WORDS_PER_POST)
+            )))
+            for _ in range(size)
+        )
+    return vocabulary
+
+
+def first_page(object_list):
+    page = Paginator(object_list, settings.ELEMENTS_PER_PAGE).get_page(1)
+    return page.paginator.count, list(page.object_list)
+
+
+def main():
+    posts_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(42)
+    with temporary_database():
+        vocabulary = fill_corpus(posts_count, rng)
+        queries = {
+            'частое слово': vocabulary[0],
+            'среднее слово': vocabulary[200],
+            'редкое слово': vocabulary[-1],
+        }
+        rows = []
+        for title, word in queries.items():
+            like = Post.objects.select_related('author', 'group').filter(
+                text__icontains=word
+            )
+            fts = search_posts(word)
+            like_ms = measure(lambda: first_page(like), repeat=3)
+            fts_ms = measure(lambda: first_page(fts), repeat=3)
+            found = first_page(fts)[0]
+            rows.append((
+                title,
+                f'найдено {found:>7} | LIKE: {like_ms:8.2f} мс | '
+                f'FTS5: {fts_ms:7.2f} мс'
+            ))
+        report(f'Поиск, первая страница с подсчетом, {posts_count} постов',
+               rows)
+
+
+if __name__ == '__main__':
+    main()
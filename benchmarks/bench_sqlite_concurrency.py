@@ -0,0 +1,121 @@
+"""
+Нагрузочный тест SQLite: несколько потоков пишут посты и продлевают
+сессии, остальные читают главную ленту. Сравниваются настройки Django
+по умолчанию (журнал DELETE, ожидание блокировки до 5 с) и
+SQLITE_PRAGMAS с повтором транзакций (core/sqlite.py).
+
+    python benchmarks/bench_sqlite_concurrency.py [секунды] [писатели]
+        [читатели]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from common import report, setup_django, temporary_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.sessions.backends.db import SessionStore  # noqa: E402
+from django.db import (OperationalError, connection,  # noqa: E402
+                       connections, transaction)
+from django.test.utils import override_settings  # noqa: E402
+
+from core.sqlite import atomic_with_retry, is_locked_error  # noqa: E402
+from posts.models import AuthorStats, Post  # noqa: E402
+from posts.seeding import seed  # noqa: E402
+
+DEFAULTS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+}
+
+
+def write_post(author):
+    # как post_create: сигналы обновляют счетчики в той же транзакции
+    Post.objects.create(text='нагрузка', author=author)
+    session = SessionStore()
+    session['user'] = author.pk
+    session.save()
+
+
+def read_index():
+    return list(Post.objects.select_related('author', 'group')[:10])
+
+
+def worker(task, deadline, stats, errors):
+    try:
+        while time.monotonic() < deadline:
+            try:
+                task()
+                stats['ok'] += 1
+            except OperationalError as error:
+                if not is_locked_error(error):
+                    raise
+                errors['locked'] += 1
+    finally:
+        connections.close_all()
+
+
+def run(seconds, writers, readers, retry):
+    author = AuthorStats.objects.order_by('-posts_count').first().author
+    if retry:
+        def write():
+            atomic_with_retry(write_post, author)
+    else:
+        def write():
+            with transaction.atomic():
+                write_post(author)
+
+    writes, reads, errors = Counter(), Counter(), Counter()
+    deadline = time.monotonic() + seconds
+    threads = [
+        threading.Thread(target=worker,
+                         args=(write, deadline, writes, errors))
+        for _ in range(writers)
+    ] + [
+        threading.Thread(target=worker,
+                         args=(read_index, deadline, reads, errors))
+        for _ in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return (f'запись {writes["ok"] / seconds:7.0f}/с | '
+            f'чтение {reads["ok"] / seconds:7.0f}/с | '
+            f'ошибок "locked" {errors["locked"]:>5}')
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    modes = {
+        'по умолчанию': (DEFAULTS, False),
+        'SQLITE_PRAGMAS + повторы': (settings.SQLITE_PRAGMAS, True),
+    }
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # нужна база в файле: в памяти нет ни журнала, ни блокировок
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            tmp_dir, 'bench.sqlite3'
+        )
+        with temporary_database():
+            seed(users=50, posts=20000, random_seed=1)
+            for title, (pragmas, retry) in modes.items():
+                connections.close_all()
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    rows.append((title, run(seconds, writers, readers,
+                                            retry)))
+                    connections.close_all()
+    report(f'SQLite: {writers} пишущих и {readers} читающих потоков, '
+           f'{seconds:.0f} с', rows)
+
+
+if __name__ == '__main__':
+    main()
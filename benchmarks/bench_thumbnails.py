@@ -0,0 +1,95 @@
+"""
+Время показа ленты с картинками: миниатюры, которые sorl-thumbnail
+создает при первом показе тегом {% thumbnail %}, против миниатюр,
+созданных заранее (posts/thumbnails.py).
+
+    python benchmarks/bench_thumbnails.py [постов с картинками]
+"""
+
+import io
+import shutil
+import sys
+import tempfile
+import time
+
+from common import measure, report, setup_django, temporary_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from django.template import Context, Template  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from PIL import Image  # noqa: E402
+from sorl.thumbnail import default  # noqa: E402
+
+from posts import thumbnails  # noqa: E402
+from posts.models import Post  # noqa: E402
+from posts.seeding import seed  # noqa: E402
+
+ON_DEMAND = Template(
+    '{% load thumbnail %}{% for post in posts %}'
+    '{% thumbnail post.image geometry crop="center" as im %}{{ im.url }}'
+    '{% endthumbnail %}{% endfor %}'
+)
+
+
+def make_image(number):
+    buffer = io.BytesIO()
+    Image.effect_mandelbrot((1600, 1200), (-2, -1.5, 1, 1.5),
+                            100 + number).convert('RGB').save(buffer, 'JPEG')
+    return SimpleUploadedFile(f'bench{number}.jpg', buffer.getvalue())
+
+
+def reset_thumbnails():
+    default.kvstore.clear()
+    shutil.rmtree(f'{settings.MEDIA_ROOT}/cache', ignore_errors=True)
+    for cache in caches.all():
+        cache.clear()
+
+
+def timed(func):
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    count = (int(sys.argv[1]) if len(sys.argv) > 1
+             else settings.ELEMENTS_PER_PAGE)
+    client = Client()
+    with tempfile.TemporaryDirectory() as media_root, \
+            override_settings(MEDIA_ROOT=media_root,
+                              POST_THUMBNAILS_ASYNC=False), \
+            temporary_database():
+        seed(users=20, posts=1000, random_seed=1)
+        for number, post in enumerate(Post.objects.all()[:count]):
+            post.image = make_image(number)
+            post.save()
+        posts = list(Post.objects.all()[:count])
+        geometry, _ = settings.POST_THUMBNAIL_SIZES['card']
+
+        reset_thumbnails()
+        on_demand = timed(lambda: ON_DEMAND.render(
+            Context({'posts': posts, 'geometry': geometry})
+        ))
+
+        reset_thumbnails()
+        pregenerate = timed(
+            lambda: [thumbnails.generate(post.pk) for post in posts]
+        )
+        caches['default'].clear()
+        first = timed(lambda: client.get('/'))
+        warm = measure(lambda: client.get('/'), number=10)
+    report(f'Лента из {count} постов с картинками', [
+        ('sorl {% thumbnail %}, первый показ', f'{on_demand:8.1f} мс'),
+        ('generate_thumbnails (вне запроса)', f'{pregenerate:8.1f} мс'),
+        ('лента, миниатюры готовы, первый показ', f'{first:8.1f} мс'),
+        ('лента, повторный показ', f'{warm:8.1f} мс'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
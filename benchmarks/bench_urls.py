@@ -0,0 +1,199 @@
+"""
+Сквозной бенчмарк страниц: каждый адрес из posts.urls, users.urls и
+about.urls запрашивается тестовым клиентом на сгенерированных данных
+(команда seed) анонимно и от имени автора. Для каждого случая
+выводятся p50/p95/p99 времени ответа, число запросов к базе и размер
+ответа.
+
+    python benchmarks/bench_urls.py [--posts N] [--requests N]
+        [--output results.json] [--baseline baseline.json]
+        [--threshold 1.2]
+
+С --baseline результаты сравниваются с сохраненными ранее: случай
+считается регрессией, если p95 вырос больше чем в threshold раз или
+выросло число запросов. При регрессиях скрипт завершается с кодом 1.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from common import report, setup_django, temporary_database
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.tokens import default_token_generator  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.urls import URLPattern, get_resolver, reverse  # noqa: E402
+from django.utils.encoding import force_bytes  # noqa: E402
+from django.utils.http import urlsafe_base64_encode  # noqa: E402
+
+from posts.models import AuthorStats, Group, Post  # noqa: E402
+from posts.seeding import seed  # noqa: E402
+
+NAMESPACES = ('posts', 'users', 'about')
+# адреса, которые меняют состояние клиента и ломают следующие замеры
+SKIPPED = {'users:logout'}
+WARMUP = 3
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--posts', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=50,
+                        help='Число замеров на случай.')
+    parser.add_argument('--output', help='Куда сохранить результаты JSON.')
+    parser.add_argument('--baseline', help='Результаты для сравнения.')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Допустимый рост p95 относительно baseline.')
+    return parser.parse_args()
+
+
+def url_names():
+    resolver = get_resolver()
+    for namespace in NAMESPACES:
+        _, sub_resolver = resolver.namespace_dict[namespace]
+        for pattern in sub_resolver.url_patterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                yield f'{namespace}:{pattern.name}', pattern.pattern
+
+
+def url_kwargs(author, post, group):
+    return {
+        'username': author.username,
+        'post_id': post.pk,
+        'slug': group.slug,
+        'uidb64': urlsafe_base64_encode(force_bytes(author.pk)),
+        'token': default_token_generator.make_token(author),
+    }
+
+
+def build_cases(author, post, group):
+    available = url_kwargs(author, post, group)
+    cases = []
+    for name, pattern in url_names():
+        if name in SKIPPED:
+            continue
+        kwargs = {key: available[key]
+                  for key in pattern.regex.groupindex}
+        cases.append((name, reverse(name, kwargs=kwargs)))
+    last_page = -(-Post.objects.count() // settings.ELEMENTS_PER_PAGE)
+    cases += [
+        ('posts:index?page=last',
+         f'{reverse("posts:index")}?page={last_page}'),
+        ('posts:search?q', f'{reverse("posts:search")}?q=кофе'),
+    ]
+    return cases
+
+
+def percentile(samples, percent):
+    return statistics.quantiles(samples, n=100,
+                                method='inclusive')[percent - 1]
+
+
+def response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def run_case(client, url, requests):
+    for _ in range(WARMUP):
+        response_size(client.get(url))
+    timings = []
+    queries = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = client.get(url)
+            size = response_size(response)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context.captured_queries))
+    return {
+        'status': response.status_code,
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+        'queries': max(queries),
+        'bytes': size,
+    }
+
+
+def run(options):
+    seed(users=options.users, groups=options.groups, posts=options.posts,
+         random_seed=42)
+    stats = AuthorStats.objects.select_related('author').order_by(
+        '-posts_count'
+    ).first()
+    author = stats.author
+    author.is_staff = True
+    author.save(update_fields=['is_staff'])
+    post = Post.objects.filter(author=author).first()
+    group = Group.objects.order_by('-posts_count').first()
+
+    clients = {'anonymous': Client(), 'author': Client()}
+    clients['author'].force_login(author)
+    results = {}
+    for name, url in build_cases(author, post, group):
+        for client_name, client in clients.items():
+            caches['default'].clear()
+            results[f'{name} [{client_name}]'] = run_case(
+                client, url, options.requests
+            )
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for case, result in results.items():
+        old = baseline.get(case)
+        if old is None:
+            continue
+        if result['p95'] > old['p95'] * threshold:
+            regressions.append(
+                f'{case}: p95 {old["p95"]:.2f} -> {result["p95"]:.2f} мс'
+            )
+        if result['queries'] > old['queries']:
+            regressions.append(
+                f'{case}: запросов {old["queries"]} -> {result["queries"]}'
+            )
+    return regressions
+
+
+def main():
+    options = parse_args()
+    with temporary_database():
+        results = run(options)
+
+    report(f'Страницы, {options.posts} постов, {options.requests} замеров', [
+        (case, f'{r["status"]} | p50 {r["p50"]:7.2f} | p95 {r["p95"]:7.2f} | '
+               f'p99 {r["p99"]:7.2f} мс | запросов {r["queries"]:>3} | '
+               f'{r["bytes"]:>7} байт')
+        for case, r in results.items()
+    ])
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2, ensure_ascii=False)
+    if options.baseline:
+        with open(options.baseline) as baseline:
+            regressions = compare(results, json.load(baseline),
+                                  options.threshold)
+        report('Сравнение с baseline', [
+            ('регрессий', len(regressions)), *(
+                ('', line) for line in regressions
+            )
+        ])
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
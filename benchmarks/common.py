@@ -0,0 +1,65 @@
+"""
+Общие помощники для скриптов бенчмарков.
+
+Скрипты запускаются из корня репозитория: `python benchmarks/<name>.py`.
+"""
+
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT, 'yatube')
+
+
+def setup_django():
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def temporary_database():
+    """
+    Создает отдельную тестовую базу со всеми миграциями и удаляет ее
+    после выхода из блока.
+    """
+
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5, number=1):
+    """
+    Запускает func repeat серий по number раз и возвращает медиану
+    времени одного вызова в миллисекундах.
+    """
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) * 1000 / number)
+    return statistics.median(samples)
+
+
+def report(title, rows):
+    print(title)
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f'  {name:<{width}}  {value}')
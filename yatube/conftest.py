@@ -0,0 +1,61 @@
+import pytest
+from django.core.cache import caches
+
+from core.lookups import clear_local_caches
+from posts import viewcounts
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    Кэш переживает откат транзакции тестовой базы, поэтому каждый тест
+    начинается с пустого кэша.
+    """
+
+    for cache in caches.all():
+        cache.clear()
+    clear_local_caches()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def profiler_dir(settings, tmp_path):
+    """
+    Снимки профилировщика пишутся во временный каталог теста.
+    """
+
+    settings.PROFILER_DIR = str(tmp_path / 'profiles')
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """
+    Картинки и миниатюры пишутся во временный каталог теста, миниатюры
+    создаются без фонового потока.
+    """
+
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
+    settings.POST_THUMBNAILS_ASYNC = False
+
+
+@pytest.fixture(autouse=True)
+def view_counts(settings):
+    """
+    Просмотры записываются вызовом viewcounts.flush() в самом тесте, а
+    не фоновым потоком.
+    """
+
+    settings.VIEW_COUNTS_FLUSHER = False
+    viewcounts.clear()
+    yield
+    viewcounts.clear()
+
+
+@pytest.fixture(autouse=True)
+def deletion_jobs(settings):
+    """
+    Задания удаления выполняются вызовом deletion.run_job() в самом
+    тесте, а не фоновым потоком.
+    """
+
+    settings.DELETION_JOBS_ASYNC = False
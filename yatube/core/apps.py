@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from .sqlite import configure_connection
+        from .timing import install_execute_wrapper
+        connection_created.connect(configure_connection)
+        connection_created.connect(install_execute_wrapper)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def check_replica_cache(app_configs, **kwargs):
+    """
+    Версию кэша страниц после копирования на реплики меняет процесс
+    sync_replica. Если кэш хранится в памяти процесса, веб-процессы ее не
+    увидят и продолжат отдавать страницы, собранные по старой реплике.
+    """
+
+    if not settings.REPLICA_DATABASES:
+        return []
+    if not isinstance(caches[settings.PAGE_CACHE_ALIAS], LocMemCache):
+        return []
+    return [Error(
+        'Кэш страниц хранится в памяти процесса, а чтение с реплик '
+        'включено (REPLICA_DATABASES).',
+        hint='Выберите общий для процессов кэш для PAGE_CACHE_ALIAS, '
+             'например YATUBE_CACHE=file.',
+        id='core.E001',
+    )]
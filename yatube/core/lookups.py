@@ -0,0 +1,152 @@
+"""
+Двухуровневый кэш частых поисков объектов (группа по slug, автор по
+username, пользователь сессии по id).
+
+Первый уровень - небольшой LRU в памяти процесса с коротким временем
+жизни LOOKUP_LOCAL_TTL, второй - общий кэш Django (LOOKUP_CACHE_ALIAS)
+со временем жизни LOOKUP_SHARED_TTL. Сигналы сохранения и удаления
+сбрасывают запись в обоих уровнях текущего процесса и в общем кэше;
+в остальных процессах устаревшая запись первого уровня живет не дольше
+LOOKUP_LOCAL_TTL.
+
+В памяти процесса объекты хранятся сериализованными, поэтому каждый
+запрос получает собственную копию, как и из общего кэша.
+
+Объекты всегда читаются из основной базы, даже на страницах, которые
+читают реплику: отстающая реплика вернула бы в общий кэш объект,
+запись которого только что сбросило изменение, и устаревший
+пользователь (пароль, is_active) жил бы там LOOKUP_SHARED_TTL.
+"""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .metrics import CACHE_REQUESTS
+
+MISSING = object()
+
+_instances = []
+
+
+def clear_local_caches():
+    for instance in _instances:
+        instance.clear_local()
+
+
+class TwoTierCache:
+    def __init__(self, name):
+        self.name = name
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+        _instances.append(self)
+
+    def shared_key(self, key):
+        return f'lookup:{self.name}:{key}'
+
+    def get_shared(self):
+        return caches[settings.LOOKUP_CACHE_ALIAS]
+
+    def get(self, key):
+        """
+        Значение по ключу или MISSING. None - сохраненный результат
+        "не найдено".
+        """
+
+        now = time.monotonic()
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is not None and entry[0] > now:
+                self.local.move_to_end(key)
+                CACHE_REQUESTS.inc(cache=self.name, result='local_hit')
+                return pickle.loads(entry[1])
+
+        data = self.get_shared().get(self.shared_key(key))
+        if data is None:
+            CACHE_REQUESTS.inc(cache=self.name, result='miss')
+            return MISSING
+        CACHE_REQUESTS.inc(cache=self.name, result='shared_hit')
+        self.set_local(key, data, now)
+        return pickle.loads(data)
+
+    def set_local(self, key, data, now):
+        with self.lock:
+            self.local[key] = (now + settings.LOOKUP_LOCAL_TTL, data)
+            self.local.move_to_end(key)
+            while len(self.local) > settings.LOOKUP_LOCAL_SIZE:
+                self.local.popitem(last=False)
+
+    def set(self, key, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self.get_shared().set(self.shared_key(key), data,
+                              settings.LOOKUP_SHARED_TTL)
+        self.set_local(key, data, time.monotonic())
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        with self.lock:
+            for key in keys:
+                self.local.pop(key, None)
+        self.get_shared().delete_many(
+            [self.shared_key(key) for key in keys]
+        )
+
+    def clear_local(self):
+        with self.lock:
+            self.local.clear()
+
+
+class ModelLookup:
+    """
+    Поиск объекта модели по уникальному полю field через два кэша:
+    значение поля -> pk и pk -> объект. Изменение объекта сбрасывает
+    только запись по pk, переименование - запись по старому значению.
+    """
+
+    def __init__(self, name, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.keys = TwoTierCache(f'{name}:{field}')
+        self.objects = TwoTierCache(f'{name}:pk')
+
+    def load(self, **lookup):
+        obj = self.queryset.using(DEFAULT_DB_ALIAS).filter(**lookup).first()
+        if obj is not None:
+            self.objects.set(obj.pk, obj)
+        return obj
+
+    def get_by_pk(self, pk):
+        obj = self.objects.get(pk)
+        if obj is MISSING:
+            obj = self.load(pk=pk)
+            if obj is None:
+                self.objects.set(pk, None)
+        return obj
+
+    def get(self, value):
+        pk = self.keys.get(value)
+        if pk is MISSING:
+            obj = self.load(**{self.field: value})
+            self.keys.set(value, obj.pk if obj else None)
+            return obj
+        return None if pk is None else self.get_by_pk(pk)
+
+    def invalidate(self, pks=(), values=()):
+        """
+        Сбрасывает записи сразу и еще раз после коммита: параллельный
+        запрос мог успеть закэшировать данные до завершения транзакции.
+        """
+
+        pks, values = list(pks), [value for value in values if value]
+
+        def delete():
+            self.objects.delete_many(pks)
+            self.keys.delete_many(values)
+
+        delete()
+        transaction.on_commit(delete)
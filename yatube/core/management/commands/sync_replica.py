@@ -0,0 +1,47 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.routers import replica_synced
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в файлы реплик через backup API '
+        '(согласованный снимок без остановки записи).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases',
+            nargs='*',
+            help='Реплики для копирования. По умолчанию все '
+                 'из REPLICA_DATABASES.',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.REPLICA_DATABASES
+        if not aliases:
+            raise CommandError('Реплики не настроены (REPLICA_DATABASES).')
+
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('sync_replica поддерживает только SQLite.')
+        source.ensure_connection()
+        for alias in aliases:
+            if alias not in settings.REPLICA_DATABASES:
+                raise CommandError(f'{alias} не является репликой.')
+            replica = connections[alias]
+            # открытое соединение держало бы старую копию файла
+            replica.close()
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                source.connection.backup(target)
+            finally:
+                target.close()
+            replica_synced.send(sender=self.__class__, alias=alias)
+            self.stdout.write(self.style.SUCCESS(
+                f'{alias}: скопирована база {source.settings_dict["NAME"]}'
+            ))
@@ -0,0 +1,314 @@
+"""
+Реестр метрик процесса в текстовом формате Prometheus.
+
+Счетчики и гистограммы хранят значения в хранилище процесса. По
+умолчанию это словарь в памяти. Если задан METRICS_MULTIPROC_DIR,
+каждый процесс пишет значения в собственный файл <dir>/metrics_<pid>.db,
+отображенный в память через mmap, а /metrics суммирует файлы всех
+процессов. Каталог нужно очищать перед запуском сервера.
+
+Ключ значения - JSON-строка [имя, суффикс, значения меток]; гистограмма
+хранит счетчик каждой корзины отдельно и накапливает их при выводе.
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+INF = float('inf')
+
+# заголовок файла: занятый объем; запись: длина ключа, ключ с
+# выравниванием до 8 байт, значение double
+USED = struct.Struct('<I4x')
+KEY_LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+INITIAL_FILE_SIZE = 64 * 1024
+
+
+def make_key(name, suffix, values):
+    return json.dumps([name, suffix, list(values)], ensure_ascii=False)
+
+
+class DictStore:
+    def __init__(self):
+        self.values = defaultdict(float)
+
+    def inc(self, key, amount):
+        self.values[key] += amount
+
+    def read(self):
+        return dict(self.values)
+
+
+class MmapStore:
+    """
+    Значения процесса в файле, отображенном в память. Новая запись
+    дописывается в конец, после чего обновляется занятый объем, поэтому
+    другие процессы читают файл без блокировок.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path):
+            with open(path, 'wb') as file:
+                file.truncate(INITIAL_FILE_SIZE)
+        self.file = open(path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.positions = {}
+        used = USED.unpack_from(self.map, 0)[0] or USED.size
+        for key, _, position in self.entries(self.map, used):
+            self.positions[key] = position
+        self.used = used
+
+    @staticmethod
+    def entries(data, used):
+        position = USED.size
+        while position < used:
+            length = KEY_LENGTH.unpack_from(data, position)[0]
+            start = position + KEY_LENGTH.size
+            key = bytes(data[start:start + length]).decode()
+            value_position = start + length + (-(KEY_LENGTH.size + length)
+                                               % 8)
+            value = VALUE.unpack_from(data, value_position)[0]
+            yield key, value, value_position
+            position = value_position + VALUE.size
+
+    def grow(self, needed):
+        size = len(self.map)
+        while size < self.used + needed:
+            size *= 2
+        self.map.close()
+        self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+    def add_key(self, key):
+        encoded = key.encode()
+        padding = -(KEY_LENGTH.size + len(encoded)) % 8
+        needed = KEY_LENGTH.size + len(encoded) + padding + VALUE.size
+        if self.used + needed > len(self.map):
+            self.grow(needed)
+        position = self.used
+        KEY_LENGTH.pack_into(self.map, position, len(encoded))
+        start = position + KEY_LENGTH.size
+        self.map[start:start + len(encoded)] = encoded
+        value_position = start + len(encoded) + padding
+        VALUE.pack_into(self.map, value_position, 0.0)
+        self.used += needed
+        USED.pack_into(self.map, 0, self.used)
+        self.positions[key] = value_position
+        return value_position
+
+    def inc(self, key, amount):
+        position = self.positions.get(key)
+        if position is None:
+            position = self.add_key(key)
+        value = VALUE.unpack_from(self.map, position)[0]
+        VALUE.pack_into(self.map, position, value + amount)
+
+    def read(self):
+        return {key: value
+                for key, value, _ in self.entries(self.map, self.used)}
+
+    @classmethod
+    def read_file(cls, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < USED.size:
+            return {}
+        used = USED.unpack_from(data, 0)[0]
+        return {key: value for key, value, _ in cls.entries(data, used)}
+
+
+def format_value(value):
+    if value == INF:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def label_values(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.inc(
+            make_key(self.name, '', self.label_values(labels)), amount
+        )
+
+    def render(self, samples):
+        for (suffix, values), value in sorted(samples.items()):
+            yield (f'{self.name}{format_labels(self.labelnames, values)} '
+                   f'{format_value(value)}')
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (INF,)
+
+    def observe(self, value, **labels):
+        values = self.label_values(labels)
+        bound = next(bound for bound in self.buckets if value <= bound)
+        self.registry.inc_many((
+            (make_key(self.name, 'bucket',
+                      values + (format_value(bound),)), 1),
+            (make_key(self.name, 'sum', values), value),
+            (make_key(self.name, 'count', values), 1),
+        ))
+
+    def render(self, samples):
+        label_sets = sorted(
+            values for suffix, values in samples if suffix == 'count'
+        )
+        bucket_names = self.labelnames + ('le',)
+        for values in label_sets:
+            cumulative = 0
+            for bound in self.buckets:
+                le = format_value(bound)
+                cumulative += samples.get(('bucket', values + (le,)), 0)
+                yield (f'{self.name}_bucket'
+                       f'{format_labels(bucket_names, values + (le,))} '
+                       f'{format_value(cumulative)}')
+            labels = format_labels(self.labelnames, values)
+            yield (f'{self.name}_sum{labels} '
+                   f'{format_value(samples[("sum", values)])}')
+            yield (f'{self.name}_count{labels} '
+                   f'{format_value(samples[("count", values)])}')
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.store = None
+        self.pid = None
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(),
+                  buckets=DEFAULT_BUCKETS):
+        return self.register(
+            Histogram(self, name, documentation, labelnames, buckets)
+        )
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def get_store(self):
+        # после fork у дочернего процесса должен быть свой файл
+        pid = os.getpid()
+        if self.store is None or self.pid != pid:
+            directory = settings.METRICS_MULTIPROC_DIR
+            if directory:
+                self.store = MmapStore(
+                    os.path.join(directory, f'metrics_{pid}.db')
+                )
+            else:
+                self.store = DictStore()
+            self.pid = pid
+        return self.store
+
+    def inc(self, key, amount):
+        with self.lock:
+            self.get_store().inc(key, amount)
+
+    def inc_many(self, items):
+        with self.lock:
+            store = self.get_store()
+            for key, amount in items:
+                store.inc(key, amount)
+
+    def reset(self):
+        with self.lock:
+            self.store = None
+
+    def collect(self):
+        directory = settings.METRICS_MULTIPROC_DIR
+        if not directory:
+            with self.lock:
+                return self.get_store().read()
+        totals = defaultdict(float)
+        for path in glob.glob(os.path.join(directory, 'metrics_*.db')):
+            for key, value in MmapStore.read_file(path).items():
+                totals[key] += value
+        return totals
+
+    def render(self):
+        samples = defaultdict(dict)
+        for key, value in self.collect().items():
+            name, suffix, values = json.loads(key)
+            samples[name][(suffix, tuple(values))] = value
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render(samples.get(name, {})))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram(
+    'yatube_request_duration_seconds',
+    'Время ответа по имени url.',
+    ('view', 'method'),
+)
+REQUEST_QUERIES = registry.histogram(
+    'yatube_request_queries',
+    'Число SQL-запросов на ответ.',
+    ('view',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+RESPONSE_SIZE = registry.histogram(
+    'yatube_response_size_bytes',
+    'Размер тела ответа (кроме потоковых ответов).',
+    ('view',),
+    buckets=(1024, 4096, 16384, 65536, 262144, 1048576),
+)
+RESPONSES = registry.counter(
+    'yatube_responses_total',
+    'Число ответов по имени url и коду статуса.',
+    ('view', 'status'),
+)
+CACHE_REQUESTS = registry.counter(
+    'yatube_cache_requests_total',
+    'Обращения к кэшу страниц и карточек постов.',
+    ('cache', 'result'),
+)
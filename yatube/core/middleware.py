@@ -0,0 +1,168 @@
+import cProfile
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+from . import metrics, profiler, timing
+
+logger = logging.getLogger('yatube.timing')
+
+
+def metric_view_name(request):
+    """
+    Имя url для меток метрик. Адреса вне METRICS_NAMESPACES (включая
+    404) сводятся к 'other', чтобы число рядов метрик было ограничено.
+    """
+
+    match = request.resolver_match
+    if match and match.namespace in settings.METRICS_NAMESPACES:
+        return match.view_name
+    return 'other'
+
+
+class MetricsMiddleware:
+    """
+    Записывает в реестр метрик время ответа, число SQL-запросов, размер
+    ответа и код статуса каждого запроса. Время SQL и шаблонов не
+    замеряется: это делает только выборка ServerTimingMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with timing.track(timed=False) as timings:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            duration = time.perf_counter() - started
+
+        view = metric_view_name(request)
+        metrics.REQUEST_DURATION.observe(duration, view=view,
+                                         method=request.method)
+        metrics.REQUEST_QUERIES.observe(timings.db_count, view=view)
+        if not response.streaming:
+            metrics.RESPONSE_SIZE.observe(len(response.content), view=view)
+        metrics.RESPONSES.inc(view=view, status=response.status_code)
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Для доли запросов SERVER_TIMING_SAMPLE_RATE замеряет число и время
+    SQL-запросов, время рендеринга шаблонов и общее время ответа.
+    Результат отдается заголовком Server-Timing и строкой лога
+    yatube.timing с именем url (например, posts:index).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        with timing.track() as timings:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            total = time.perf_counter() - started
+
+        self.report(request, response, timings, total)
+        return response
+
+    def report(self, request, response, timings, total):
+        db = timings.db_time * 1000
+        template = timings.template_time * 1000
+        total *= 1000
+        python = max(total - db - template, 0)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={db:.1f};desc="{timings.db_count} queries"',
+            f'tpl;dur={template:.1f}',
+            f'py;dur={python:.1f}',
+            f'total;dur={total:.1f}',
+        ))
+
+        match = request.resolver_match
+        view_name = match.view_name if match else '-'
+        fields = {
+            'view': view_name,
+            'method': request.method,
+            'status': response.status_code,
+            'db_count': timings.db_count,
+            'db_ms': round(db, 1),
+            'template_ms': round(template, 1),
+            'python_ms': round(python, 1),
+            'total_ms': round(total, 1),
+        }
+        logger.info(
+            ' '.join(f'{key}={value}' for key, value in fields.items()),
+            extra={'timing': fields}
+        )
+
+
+class ProfilerMiddleware:
+    """
+    Запускает обработку запроса под cProfile и сохраняет снимок
+    (см. core.profiler), если запрос оказался медленнее
+    PROFILER_THRESHOLD секунд или сотрудник передал ?__profile=1.
+
+    Профилируется доля PROFILER_SAMPLE_RATE запросов: заранее не
+    известно, какой запрос окажется медленным. Медленный запрос без
+    профиля отмечает свой url, и следующий запрос к нему профилируется
+    всегда. Middleware должен стоять последним в MIDDLEWARE, чтобы
+    профиль содержал только view и рендеринг ответа.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # имена url, следующий запрос к которым профилируется
+        self.flagged = set()
+
+    def flagged_view(self, request):
+        if not self.flagged:
+            return None
+        try:
+            view_name = resolve(request.path_info,
+                                getattr(request, 'urlconf', None)).view_name
+        except Resolver404:
+            return None
+        return view_name if view_name in self.flagged else None
+
+    def __call__(self, request):
+        forced = (request.GET.get(settings.PROFILER_FLAG) == '1'
+                  and request.user.is_staff)
+        flagged = self.flagged_view(request)
+        if (not forced and flagged is None
+                and random.random() >= settings.PROFILER_SAMPLE_RATE):
+            started = time.perf_counter()
+            response = self.get_response(request)
+            match = request.resolver_match
+            if (match and time.perf_counter() - started
+                    >= settings.PROFILER_THRESHOLD):
+                self.flagged.add(match.view_name)
+            return response
+
+        self.flagged.discard(flagged)
+
+        profile = cProfile.Profile()
+        query_log = profiler.QueryLog()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_log))
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.disable()
+            duration = time.perf_counter() - started
+
+        if forced or duration >= settings.PROFILER_THRESHOLD:
+            match = request.resolver_match
+            profiler.save_capture(request, match.view_name if match else '-',
+                                  duration, profile, query_log)
+        return response
@@ -0,0 +1,126 @@
+"""
+Снимки профиля медленных запросов.
+
+Снимок - три файла с общим именем в PROFILER_DIR: .prof (cProfile,
+открывается pstats или snakeviz), .sql (шаблоны выполненных запросов
+без значений параметров, с временем)
+и .json с описанием запроса. Файл .json пишется последним, поэтому
+список снимков видит только полностью записанные. В каталоге хранятся
+не больше PROFILER_MAX_CAPTURES последних снимков.
+"""
+
+import glob
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+EXTENSIONS = ('prof', 'sql', 'json')
+NAME_RE = re.compile(r'^\w[\w.-]*$')
+
+
+class QueryLog:
+    """
+    Обертка execute_wrapper, запоминающая SQL и время каждого запроса.
+    Значения параметров не сохраняются: среди них бывают хэши паролей,
+    данные сессий и адреса почты, а снимки лежат на диске.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def format(self):
+        return '\n\n'.join(
+            f'-- {number}. {duration * 1000:.2f} мс\n{sql}'
+            for number, (sql, duration) in enumerate(self.queries, 1)
+        ) + '\n'
+
+
+def capture_path(name, extension):
+    if not NAME_RE.match(name) or extension not in EXTENSIONS:
+        raise ValueError(f'недопустимое имя снимка: {name}.{extension}')
+    return os.path.join(settings.PROFILER_DIR, f'{name}.{extension}')
+
+
+def save_capture(request, view_name, duration, profile, query_log):
+    os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+    now = timezone.now()
+    name = '{}-{}'.format(now.strftime('%Y%m%d-%H%M%S-%f'),
+                          re.sub(r'[^\w.-]', '_', view_name))
+    profile.dump_stats(capture_path(name, 'prof'))
+    with open(capture_path(name, 'sql'), 'w', encoding='utf-8') as file:
+        file.write(query_log.format())
+    meta = {
+        'name': name,
+        'view': view_name,
+        'path': request.get_full_path(),
+        'method': request.method,
+        'user': request.user.get_username() if hasattr(request, 'user')
+        else '',
+        'duration': duration,
+        'queries': len(query_log.queries),
+        'sql_time': sum(duration for *_, duration in query_log.queries),
+        'created': now.isoformat(),
+    }
+    with open(capture_path(name, 'json'), 'w', encoding='utf-8') as file:
+        json.dump(meta, file, ensure_ascii=False)
+    rotate()
+    return name
+
+
+def capture_names():
+    paths = glob.glob(os.path.join(settings.PROFILER_DIR, '*.json'))
+    # имена начинаются с метки времени, поэтому сортируются по времени
+    return sorted(os.path.basename(path)[:-len('.json')] for path in paths)
+
+
+def rotate():
+    names = capture_names()
+    for name in names[:max(len(names) - settings.PROFILER_MAX_CAPTURES, 0)]:
+        # сначала .json, чтобы снимок сразу пропал из списка
+        for extension in reversed(EXTENSIONS):
+            try:
+                os.remove(capture_path(name, extension))
+            except FileNotFoundError:
+                pass
+
+
+def list_captures():
+    captures = []
+    for name in capture_names():
+        try:
+            with open(capture_path(name, 'json'), encoding='utf-8') as file:
+                meta = json.load(file)
+        except (FileNotFoundError, ValueError):
+            continue
+        meta['created'] = datetime.fromisoformat(meta['created'])
+        captures.append(meta)
+    return captures
+
+
+def slowest_by_view(limit):
+    """
+    Самые медленные снимки каждого url: список пар (имя url, снимки),
+    url отсортированы по самому медленному снимку.
+    """
+
+    by_view = {}
+    for capture in list_captures():
+        by_view.setdefault(capture['view'], []).append(capture)
+    result = [
+        (view, sorted(captures, key=lambda capture: -capture['duration'])
+         [:limit])
+        for view, captures in by_view.items()
+    ]
+    return sorted(result, key=lambda item: -item[1][0]['duration'])
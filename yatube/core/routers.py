@@ -0,0 +1,83 @@
+"""
+Чтение с реплик базы данных.
+
+ReplicaMiddleware решает для каждого запроса, можно ли читать с реплики:
+только GET/HEAD к url из REPLICA_READ_VIEWS и только если пользователь
+не закреплен за основной базой. Решение хранится в contextvar, откуда
+его берет ReplicaRouter. Запись всегда идет в основную базу.
+
+После любого изменяющего запроса (POST и т.п.: пост, правка, регистрация,
+вход) пользователь на REPLICA_PIN_SECONDS закрепляется за основной базой
+cookie, чтобы сразу увидеть свои изменения, даже если реплика отстает.
+"""
+
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.dispatch import Signal
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+read_alias = ContextVar('read_alias', default=None)
+# отправляется после копирования основной базы на реплику alias
+replica_synced = Signal(providing_args=['alias'])
+
+
+def is_pinned(request):
+    try:
+        expires = float(request.COOKIES[settings.REPLICA_PIN_COOKIE])
+    except (KeyError, ValueError):
+        return False
+    return expires > time.time()
+
+
+def pin_to_primary(response):
+    window = settings.REPLICA_PIN_SECONDS
+    response.set_cookie(settings.REPLICA_PIN_COOKIE,
+                        str(time.time() + window), max_age=window,
+                        httponly=True, samesite='Lax')
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики - копии основной базы, объекты из них равноправны
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # схема попадает на реплики вместе с данными (sync_replica)
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        if request.method not in SAFE_METHODS:
+            pin_to_primary(response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas = settings.REPLICA_DATABASES
+        if (replicas and request.method in SAFE_METHODS
+                and request.resolver_match.view_name
+                in settings.REPLICA_READ_VIEWS
+                and not is_pinned(request)):
+            # сессия и пользователь читаются из основной базы до
+            # переключения: иначе свежий вход был бы не виден на реплике
+            request.user.is_authenticated
+            read_alias.set(random.choice(replicas))
@@ -0,0 +1,64 @@
+"""
+Настройка SQLite для конкурентной нагрузки.
+
+Каждое новое соединение получает PRAGMA из SQLITE_PRAGMAS: WAL позволяет
+читать во время записи, synchronous=NORMAL в режиме WAL не теряет
+целостность при сбое процесса, busy_timeout заставляет ждать блокировку
+вместо немедленной ошибки.
+
+busy_timeout не помогает, когда транзакция сначала читает, а потом
+пишет: SQLite не ждет повышения блокировки, чтобы не допустить
+взаимной блокировки, и сразу отвечает "database is locked". Такие
+транзакции повторяет atomic_with_retry с экспоненциальной паузой и
+случайным разбросом.
+"""
+
+import random
+import time
+
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, OperationalError, connections,
+                       transaction)
+
+LOCKED_MESSAGES = ('database is locked', 'database table is locked')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """
+    Обработчик connection_created: применяет SQLITE_PRAGMAS.
+    """
+
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked_error(error):
+    return any(message in str(error) for message in LOCKED_MESSAGES)
+
+
+def atomic_with_retry(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Выполняет func(*args, **kwargs) в транзакции и повторяет ее, если
+    база занята. Пауза перед n-й попыткой выбирается случайно от нуля
+    до SQLITE_RETRY_BASE_DELAY * 2**n, чтобы конкурирующие запросы не
+    повторяли запись одновременно.
+
+    Внутри внешней транзакции повтор невозможен: ошибка откатывает ее
+    целиком, поэтому она передается дальше сразу.
+    """
+
+    attempts = settings.SQLITE_WRITE_RETRIES
+    for attempt in range(attempts + 1):
+        try:
+            with transaction.atomic(using=using):
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if (attempt == attempts or not is_locked_error(error)
+                    or connections[using].in_atomic_block):
+                raise
+        time.sleep(random.uniform(
+            0, settings.SQLITE_RETRY_BASE_DELAY * 2 ** attempt
+        ))
@@ -15,3 +15,31 @@ def maketitle(text):
     if len(text) > 30:
         return text[:30] + '...'
     return text
+
+
+@register.filter
+def page_window(page, on_each_side=2):
+    """
+    Номера страниц для навигации: первая и последняя страницы и окно
+    вокруг текущей. Пропуски обозначаются None.
+    """
+
+    number = page.number
+    num_pages = page.paginator.num_pages
+    on_each_side = int(on_each_side)
+    if num_pages <= 2 * on_each_side + 5:
+        return list(range(1, num_pages + 1))
+
+    window = []
+    start = max(number - on_each_side, 1)
+    end = min(number + on_each_side, num_pages)
+    if start > 1:
+        window.append(1)
+        if start > 2:
+            window.append(None)
+    window.extend(range(start, end + 1))
+    if end < num_pages:
+        if end < num_pages - 1:
+            window.append(None)
+        window.append(num_pages)
+    return window
@@ -0,0 +1,42 @@
+"""
+Вспомогательные инструменты для тестов проекта.
+"""
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudget(CaptureQueriesContext):
+    """
+    Контекстный менеджер, который проваливает тест, если внутри блока
+    выполнено больше SQL-запросов, чем разрешено бюджетом.
+
+    В отличие от assertNumQueries допускает меньшее число запросов,
+    поэтому не ломается от оптимизаций, но ловит новые ленивые обращения.
+    """
+
+    def __init__(self, testcase, budget, label='', using=DEFAULT_DB_ALIAS):
+        self.testcase = testcase
+        self.budget = budget
+        self.label = label
+        super().__init__(connections[using])
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self)
+        if executed > self.budget:
+            queries = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(self.captured_queries, 1)
+            )
+            self.testcase.fail(
+                f'{self.label}: выполнено {executed} запросов при бюджете '
+                f'{self.budget}:\n{queries}'
+            )
+
+
+class QueryBudgetMixin:
+    def assertMaxQueries(self, budget, label='', using=DEFAULT_DB_ALIAS):
+        return QueryBudget(self, budget, label, using)
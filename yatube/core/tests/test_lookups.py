@@ -0,0 +1,57 @@
+"""
+Модуль предназначен для тестирования двухуровневого кэша поиска.
+"""
+
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from core.lookups import MISSING, TwoTierCache
+
+
+@override_settings(LOOKUP_LOCAL_SIZE=2, LOOKUP_LOCAL_TTL=5)
+class TwoTierCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = TwoTierCache('test')
+
+    def test_tiers(self):
+        """
+        Тест проверяет, что значение читается из памяти процесса, после
+        истечения TTL - из общего кэша, а удаление действует на оба.
+        """
+
+        self.assertIs(self.cache.get('a'), MISSING)
+        self.cache.set('a', {'value': 1})
+        with mock.patch('core.lookups.caches') as caches:
+            self.assertEqual(self.cache.get('a'), {'value': 1})
+        caches.__getitem__.assert_not_called()
+
+        with mock.patch('core.lookups.time.monotonic',
+                        return_value=10 ** 9):
+            self.assertEqual(self.cache.get('a'), {'value': 1})
+
+        self.cache.delete_many(['a'])
+        self.assertIs(self.cache.get('a'), MISSING)
+
+    def test_copies_and_lru(self):
+        """
+        Тест проверяет, что каждый вызов получает свою копию значения,
+        а в памяти процесса остается не больше LOOKUP_LOCAL_SIZE ключей.
+        """
+
+        self.cache.set('a', [1])
+        self.cache.get('a').append(2)
+        self.assertEqual(self.cache.get('a'), [1])
+
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertEqual(list(self.cache.local), ['a', 'c'])
+
+    def test_none_is_cached(self):
+        """
+        Тест проверяет, что результат "не найдено" тоже кэшируется.
+        """
+
+        self.cache.set('a', None)
+        self.assertIsNone(self.cache.get('a'))
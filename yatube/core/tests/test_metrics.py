@@ -0,0 +1,168 @@
+"""
+Модуль предназначен для тестирования реестра метрик и /metrics.
+"""
+
+import multiprocessing
+import tempfile
+import threading
+
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import CONTENT_TYPE, MmapStore, Registry, registry
+from posts.models import User
+
+
+def increment(counter, times):
+    for _ in range(times):
+        counter.inc(view='posts:index', status=200)
+
+
+@override_settings(METRICS_MULTIPROC_DIR=None)
+class RegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.counter = self.registry.counter(
+            'test_total', 'Счетчик.', ('view', 'status')
+        )
+        self.histogram = self.registry.histogram(
+            'test_seconds', 'Гистограмма.', ('view',), buckets=(0.1, 1)
+        )
+
+    def test_render(self):
+        """
+        Тест проверяет текстовый формат: метки, накопленные корзины
+        гистограммы, сумму и число наблюдений.
+        """
+
+        self.counter.inc(view='posts:index', status=200)
+        self.counter.inc(2, view='posts:index', status=200)
+        for value in (0.05, 0.5, 5):
+            self.histogram.observe(value, view='a"b')
+
+        text = self.registry.render()
+        self.assertIn('# TYPE test_total counter', text)
+        self.assertIn('test_total{view="posts:index",status="200"} 3', text)
+        self.assertIn('# TYPE test_seconds histogram', text)
+        for line in ('test_seconds_bucket{view="a\\"b",le="0.1"} 1',
+                     'test_seconds_bucket{view="a\\"b",le="1"} 2',
+                     'test_seconds_bucket{view="a\\"b",le="+Inf"} 3',
+                     'test_seconds_sum{view="a\\"b"} 5.55',
+                     'test_seconds_count{view="a\\"b"} 3'):
+            self.assertIn(line, text)
+
+    def test_threads(self):
+        """
+        Тест проверяет, что параллельные потоки не теряют приращения.
+        """
+
+        threads = [threading.Thread(target=increment,
+                                    args=(self.counter, 1000))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIn('status="200"} 8000', self.registry.render())
+
+
+class MultiprocessTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+            METRICS_MULTIPROC_DIR=self.tmp_dir.name
+        )
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.tmp_dir.cleanup()
+
+    def test_processes_are_summed(self):
+        """
+        Тест проверяет, что /metrics суммирует файлы всех процессов,
+        включая дочерний процесс, запущенный через fork.
+        """
+
+        test_registry = Registry()
+        counter = test_registry.counter('test_total', 'Счетчик.',
+                                        ('view', 'status'))
+        increment(counter, 3)
+        child = multiprocessing.get_context('fork').Process(
+            target=increment, args=(counter, 5)
+        )
+        child.start()
+        child.join()
+
+        self.assertEqual(child.exitcode, 0)
+        self.assertIn('status="200"} 8', test_registry.render())
+
+    def test_file_grows(self):
+        """
+        Тест проверяет, что файл процесса расширяется при нехватке места
+        и значения читаются после переоткрытия.
+        """
+
+        path = f'{self.tmp_dir.name}/metrics_1.db'
+        store = MmapStore(path)
+        for number in range(5000):
+            store.inc(f'["key", "", ["{number}"]]', number)
+        store.inc('["key", "", ["10"]]', 1)
+
+        values = MmapStore.read_file(path)
+        self.assertEqual(len(values), 5000)
+        self.assertEqual(values['["key", "", ["10"]]'], 11)
+        self.assertEqual(MmapStore(path).read(), values)
+
+
+@override_settings(METRICS_MULTIPROC_DIR=None)
+class MetricsEndpointTest(TestCase):
+    def setUp(self):
+        registry.reset()
+
+    def test_request_metrics(self):
+        """
+        Тест проверяет, что запросы к страницам попадают в метрики по
+        имени url вместе с числом запросов к базе и обращениями к кэшу.
+        """
+
+        client = Client()
+        client.get(reverse('posts:index'))
+        client.get(reverse('posts:index'))
+        client.get('/no/such/page/here/')
+
+        response = client.get(reverse('core:metrics'))
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count'
+            '{view="posts:index",method="GET"} 2', text
+        )
+        self.assertIn('yatube_request_queries_count{view="posts:index"} 2',
+                      text)
+        self.assertIn(
+            'yatube_responses_total{view="other",status="404"} 1', text
+        )
+        self.assertIn(
+            'yatube_cache_requests_total{cache="page",result="hit"} 1', text
+        )
+        self.assertIn(
+            'yatube_cache_requests_total{cache="page",result="miss"} 1', text
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_endpoint_is_restricted(self):
+        """
+        Тест проверяет, что /metrics отдается только с разрешенных
+        адресов и сотрудникам.
+        """
+
+        url = reverse('core:metrics')
+        client = Client()
+        self.assertEqual(client.get(url).status_code, 403)
+        self.assertEqual(
+            client.get(url, REMOTE_ADDR='10.0.0.1').status_code, 200
+        )
+        client.force_login(User.objects.create_user(username='staff',
+                                                    is_staff=True))
+        self.assertEqual(client.get(url).status_code, 200)
@@ -0,0 +1,73 @@
+"""
+Модуль предназначен для тестирования замеров Server-Timing.
+"""
+
+import re
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import timing
+from posts.models import Post, User
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='amogus')
+        Post.objects.create(text='Текст', author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_header_and_log_line(self):
+        """
+        Тест проверяет, что выбранный запрос получает заголовок
+        Server-Timing и строку лога с именем url и числом запросов.
+        """
+
+        with self.assertLogs('yatube.timing', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+
+        header = response['Server-Timing']
+        for name in ('db', 'tpl', 'py', 'total'):
+            self.assertRegex(header, rf'\b{name};dur=\d+\.\d')
+        db_count = int(re.search(r'"(\d+) queries"', header).group(1))
+        self.assertGreater(db_count, 0)
+        self.assertGreater(
+            float(re.search(r'tpl;dur=([\d.]+)', header).group(1)), 0
+        )
+
+        [line] = logs.output
+        self.assertIn('view=posts:index', line)
+        self.assertIn(f'db_count={db_count}', line)
+        self.assertEqual(logs.records[0].timing['status'], 200)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request(self):
+        """
+        Тест проверяет, что невыбранный запрос обрабатывается без замеров.
+        """
+
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_count_only_tracking(self):
+        """
+        Тест проверяет, что замеры для метрик только считают запросы, а
+        вложенный полный замер включает время до конца своего блока.
+        """
+
+        with timing.track(timed=False) as timings:
+            list(Post.objects.all())
+            self.assertEqual((timings.db_count, timings.db_time), (1, 0))
+            with timing.track() as nested:
+                list(Post.objects.all())
+            self.assertIs(nested, timings)
+            self.assertGreater(timings.db_time, 0)
+            self.assertFalse(timings.timed)
+        self.assertEqual(timings.db_count, 2)
@@ -0,0 +1,102 @@
+"""
+Модуль предназначен для тестирования профилировщика медленных запросов.
+"""
+
+import pstats
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import profiler
+from posts.models import Post, User
+
+
+@override_settings(PROFILER_SAMPLE_RATE=0)
+class ProfilerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='amogus')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(text='Текст', author=cls.user)
+
+    def setUp(self):
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+        self.url = reverse('posts:profile', args=[self.user.username])
+
+    def test_forced_capture(self):
+        """
+        Тест проверяет, что ?__profile=1 сотрудника сохраняет профиль и
+        SQL запроса без значений параметров, а снимок виден на странице
+        медленных запросов.
+        """
+
+        self.user_client.get(self.url, {'__profile': '1'})
+        self.assertEqual(profiler.list_captures(), [])
+
+        self.staff_client.get(self.url, {'__profile': '1'})
+        [capture] = profiler.list_captures()
+        self.assertEqual(capture['view'], 'posts:profile')
+        self.assertGreater(capture['queries'], 0)
+        name = capture['name']
+        stats = pstats.Stats(profiler.capture_path(name, 'prof'))
+        self.assertTrue(any(function[2] == 'profile'
+                            for function in stats.stats))
+
+        response = self.staff_client.get(reverse('core:profiles'))
+        self.assertContains(response, 'posts:profile')
+        self.assertContains(
+            response, reverse('core:profile_file', args=[name, 'prof'])
+        )
+        response = self.staff_client.get(
+            reverse('core:profile_file', args=[name, 'sql'])
+        )
+        sql = b''.join(response.streaming_content)
+        self.assertIn(b'SELECT', sql)
+        self.assertNotIn(self.user.username.encode(), sql)
+
+    def test_slow_request_flags_view(self):
+        """
+        Тест проверяет, что медленный запрос вне выборки отмечает url, и
+        следующий запрос к нему профилируется.
+        """
+
+        with self.settings(PROFILER_THRESHOLD=0):
+            self.user_client.get(self.url)
+            self.assertEqual(profiler.list_captures(), [])
+            self.user_client.get(self.url)
+        [capture] = profiler.list_captures()
+        self.assertEqual(capture['view'], 'posts:profile')
+
+    def test_threshold_and_rotation(self):
+        """
+        Тест проверяет, что сохраняются только запросы медленнее порога,
+        а в каталоге остаются последние PROFILER_MAX_CAPTURES снимков.
+        """
+
+        with self.settings(PROFILER_SAMPLE_RATE=1, PROFILER_THRESHOLD=60):
+            self.user_client.get(self.url)
+        self.assertEqual(profiler.list_captures(), [])
+
+        with self.settings(PROFILER_SAMPLE_RATE=1, PROFILER_THRESHOLD=0,
+                           PROFILER_MAX_CAPTURES=2):
+            for _ in range(3):
+                self.user_client.get(self.url)
+        self.assertEqual(len(profiler.list_captures()), 2)
+
+    def test_access(self):
+        """
+        Тест проверяет, что страница и файлы снимков доступны только
+        сотрудникам, а имя файла не выводит за каталог снимков.
+        """
+
+        response = self.user_client.get(reverse('core:profiles'))
+        self.assertEqual(response.status_code, 302)
+        response = self.staff_client.get(
+            reverse('core:profile_file', args=['..', 'json'])
+        )
+        self.assertEqual(response.status_code, 404)
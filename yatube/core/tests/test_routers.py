@@ -0,0 +1,151 @@
+"""
+Модуль предназначен для тестирования чтения с реплик базы данных.
+"""
+
+import os
+import tempfile
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import (Client, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.checks import check_replica_cache
+from posts.models import Post, User
+from users.lookups import users
+
+REPLICA = 'replica_test'
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    Реплика - отдельный файл SQLite, который заполняется командой
+    sync_replica из тестовой базы.
+    """
+
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.tmp_dir.name, 'replica.sqlite3'),
+        }
+        connections.ensure_defaults(REPLICA)
+        cls.settings_override = override_settings(
+            REPLICA_DATABASES=[REPLICA]
+        )
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        cls.tmp_dir.cleanup()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='amogus')
+        Post.objects.create(text='Старый пост', author=self.user)
+        call_command('sync_replica', stdout=StringIO())
+        Post.objects.create(text='Новый пост', author=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_read_views_use_replica(self):
+        """
+        Тест проверяет, что ленты читаются с реплики, а после синхронизации
+        на ней появляются новые посты.
+        """
+
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Старый пост')
+        self.assertNotContains(response, 'Новый пост')
+
+        call_command('sync_replica', stdout=StringIO())
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новый пост')
+
+    def test_writer_is_pinned_to_primary(self):
+        """
+        Тест проверяет, что после записи пользователь читает основную
+        базу, пока не истечет окно закрепления.
+        """
+
+        response = self.client.post(reverse('posts:post_create'),
+                                    {'text': 'Свежий пост'})
+        self.assertIn('primary_pin', response.cookies)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
+        self.assertContains(response, 'Новый пост')
+
+        self.client.cookies['primary_pin'] = str(time.time() - 1)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Свежий пост')
+
+    def test_other_views_use_primary(self):
+        """
+        Тест проверяет, что страницы вне REPLICA_READ_VIEWS читают
+        основную базу.
+        """
+
+        response = self.client.get(reverse('posts:search'), {'q': 'Новый'})
+        self.assertContains(response, 'Новый пост')
+
+    def test_sync_invalidates_cached_pages(self):
+        """
+        Тест проверяет, что страница из кэша анонимов, собранная по
+        отстающей реплике, не переживает синхронизацию.
+        """
+
+        anonymous = Client()
+        self.assertNotContains(anonymous.get(reverse('posts:index')),
+                               'Новый пост')
+        call_command('sync_replica', stdout=StringIO())
+        self.assertContains(anonymous.get(reverse('posts:index')),
+                            'Новый пост')
+
+    def test_lookups_read_primary(self):
+        """
+        Тест проверяет, что страницы, читающие реплику, кладут в кэш
+        поиска пользователя из основной базы, а не отставшую копию.
+        """
+
+        User.objects.filter(pk=self.user.pk).update(first_name='Новое имя')
+        users.invalidate([self.user.pk], ['amogus'])
+        response = Client().get(reverse('posts:profile', args=['amogus']))
+        self.assertContains(response, 'Новое имя')
+        self.assertEqual(users.get_by_pk(self.user.pk).first_name,
+                         'Новое имя')
+
+
+class ReplicaCacheCheckTest(SimpleTestCase):
+    def test_replicas_need_shared_cache(self):
+        """
+        Тест проверяет, что чтение с реплик требует общего для процессов
+        кэша страниц.
+        """
+
+        cases = (
+            ([], LOCMEM_CACHE, []),
+            ([REPLICA], LOCMEM_CACHE, ['core.E001']),
+            ([REPLICA], FILE_CACHE, []),
+        )
+        for replicas, backend, errors in cases:
+            caches = {'default': {'BACKEND': backend,
+                                  'LOCATION': tempfile.gettempdir()}}
+            with self.subTest(replicas=replicas, backend=backend), \
+                    override_settings(REPLICA_DATABASES=replicas,
+                                      CACHES=caches):
+                self.assertEqual(
+                    [error.id for error in check_replica_cache(None)], errors
+                )
@@ -0,0 +1,80 @@
+"""
+Модуль предназначен для тестирования настройки SQLite.
+"""
+
+from unittest import mock
+
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.sqlite import atomic_with_retry
+
+
+class PragmasTest(TestCase):
+    def test_connection_pragmas(self):
+        """
+        Тест проверяет, что новое соединение получает SQLITE_PRAGMAS.
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64 * 1024)
+
+
+@override_settings(SQLITE_WRITE_RETRIES=3, SQLITE_RETRY_BASE_DELAY=0.01)
+@mock.patch('core.sqlite.time.sleep')
+class AtomicWithRetryTest(TransactionTestCase):
+    def failing(self, failures, message='database is locked'):
+        calls = []
+
+        def func():
+            calls.append(transaction.get_connection().in_atomic_block)
+            if len(calls) <= failures:
+                raise OperationalError(message)
+            return 'ok'
+        return func, calls
+
+    def test_retries_locked_transaction(self, sleep):
+        """
+        Тест проверяет, что занятая база приводит к повтору транзакции
+        с растущей случайной паузой.
+        """
+
+        func, calls = self.failing(2)
+        self.assertEqual(atomic_with_retry(func), 'ok')
+        self.assertEqual(calls, [True, True, True])
+        first, second = (call.args[0] for call in sleep.call_args_list)
+        self.assertLessEqual(first, 0.01)
+        self.assertLessEqual(second, 0.02)
+
+    def test_gives_up(self, sleep):
+        """
+        Тест проверяет, что после SQLITE_WRITE_RETRIES повторов и при
+        других ошибках исключение передается дальше.
+        """
+
+        func, calls = self.failing(10)
+        with self.assertRaises(OperationalError):
+            atomic_with_retry(func)
+        self.assertEqual(len(calls), 4)
+
+        func, calls = self.failing(1, 'no such table: posts_post')
+        with self.assertRaises(OperationalError):
+            atomic_with_retry(func)
+        self.assertEqual(len(calls), 1)
+
+    def test_no_retry_inside_outer_transaction(self, sleep):
+        """
+        Тест проверяет, что внутри внешней транзакции повтора нет.
+        """
+
+        func, calls = self.failing(1)
+        with self.assertRaises(OperationalError):
+            with transaction.atomic():
+                atomic_with_retry(func)
+        self.assertEqual(len(calls), 1)
+        sleep.assert_not_called()
@@ -0,0 +1,38 @@
+"""
+Модуль предназначен для тестирования пользовательских фильтров шаблонов.
+"""
+
+from django.core.paginator import Paginator
+from django.test import SimpleTestCase
+
+from core.templatetags.custom_filters import page_window
+
+
+class PageWindowFilterTest(SimpleTestCase):
+    def get_window(self, number, num_pages):
+        page = Paginator(range(num_pages), 1).page(number)
+        return page_window(page)
+
+    def test_short_range_is_not_elided(self):
+        """
+        Тест проверяет, что короткий список страниц выводится целиком.
+        """
+
+        self.assertEqual(self.get_window(3, 5), [1, 2, 3, 4, 5])
+
+    def test_window_around_current_page(self):
+        """
+        Тест проверяет, что для длинного списка выводятся края и окно
+        вокруг текущей страницы.
+        """
+
+        cases = {
+            1: [1, 2, 3, None, 200000],
+            4: [1, 2, 3, 4, 5, 6, None, 200000],
+            100000: [1, None, 99998, 99999, 100000, 100001, 100002, None,
+                     200000],
+            200000: [1, None, 199998, 199999, 200000],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(self.get_window(number, 200000), expected)
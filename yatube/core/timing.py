@@ -0,0 +1,117 @@
+"""
+Замеры времени обработки запроса: SQL, рендеринг шаблонов и Python.
+
+Замеры текущего запроса хранятся в contextvar. SQL считается оберткой
+execute_wrapper, которую каждое соединение получает один раз при
+создании (install_execute_wrapper), шаблоны - бэкендом
+TimedDjangoTemplates. Вне блока track() обертка и бэкенд только
+проверяют contextvar.
+
+track(timed=False) только считает SQL-запросы, без замеров времени
+запросов и шаблонов: так метрики считаются для каждого запроса, а
+полные замеры остаются у выборки Server-Timing.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates
+
+current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('timed', 'db_count', 'db_time', 'template_time',
+                 'template_depth')
+
+    def __init__(self, timed=True):
+        self.timed = timed
+        self.db_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    if not timings.timed:
+        timings.db_count += 1
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_time += time.perf_counter() - started
+        timings.db_count += 1
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    """
+    Обработчик connection_created: ставит execute_wrapper на соединение.
+    """
+
+    connection.execute_wrappers.append(execute_wrapper)
+
+
+@contextmanager
+def track(timed=True):
+    """
+    Включает замеры для блока и отдает RequestTimings. Если замеры уже
+    включены (например, внешним middleware), отдает текущие, а
+    timed=True включает в них замеры времени до конца блока.
+    """
+
+    timings = current.get()
+    if timings is not None:
+        was_timed = timings.timed
+        timings.timed = was_timed or timed
+        try:
+            yield timings
+        finally:
+            timings.timed = was_timed
+        return
+
+    timings = RequestTimings(timed)
+    token = current.set(timings)
+    try:
+        yield timings
+    finally:
+        current.reset(token)
+
+
+class TimedTemplate:
+    """
+    Обертка шаблона бэкенда, замеряющая render. Вложенные рендеры
+    (например, карточки постов внутри страницы) уже входят во время
+    внешнего и отдельно не учитываются.
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timings = current.get()
+        if timings is None or not timings.timed:
+            return self.template.render(context, request)
+        timings.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('metrics', views.metrics, name='metrics'),
+    path('staff/profiles/', views.profiles, name='profiles'),
+    path('staff/profiles/<name>.<extension>', views.profile_file,
+         name='profile_file'),
+]
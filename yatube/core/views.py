@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseForbidden)
+from django.shortcuts import render
+
+from . import profiler
+from .metrics import CONTENT_TYPE, registry
+
+
+def metrics(request):
+    # метрики раскрывают адреса и нагрузку: только для сборщика с
+    # разрешенного адреса и для сотрудников
+    if (request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS
+            and not request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
+
+
+@staff_member_required
+def profiles(request):
+    return render(request, 'core/profiles.html', {
+        'views': profiler.slowest_by_view(settings.PROFILER_SLOWEST_PER_VIEW),
+        'threshold': settings.PROFILER_THRESHOLD,
+        'flag': settings.PROFILER_FLAG,
+    })
+
+
+@staff_member_required
+def profile_file(request, name, extension):
+    try:
+        path = profiler.capture_path(name, extension)
+        stream = open(path, 'rb')
+    except (ValueError, FileNotFoundError):
+        raise Http404
+    if extension == 'prof':
+        return FileResponse(stream, as_attachment=True,
+                            filename=f'{name}.prof')
+    return FileResponse(stream, content_type='text/plain; charset=utf-8')
@@ -1,18 +1,174 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.auth import get_permission_codename, get_user_model
+from django.contrib.admin.options import IS_POPUP_VAR
+from django.contrib.auth.admin import UserAdmin
+from django.shortcuts import redirect
 
-from .models import Group, Post
+from core.sqlite import atomic_with_retry
+
+from . import cache, deletion, search
+from .models import DeletionJob, Follow, Group, Post
+from .paginators import CappedCountPaginator
+
+GROUP_CHOICES_KEY = 'admin:group_choices:{version}'
+
+User = get_user_model()
+
+
+def get_group_choices(field):
+    """
+    Варианты выбора группы, общие для всех строк списка постов. Хранятся
+    в кэше под текущей версией групп, поэтому любое изменение группы
+    сбрасывает их.
+    """
+
+    version, = cache.get_versions((cache.GROUPS,))
+    key = GROUP_CHOICES_KEY.format(version=version)
+    choices = cache.get_cache().get(key)
+    if choices is None:
+        choices = list(field.choices)
+        cache.get_cache().set(key, choices, None)
+    return choices
 
 
 @admin.register(Post)
 class AdminZonePost(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    paginator = CappedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # поиск по полнотекстовому индексу вместо LIKE '%q%'
+        if not search_term:
+            return queryset, False
+        return search.filter_matching(queryset, search_term), False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group':
+            # без готового списка каждая строка list_editable
+            # выполняет свой запрос к группам
+            field.choices = get_group_choices(field)
+        return field
+
+
+class QueuedDeletionMixin:
+    """
+    Удаление объектов админкой через очередь заданий (posts/deletion.py):
+    действие списка, кнопка "Удалить" формы и delete_queryset ставят
+    задание вместо удаления коллектором в запросе. Встроенное действие
+    delete_selected убрано, а страница подтверждения не собирает
+    связанные объекты, чтобы не загружать все посты. Вместо этого права
+    на удаление проверяются по моделям cascade_models, строки которых
+    задание удаляет или меняет.
+    """
+
+    queue_one = None
+    cascade_models = ()
+    actions = ('queue_deletion',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        perms_needed = set()
+        for model in self.cascade_models:
+            opts = model._meta
+            codename = get_permission_codename('delete', opts)
+            if not request.user.has_perm(f'{opts.app_label}.{codename}'):
+                perms_needed.add(opts.verbose_name)
+        return [str(obj) for obj in objs], {}, perms_needed, []
+
+    def delete_model(self, request, obj):
+        atomic_with_retry(self.queue_one, obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+
+    def response_delete(self, request, obj_display, obj_id):
+        if IS_POPUP_VAR in request.POST:
+            return super().response_delete(request, obj_display, obj_id)
+        self.message_user(
+            request,
+            f'Удаление «{obj_display}» поставлено в очередь. '
+            'Ход выполнения виден в заданиях удаления.',
+            messages.SUCCESS
+        )
+        opts = self.model._meta
+        return redirect(f'admin:{opts.app_label}_{opts.model_name}'
+                        '_changelist')
+
+    def queue_deletion(self, request, queryset):
+        _, _, perms_needed, _ = self.get_deleted_objects(queryset, request)
+        if perms_needed:
+            self.message_user(
+                request,
+                'Нет прав на удаление связанных объектов: '
+                f'{", ".join(sorted(map(str, perms_needed)))}.',
+                messages.ERROR
+            )
+            return
+        self.delete_queryset(request, queryset)
+        self.message_user(
+            request,
+            f'Удаление поставлено в очередь: {len(queryset)}. '
+            'Ход выполнения виден в заданиях удаления.',
+            messages.SUCCESS
+        )
+
+    queue_deletion.short_description = 'Удалить в фоне (пачками)'
+    queue_deletion.allowed_permissions = ('delete',)
+
 
 @admin.register(Group)
-class AdminZoneGroup(admin.ModelAdmin):
+class AdminZoneGroup(QueuedDeletionMixin, admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description',)
     list_filter = ('title',)
+    queue_one = staticmethod(deletion.queue_group_deletion)
+    # посты группы отвязываются от нее
+    cascade_models = (Post,)
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class AdminZoneUser(QueuedDeletionMixin, UserAdmin):
+    queue_one = staticmethod(deletion.queue_user_deletion)
+    cascade_models = (Post, Follow)
+
+
+@admin.register(DeletionJob)
+class AdminZoneDeletionJob(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'target_repr', 'status', 'progress_display',
+                    'created_at', 'updated_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('kind', 'target_id', 'target_repr', 'status', 'total',
+                       'processed', 'last_post_id', 'error', 'created_at',
+                       'updated_at')
+    actions = ('requeue',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def progress_display(self, job):
+        return f'{job.processed} из {job.total} ({job.progress}%)'
+
+    progress_display.short_description = 'Ход выполнения'
+
+    def requeue(self, request, queryset):
+        requeued = sum(atomic_with_retry(deletion.requeue, job)
+                       for job in queryset)
+        self.message_user(request,
+                          f'Возвращено в очередь заданий: {requeued}.')
+
+    requeue.short_description = 'Продолжить прерванные задания'
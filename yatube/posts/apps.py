@@ -1,5 +1,20 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def restore_search_triggers(sender, using, **kwargs):
+    from . import search
+
+    connection = connections[using]
+    if search.fts_available(connection) and search.is_installed(connection):
+        search.install_triggers(connection)
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(restore_search_triggers, sender=self)
@@ -0,0 +1,226 @@
+"""
+Кэш страниц лент и постов для анонимных пользователей.
+
+Каждая страница зависит от набора лент (главная, группа, профиль,
+пост). У каждой ленты в кэше хранится версия, которая входит в ключ
+страницы. Запись меняет версии только затронутых лент, поэтому старые
+страницы перестают читаться без общего сброса кэша и просто вытесняются.
+Переименование автора или группы тоже меняет версии только тех лент, где
+они выводятся (см. signals.py).
+
+Те же версии используются для кэша карточек постов: карточка одинакова
+для всех пользователей и зависит только от версий самого поста, его
+автора и группы.
+"""
+
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.metrics import CACHE_REQUESTS
+
+VERSION_PREFIX = 'version:'
+PAGE_PREFIX = 'page:'
+CARD_PREFIX = 'card:'
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+INDEX_FEED = 'feed:index'
+# меняется при изменении любой группы: от нее зависят только варианты
+# выбора группы в админке
+GROUPS = 'groups'
+# меняется после копирования базы на реплики: страница, собранная по
+# отстающей реплике, не должна пережить синхронизацию
+REPLICA = 'replica'
+
+
+def group_feed(slug):
+    return f'feed:group:{slug}'
+
+
+def profile_feed(username):
+    return f'feed:profile:{username}'
+
+
+def post_feed(post_id):
+    return f'post:{post_id}'
+
+
+def author_version(author_id):
+    # имя и username автора в его карточках
+    return f'author:{author_id}'
+
+
+def group_version(group_id):
+    # название и адрес группы в карточках ее постов
+    return f'group:{group_id}'
+
+
+def post_views(post_id):
+    # отдельная версия, чтобы счетчик просмотров не сбрасывал карточки
+    return f'views:{post_id}'
+
+
+def index_dependencies():
+    return (INDEX_FEED, REPLICA)
+
+
+def group_dependencies(slug):
+    return (group_feed(slug), REPLICA)
+
+
+def profile_dependencies(username):
+    return (profile_feed(username), REPLICA)
+
+
+def post_dependencies(username, post_id):
+    # профиль входит в зависимости из-за счетчика постов автора, а также
+    # его имени и названий групп, которые меняют версию профиля
+    return (post_feed(post_id), post_views(post_id), profile_feed(username),
+            REPLICA)
+
+
+def get_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def get_versions(names):
+    """
+    Текущие версии лент. Отсутствующая (или вытесненная) версия
+    заменяется новой, что делает недоступными все старые страницы.
+    """
+
+    cache = get_cache()
+    keys = [VERSION_PREFIX + name for name in names]
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _set_new_versions(names):
+    get_cache().set_many(
+        {VERSION_PREFIX + name: new_version() for name in names}, None
+    )
+
+
+def bump(*names):
+    """
+    Инвалидирует страницы, зависящие от лент names.
+
+    Версии меняются сразу и еще раз после коммита транзакции: иначе
+    параллельный запрос мог бы закэшировать старые данные под новой
+    версией, пока транзакция еще не завершена.
+    """
+
+    names = [name for name in names if name]
+    if not names:
+        return
+    _set_new_versions(names)
+    transaction.on_commit(lambda: _set_new_versions(names))
+
+
+def page_cache_key(request, versions):
+    raw = '|'.join([request.get_full_path(), *versions])
+    return PAGE_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+
+def feed_etag(dependencies):
+    """
+    Функция ETag для django.views.decorators.http.condition.
+
+    ETag строится из версий лент страницы, адреса с параметрами и
+    пользователя (шапка страницы у каждого своя) и вычисляется без
+    запросов к таблице постов.
+    """
+
+    def etag(request, *args, **kwargs):
+        raw = '|'.join([
+            request.get_full_path(),
+            str(request.user.pk),
+            *get_versions(dependencies(**kwargs)),
+        ])
+        return hashlib.md5(raw.encode()).hexdigest()
+    return etag
+
+
+def cache_page_for_anonymous(dependencies):
+    """
+    Кэширует ответ view для анонимных GET/HEAD-запросов.
+
+    dependencies получает именованные аргументы view и возвращает имена
+    лент, от которых зависит страница.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+
+            cache = get_cache()
+            key = page_cache_key(request, get_versions(dependencies(**kwargs)))
+            response = cache.get(key)
+            if response is not None:
+                CACHE_REQUESTS.inc(cache='page', result='hit')
+                return response
+            CACHE_REQUESTS.inc(cache='page', result='miss')
+
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200 and not response.streaming
+                    and not response.cookies):
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def render_post_cards(posts, show_group=True):
+    """
+    HTML карточек постов страницы. Готовые карточки читаются из кэша
+    одним запросом get_many, недостающие рендерятся и сохраняются
+    одним set_many.
+    """
+
+    posts = list(posts)
+    if not posts:
+        return []
+    cache = get_cache()
+    names = {REPLICA}
+    for post in posts:
+        names.update((post_feed(post.pk), author_version(post.author_id),
+                      group_version(post.group_id)))
+    names = list(names)
+    versions = dict(zip(names, get_versions(names)))
+    keys = [
+        f'{CARD_PREFIX}{post.pk}:{versions[post_feed(post.pk)]}:'
+        f'{versions[author_version(post.author_id)]}:'
+        f'{versions[group_version(post.group_id)]}:'
+        f'{versions[REPLICA]}:{show_group:d}'
+        for post in posts
+    ]
+    cards = cache.get_many(keys)
+    missing = {}
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            missing[key] = render_to_string(
+                CARD_TEMPLATE, {'post': post, 'show_group': show_group}
+            )
+    CACHE_REQUESTS.inc(len(cards), cache='card', result='hit')
+    if missing:
+        CACHE_REQUESTS.inc(len(missing), cache='card', result='miss')
+        cache.set_many(missing, settings.CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
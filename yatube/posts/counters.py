@@ -0,0 +1,138 @@
+"""
+Денормализованные счетчики постов групп и авторов и подписчиков авторов.
+
+Счетчики меняются в той же транзакции, что и сам пост (см. signals.py).
+Массовые операции в обход сигналов (bulk_create, QuerySet.update) должны
+после себя вызывать recount_posts().
+"""
+
+import heapq
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from users.lookups import users
+
+from . import timeline
+from .lookups import groups
+from .models import AuthorStats, Follow, Group, Post
+
+RECOUNT_BATCH_SIZE = 1000
+
+
+def shifted(field, delta):
+    """
+    Значение счетчика field, измененное на delta, но не меньше нуля.
+    Разошедшийся с постами счетчик иначе нарушил бы CHECK поля
+    PositiveIntegerField и сломал удаление поста; расхождение
+    исправляет recount_posts().
+    """
+
+    return Greatest(F(field) + delta, 0)
+
+
+def change_author_count(author_id, delta):
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        posts_count=shifted('posts_count', delta)
+    )
+    if not updated and delta > 0:
+        AuthorStats.objects.get_or_create(
+            author_id=author_id,
+            defaults={'posts_count': delta}
+        )
+    # счетчик входит в закэшированного автора (см. users.lookups)
+    users.invalidate([author_id])
+
+
+def change_followers_count(author_id, delta):
+    """
+    Меняет счетчик подписчиков автора и возвращает новое значение.
+    """
+
+    updated = AuthorStats.objects.filter(author_id=author_id).update(
+        followers_count=shifted('followers_count', delta)
+    )
+    if not updated and delta > 0:
+        AuthorStats.objects.get_or_create(
+            author_id=author_id,
+            defaults={'followers_count': delta}
+        )
+    users.invalidate([author_id])
+    return AuthorStats.objects.filter(author_id=author_id).values_list(
+        'followers_count', flat=True
+    ).first() or 0
+
+
+def change_group_count(group_id, delta):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=shifted('posts_count', delta)
+        )
+        groups.invalidate([group_id])
+
+
+def post_added(post):
+    change_author_count(post.author_id, 1)
+    change_group_count(post.group_id, 1)
+
+
+def post_removed(post):
+    change_author_count(post.author_id, -1)
+    change_group_count(post.group_id, -1)
+
+
+def post_moved(old_group_id, new_group_id):
+    change_group_count(old_group_id, -1)
+    change_group_count(new_group_id, 1)
+
+
+def merge_author_counts(post_counts, follower_counts):
+    """
+    Строки AuthorStats из двух отсортированных по автору потоков пар
+    (автор, число). Слияние не держит в памяти счетчики всех авторов.
+    """
+
+    merged = heapq.merge(
+        ((author_id, total, 0) for author_id, total in post_counts),
+        ((author_id, 0, total) for author_id, total in follower_counts),
+    )
+    for author_id, rows in groupby(merged, itemgetter(0)):
+        rows = list(rows)
+        yield AuthorStats(author_id=author_id,
+                          posts_count=sum(row[1] for row in rows),
+                          followers_count=sum(row[2] for row in rows))
+
+
+def recount_posts(batch_size=RECOUNT_BATCH_SIZE):
+    """
+    Пересчитывает все счетчики агрегирующими запросами.
+    """
+
+    group_counts = Post.objects.filter(
+        group=OuterRef('pk')
+    ).order_by().values('group').annotate(total=Count('pk')).values('total')
+    post_counts = Post.objects.order_by('author').values('author').annotate(
+        total=Count('pk')
+    ).values_list('author', 'total')
+    follower_counts = Follow.objects.order_by('author').values(
+        'author'
+    ).annotate(total=Count('pk')).values_list('author', 'total')
+
+    with transaction.atomic():
+        Group.objects.update(
+            posts_count=Coalesce(Subquery(group_counts), 0)
+        )
+        AuthorStats.objects.all().delete()
+        rows = merge_author_counts(post_counts.iterator(),
+                                   follower_counts.iterator())
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            AuthorStats.objects.bulk_create(batch)
+    groups.invalidate(Group.objects.values_list('pk', flat=True))
+    timeline.reset_fanin_authors()
+    users.invalidate(AuthorStats.objects.values_list('author_id', flat=True))
@@ -0,0 +1,290 @@
+"""
+Удаление пользователей и групп с большим числом постов.
+
+Обычное удаление пользователя загружает в коллектор все его посты и
+отправляет post_delete на каждый, а удаление группы отвязывает ее посты
+одним UPDATE, который держит блокировку записи до конца. Здесь посты
+удаляются (у пользователя) или отвязываются (у группы) пачками по
+DELETION_BATCH_SIZE, и каждая пачка пишется своей короткой транзакцией.
+Счетчики и версии кэша меняются один раз на пачку. Сам пользователь или
+группа удаляются последним шагом, когда связанных постов уже нет.
+
+Задания (DeletionJob) разбирает фоновый поток процесса, как и очередь
+миниатюр. Задание выполняет только тот, кто атомарно перевел его из
+очереди в работу, а каждая пачка обновляет updated_at. Задания,
+прерванные ошибкой или перезапуском (в работе, но без обновлений дольше
+DELETION_STALE_TIMEOUT), продолжает команда run_deletion_jobs.
+"""
+
+import logging
+import os
+import queue
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.utils import timezone
+
+from core.sqlite import atomic_with_retry
+
+from . import counters
+from .models import DeletionJob, Follow, Group, Post, TimelineEntry
+from .signals import invalidate_feeds
+
+User = get_user_model()
+
+logger = logging.getLogger('yatube.deletion')
+
+_queue = queue.Queue()
+_lock = threading.Lock()
+_worker_pid = None
+
+
+def _queue_job(kind, target_id, target_repr, posts):
+    # незавершенное задание продолжается со своего места, а не
+    # начинается заново
+    job = DeletionJob.objects.filter(
+        kind=kind, target_id=target_id,
+        status__in=(*DeletionJob.ACTIVE_STATUSES, DeletionJob.FAILED)
+    ).order_by('-pk').first()
+    if job is None:
+        job = DeletionJob.objects.create(
+            kind=kind, target_id=target_id, target_repr=target_repr,
+            total=posts.count()
+        )
+    elif job.status == DeletionJob.FAILED:
+        job.status, job.error = DeletionJob.QUEUED, ''
+        job.save(update_fields=('status', 'error', 'updated_at'))
+    enqueue(job.pk)
+    return job
+
+
+def queue_user_deletion(user):
+    """
+    Ставит удаление пользователя и его постов в очередь. Пользователь
+    сразу становится неактивным: он больше не войдет и не напишет новых
+    постов, пока идет удаление.
+    """
+
+    if user.is_active:
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+    return _queue_job(DeletionJob.USER, user.pk, user.username, user.posts)
+
+
+def queue_group_deletion(group):
+    """
+    Ставит в очередь отвязку постов группы и ее удаление.
+    """
+
+    return _queue_job(DeletionJob.GROUP, group.pk, group.slug, group.posts)
+
+
+def requeue(job):
+    """
+    Возвращает в очередь задание, прерванное ошибкой.
+    """
+
+    if job.status != DeletionJob.FAILED:
+        return False
+    job.status, job.error = DeletionJob.QUEUED, ''
+    job.save(update_fields=('status', 'error', 'updated_at'))
+    enqueue(job.pk)
+    return True
+
+
+def invalidate_chunk(rows):
+    """
+    Меняет версии лент и карточек постов пачки (pk, author_id, group_id).
+    """
+
+    post_ids, author_ids, group_ids = zip(*rows)
+    invalidate_feeds(set(author_ids), set(group_ids), post_ids)
+
+
+def delete_posts(rows):
+    post_ids = [post_id for post_id, _, _ in rows]
+    for relation in get_candidate_relations_to_delete(Post._meta):
+        if relation.on_delete is models.CASCADE:
+            relation.related_model._base_manager.filter(
+                **{f'{relation.field.name}__in': post_ids}
+            ).delete()
+    invalidate_chunk(rows)
+    # зависимые строки уже удалены: коллектор только загрузил бы посты
+    # ради post_delete, счетчики же меняются ниже одним запросом
+    Post.objects.filter(pk__in=post_ids)._raw_delete(Post.objects.db)
+    for author_id, count in Counter(row[1] for row in rows).items():
+        counters.change_author_count(author_id, -count)
+    for group_id, count in Counter(row[2] for row in rows).items():
+        counters.change_group_count(group_id, -count)
+
+
+def detach_posts(rows):
+    post_ids = [post_id for post_id, _, _ in rows]
+    invalidate_chunk(rows)
+    # update() не заполняет auto_now
+    Post.objects.filter(pk__in=post_ids).update(
+        group=None, updated_at=timezone.now()
+    )
+    for group_id, count in Counter(row[2] for row in rows).items():
+        counters.change_group_count(group_id, -count)
+
+
+def process_chunk(job, posts, handle_chunk, batch_size):
+    rows = list(posts.filter(pk__gt=job.last_post_id).order_by(
+        'pk'
+    ).values_list('pk', 'author_id', 'group_id')[:batch_size])
+    if rows:
+        handle_chunk(rows)
+        # место остановки пишется в той же транзакции, что и пачка
+        DeletionJob.objects.filter(pk=job.pk).update(
+            last_post_id=rows[-1][0],
+            processed=F('processed') + len(rows),
+            updated_at=timezone.now()
+        )
+    return rows
+
+
+def process_posts(job, posts, handle_chunk, batch_size, progress):
+    while True:
+        rows = atomic_with_retry(process_chunk, job, posts, handle_chunk,
+                                 batch_size)
+        if not rows:
+            return
+        job.last_post_id = rows[-1][0]
+        job.processed += len(rows)
+        logger.info('%s: обработано постов %s из %s',
+                    job, job.processed, job.total)
+        if progress is not None:
+            progress(job)
+
+
+def touch(job):
+    DeletionJob.objects.filter(pk=job.pk).update(updated_at=timezone.now())
+
+
+def delete_chunk(job, model, pks):
+    model._base_manager.filter(pk__in=pks).delete()
+    touch(job)
+
+
+def delete_in_chunks(job, queryset, batch_size):
+    """
+    Удаляет строки queryset пачками, каждую своей транзакцией. Сигналы
+    удаления отправляются как обычно.
+    """
+
+    while True:
+        pks = list(queryset.order_by('pk').values_list(
+            'pk', flat=True
+        )[:batch_size])
+        if not pks:
+            return
+        atomic_with_retry(delete_chunk, job, queryset.model, pks)
+
+
+def delete_user(job, batch_size, progress):
+    process_posts(job, Post.objects.filter(author_id=job.target_id),
+                  delete_posts, batch_size, progress)
+    for queryset in (TimelineEntry.objects.filter(user_id=job.target_id),
+                     Follow.objects.filter(author_id=job.target_id),
+                     Follow.objects.filter(user_id=job.target_id)):
+        delete_in_chunks(job, queryset, batch_size)
+    atomic_with_retry(User.objects.filter(pk=job.target_id).delete)
+
+
+def delete_group(job, batch_size, progress):
+    process_posts(job, Post.objects.filter(group_id=job.target_id),
+                  detach_posts, batch_size, progress)
+    atomic_with_retry(Group.objects.filter(pk=job.target_id).delete)
+
+
+HANDLERS = {
+    DeletionJob.USER: delete_user,
+    DeletionJob.GROUP: delete_group,
+}
+
+
+def run_job(job_id, batch_size=None, progress=None):
+    """
+    Выполняет задание удаления с места, где оно остановилось. progress
+    вызывается с заданием после каждой пачки. Ошибка записывается в
+    задание и передается дальше. Задание, которое уже выполняет другой
+    поток или процесс, пропускается: возвращается None.
+    """
+
+    claimed = DeletionJob.objects.filter(
+        pk=job_id, status=DeletionJob.QUEUED
+    ).update(status=DeletionJob.RUNNING, updated_at=timezone.now())
+    if not claimed:
+        return None
+    job = DeletionJob.objects.get(pk=job_id)
+    try:
+        HANDLERS[job.kind](job, batch_size or settings.DELETION_BATCH_SIZE,
+                           progress)
+    except Exception as error:
+        job.status, job.error = DeletionJob.FAILED, repr(error)
+        job.save(update_fields=('status', 'error', 'updated_at'))
+        raise
+    job.status = DeletionJob.DONE
+    job.total = max(job.total, job.processed)
+    job.save(update_fields=('status', 'total', 'updated_at'))
+    return job
+
+
+def reset_stale(timeout=None):
+    """
+    Возвращает в очередь задания, которые числятся в работе, но не
+    обновлялись дольше timeout секунд: их процесс был прерван.
+    """
+
+    if timeout is None:
+        timeout = settings.DELETION_STALE_TIMEOUT
+    return DeletionJob.objects.filter(
+        status=DeletionJob.RUNNING,
+        updated_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status=DeletionJob.QUEUED)
+
+
+def run_worker():
+    while True:
+        job_id = _queue.get()
+        try:
+            run_job(job_id)
+        except Exception:
+            logger.exception('задание удаления %s прервано', job_id)
+        finally:
+            connection.close()
+
+
+def ensure_worker():
+    global _worker_pid
+    if _worker_pid == os.getpid():
+        return
+    with _lock:
+        if _worker_pid == os.getpid():
+            return
+        _worker_pid = os.getpid()
+        threading.Thread(target=run_worker, daemon=True,
+                         name='deletion-worker').start()
+
+
+def put(job_id):
+    ensure_worker()
+    _queue.put(job_id)
+
+
+def enqueue(job_id):
+    """
+    Передает задание фоновому потоку после коммита текущей транзакции.
+    """
+
+    if settings.DELETION_JOBS_ASYNC:
+        transaction.on_commit(lambda: put(job_id))
+    else:
+        transaction.on_commit(lambda: run_job(job_id))
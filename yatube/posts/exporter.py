@@ -0,0 +1,97 @@
+"""
+Потоковая выгрузка постов в JSONL или CSV.
+
+Посты читаются пачками по ключу (pub_date, id) одним запросом с
+присоединенными авторами и группами, строки формируются по одной,
+поэтому расход памяти не зависит от объема выгрузки. Формат записей
+совпадает с форматом команды import_posts.
+"""
+
+import csv
+import json
+import zlib
+
+from django.db.models import Q
+
+from .models import Post
+
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+FIELDS = ('id', 'text', 'author', 'group', 'pub_date')
+DEFAULT_CHUNK_SIZE = 2000
+# wbits=31: zlib пишет gzip-заголовок и контрольную сумму
+GZIP_WBITS = 31
+
+
+def posts_for_export(group=None, author=None):
+    posts = Post.objects.all()
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    return posts
+
+
+def iter_posts(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    rows = queryset.order_by('pub_date', 'pk').values_list(
+        'pk', 'text', 'author__username', 'group__slug', 'pub_date'
+    )
+    chunk = rows
+    while True:
+        batch = list(chunk[:chunk_size])
+        yield from batch
+        if len(batch) < chunk_size:
+            return
+        pk, *_, pub_date = batch[-1]
+        chunk = rows.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        )
+
+
+def render_jsonl(rows):
+    for row in rows:
+        record = dict(zip(FIELDS, row))
+        record['pub_date'] = record['pub_date'].isoformat()
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for pk, text, author, group, pub_date in rows:
+        yield writer.writerow(
+            (pk, text, author, group or '', pub_date.isoformat())
+        )
+
+
+RENDERERS = {
+    'jsonl': render_jsonl,
+    'csv': render_csv,
+}
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_posts(queryset, fmt='jsonl', compress=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Генератор частей выгрузки: строк str или, при compress, байтов gzip.
+    """
+
+    chunks = RENDERERS[fmt](iter_posts(queryset, chunk_size))
+    return gzip_stream(chunks) if compress else chunks
@@ -0,0 +1,244 @@
+"""
+Потоковый импорт постов из JSONL или CSV.
+
+Записи читаются по одной и копятся в пачку фиксированного размера;
+каждая пачка пишется одним bulk_create в своей транзакции вместе со
+счетчиками постов. Поэтому память не зависит от размера входных данных.
+Отметка прогресса - файл, который пишется после коммита пачки:
+прерванный импорт продолжается с нее, но если процесс упал между
+коммитом и записью отметки, последняя пачка будет импортирована еще раз.
+В конце пересобираются ленты подписчиков авторов импортированных постов.
+
+Поля записи: text, author (username), group (slug, необязательно),
+pub_date (ISO 8601, необязательно).
+"""
+
+import csv
+import json
+import time
+from collections import Counter, OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, timeline
+from .models import Group, Post
+from .signals import invalidate_feeds
+
+User = get_user_model()
+
+FORMATS = ('jsonl', 'csv')
+DEFAULT_BATCH_SIZE = 1000
+LOOKUP_CACHE_SIZE = 100000
+
+
+class RecordError(ValueError):
+    pass
+
+
+class LookupCache:
+    """
+    Ограниченный LRU-кэш соответствия естественного ключа (username,
+    slug) и id. Промахи по пачке разрешаются одним запросом.
+    """
+
+    def __init__(self, queryset, field, maxsize=LOOKUP_CACHE_SIZE):
+        self.queryset = queryset
+        self.field = field
+        self.maxsize = maxsize
+        self.ids = OrderedDict()
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key not in self.ids}
+        if missing:
+            found = dict(self.queryset.filter(
+                **{f'{self.field}__in': missing}
+            ).values_list(self.field, 'pk'))
+            for key in missing:
+                self.ids[key] = found.get(key)
+        result = {}
+        for key in keys:
+            self.ids.move_to_end(key)
+            result[key] = self.ids[key]
+        while len(self.ids) > self.maxsize:
+            self.ids.popitem(last=False)
+        return result
+
+    def add(self, key, pk):
+        self.ids[key] = pk
+
+
+def read_records(stream, fmt):
+    """
+    Записи входного потока по одной. Нечитаемая запись отдается как
+    None, чтобы ее номер сохранился и она попала в отчет об ошибках.
+    """
+
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield record if isinstance(record, dict) else None
+
+
+def parse_pub_date(value):
+    if not value:
+        return timezone.now()
+    if not isinstance(value, str):
+        raise RecordError(f'неверная дата публикации: {value!r}')
+    try:
+        # формат проверяет регулярное выражение, а значения полей -
+        # datetime, который бросает ValueError на 13-м месяце
+        pub_date = parse_datetime(value)
+    except ValueError as error:
+        raise RecordError(f'неверная дата публикации: {value} ({error})')
+    if pub_date is None:
+        raise RecordError(f'неверная дата публикации: {value}')
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date, timezone.utc)
+    return pub_date
+
+
+def clean_record(record):
+    """
+    Текст, автор, группа и дата публикации записи. Поля, которые не
+    являются строками (например, списки в JSON), считаются ошибкой записи.
+    """
+
+    if record is None:
+        raise RecordError('нечитаемая запись')
+    for field in ('text', 'author', 'group'):
+        value = record.get(field)
+        if value is not None and not isinstance(value, str):
+            raise RecordError(f'поле {field} должно быть строкой: {value!r}')
+    text = record.get('text')
+    if not text:
+        raise RecordError('пустой текст')
+    return (text, record.get('author'), record.get('group') or None,
+            parse_pub_date(record.get('pub_date')))
+
+
+class PostImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, create_authors=False,
+                 on_progress=None, on_checkpoint=None, on_error=None):
+        self.batch_size = batch_size
+        self.create_authors = create_authors
+        self.on_progress = on_progress
+        self.on_checkpoint = on_checkpoint
+        self.on_error = on_error
+        self.authors = LookupCache(User.objects.all(), 'username')
+        self.groups = LookupCache(Group.objects.all(), 'slug')
+        self.imported = 0
+        self.skipped = 0
+        self.author_ids = set()
+
+    def run(self, records, skip=0):
+        """
+        Импортирует записи, пропустив первые skip. Возвращает номер
+        следующей необработанной записи.
+        """
+
+        started = time.monotonic()
+        position = 0
+        batch = []
+        for position, record in enumerate(records, 1):
+            if position <= skip:
+                continue
+            batch.append((position, record))
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                self.report(position, started)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+            self.report(position, started)
+        timeline.backfill_followers(self.author_ids)
+        return max(position, skip)
+
+    def report(self, position, started):
+        if self.on_checkpoint:
+            self.on_checkpoint(position)
+        if self.on_progress:
+            elapsed = time.monotonic() - started
+            rate = self.imported / elapsed if elapsed else 0
+            self.on_progress(position, self.imported, rate)
+
+    def create_missing_authors(self, usernames):
+        User.objects.bulk_create(
+            (User(username=username) for username in usernames),
+            ignore_conflicts=True
+        )
+        for username, pk in User.objects.filter(
+            username__in=usernames
+        ).values_list('username', 'pk'):
+            self.authors.add(username, pk)
+
+    def skip(self, position, message):
+        self.skipped += 1
+        if self.on_error:
+            self.on_error(position, message)
+
+    def build_posts(self, batch):
+        records = []
+        for position, record in batch:
+            try:
+                records.append((position, *clean_record(record)))
+            except RecordError as error:
+                self.skip(position, str(error))
+
+        author_ids = self.authors.resolve(
+            {author for _, _, author, _, _ in records}
+        )
+        if self.create_authors:
+            missing = {name for name, pk in author_ids.items()
+                       if pk is None and name}
+            if missing:
+                self.create_missing_authors(missing)
+                author_ids = self.authors.resolve(set(author_ids))
+        group_ids = self.groups.resolve(
+            {group for _, _, _, group, _ in records} - {None}
+        )
+
+        posts = []
+        for position, text, author, group, pub_date in records:
+            author_id = author_ids[author]
+            if author_id is None:
+                self.skip(position, f'автор не найден: {author}')
+            elif group and group_ids[group] is None:
+                self.skip(position, f'группа не найдена: {group}')
+            else:
+                posts.append(Post(
+                    text=text,
+                    author_id=author_id,
+                    group_id=group_ids[group] if group else None,
+                    pub_date=pub_date,
+                ))
+        return posts
+
+    def write_batch(self, batch):
+        with transaction.atomic():
+            posts = self.build_posts(batch)
+            # bulk_create не вызывает save(), который заполняет начало текста
+            for post in posts:
+                post.fill_excerpt()
+            Post.objects.bulk_create(posts)
+            author_counts = Counter(post.author_id for post in posts)
+            for author_id, total in author_counts.items():
+                counters.change_author_count(author_id, total)
+            group_counts = Counter(post.group_id for post in posts)
+            for group_id, total in group_counts.items():
+                counters.change_group_count(group_id, total)
+            # bulk_create не отправляет сигналы: сбрасываем ленты
+            # авторов и групп пачки
+            invalidate_feeds(author_counts, group_counts)
+        self.imported += len(posts)
+        self.author_ids.update(author_counts)
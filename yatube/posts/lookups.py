@@ -0,0 +1,14 @@
+from django.http import Http404
+
+from core.lookups import ModelLookup
+
+from .models import Group
+
+groups = ModelLookup('group', Group.objects.all(), 'slug')
+
+
+def get_group_or_404(slug):
+    group = groups.get(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.sqlite import atomic_with_retry
+from posts.models import Post
+from posts.signals import invalidate_feeds
+
+BATCH_SIZE = 1000
+
+
+def fill_batch(posts):
+    for post in posts:
+        post.fill_excerpt()
+    Post.objects.bulk_update(posts, ('excerpt', 'is_truncated'))
+    # карточки и ленты этих постов в кэше собраны по старому тексту
+    invalidate_feeds({post.author_id for post in posts},
+                     {post.group_id for post in posts},
+                     [post.pk for post in posts])
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет начало текста постов для лент пачками по возрастанию '
+        'id. Каждая пачка пишется своей транзакцией.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Число постов в одной транзакции.',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать начало текста у всех постов, например после '
+                 'изменения POST_EXCERPT_LENGTH. По умолчанию только у '
+                 'постов, где оно еще пустое.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+
+        posts = Post.objects.only(
+            'pk', 'text', 'author_id', 'group_id'
+        ).order_by('pk')
+        if not options['all']:
+            posts = posts.filter(excerpt='')
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            atomic_with_retry(fill_batch, batch)
+            last_pk = batch[-1].pk
+            updated += len(batch)
+            self.stdout.write(f'обработано постов: {updated}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Начало текста заполнено у {updated} постов.'
+        ))
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import timeline
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает ленты подписок: нужно после вставки постов или '
+        'подписок в обход сигналов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='Пользователи, чьи ленты пересобрать. По умолчанию все, '
+                 'у кого есть подписки.',
+        )
+
+    def handle(self, *args, **options):
+        usernames = options['usernames']
+        if usernames:
+            user_ids = dict(User.objects.filter(
+                username__in=usernames
+            ).values_list('username', 'pk'))
+            missing = set(usernames) - set(user_ids)
+            if missing:
+                raise CommandError(
+                    'Пользователи не найдены: ' + ', '.join(sorted(missing))
+                )
+            user_ids = list(user_ids.values())
+        else:
+            user_ids = list(Follow.objects.order_by('user_id').values_list(
+                'user_id', flat=True
+            ).distinct())
+
+        timeline.reset_fanin_authors()
+        timeline.backfill_many(user_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано лент подписок: {len(user_ids)}.'
+        ))
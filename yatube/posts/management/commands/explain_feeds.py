@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Post
+from posts.paginators import FORWARD, CursorPaginator
+from posts.rows import post_rows
+from posts.timeline import EntryPaginator, entries_of
+from posts.viewcounts import most_viewed_stats
+
+SAMPLE_ID = 1
+
+
+def feed_querysets():
+    """
+    Запросы лент в том виде, в котором их выполняют view-функции.
+    """
+
+    per_page = settings.ELEMENTS_PER_PAGE
+    feeds = {
+        'posts:index': post_rows(Post.objects.all()),
+        'posts:group': post_rows(Post.objects.filter(group_id=SAMPLE_ID)),
+        'posts:profile': post_rows(Post.objects.filter(author_id=SAMPLE_ID)),
+    }
+    for name, posts in feeds.items():
+        yield f'{name} ?page=N', posts[per_page:2 * per_page]
+        paginator = CursorPaginator(posts, per_page)
+        window = paginator.get_window(FORWARD, timezone.now(), SAMPLE_ID)
+        yield f'{name} ?cursor=', window[:per_page + 1]
+    paginator = EntryPaginator(entries_of(SAMPLE_ID), per_page)
+    window = paginator.get_window(FORWARD, timezone.now(), SAMPLE_ID)
+    yield 'posts:follow_index ?cursor=', window[:per_page + 1]
+    yield 'posts:popular', most_viewed_stats(settings.POPULAR_POSTS_LIMIT)
+    # get() сбрасывает сортировку, поэтому и здесь ее нет
+    yield 'posts:post_detail', Post.objects.filter(
+        author_id=SAMPLE_ID, pk=SAMPLE_ID
+    ).select_related('group').order_by()
+
+
+def is_full_scan(detail):
+    detail = detail.upper()
+    if 'USE TEMP B-TREE' in detail:
+        return True
+    return detail.startswith('SCAN') and 'USING' not in detail
+
+
+class Command(BaseCommand):
+    help = 'Печатает SQLite EXPLAIN QUERY PLAN для запросов лент постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Завершиться с ошибкой, если запрос читает таблицу целиком '
+                 'или сортирует во временном B-дереве.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда поддерживает только SQLite.')
+
+        regressions = []
+        for name, queryset in feed_querysets():
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for detail in plan:
+                if is_full_scan(detail):
+                    regressions.append(f'{name}: {detail}')
+                    self.stdout.write(self.style.WARNING(f'  {detail}'))
+                else:
+                    self.stdout.write(f'  {detail}')
+
+        if regressions and options['check']:
+            raise CommandError(
+                'Полный просмотр таблицы в запросах лент:\n'
+                + '\n'.join(regressions)
+            )
@@ -0,0 +1,61 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporter import (DEFAULT_CHUNK_SIZE, FORMATS, export_posts,
+                            posts_for_export)
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в JSONL или CSV, не загружая их в память.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Файл выгрузки или "-" для вывода в stdout.',
+        )
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--group', help='Slug группы.')
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать выгрузку в gzip.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Число постов, читаемых из базы за один запрос.',
+        )
+
+    def handle(self, *args, **options):
+        group, author = options['group'], options['author']
+        if group and not Group.objects.filter(slug=group).exists():
+            raise CommandError(f'Группа не найдена: {group}')
+        if author and not User.objects.filter(username=author).exists():
+            raise CommandError(f'Автор не найден: {author}')
+
+        chunks = export_posts(
+            posts_for_export(group, author),
+            fmt=options['format'],
+            compress=options['gzip'],
+            chunk_size=options['chunk_size'],
+        )
+        output = options['output']
+        if output == '-' and options['gzip']:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+        elif output == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+        else:
+            if options['gzip']:
+                stream = open(output, 'wb')
+            else:
+                stream = open(output, 'w', encoding='utf-8', newline='')
+            with stream:
+                for chunk in chunks:
+                    stream.write(chunk)
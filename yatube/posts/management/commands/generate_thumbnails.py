@@ -0,0 +1,78 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+CHUNK_SIZE = 50
+
+
+def generate_chunk(post_ids):
+    return sum(thumbnails.generate(post_id) for post_id in post_ids)
+
+
+def id_windows(size):
+    """
+    id постов с картинками окнами по size штук по возрастанию id. В
+    памяти держится только текущее окно.
+    """
+
+    posts = Post.objects.exclude(image='').order_by('pk')
+    last_pk = 0
+    while True:
+        post_ids = list(posts.filter(pk__gt=last_pk).values_list(
+            'pk', flat=True
+        )[:size])
+        if not post_ids:
+            return
+        yield post_ids
+        last_pk = post_ids[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает все размеры миниатюр картинок постов в пуле процессов. '
+        'Уже созданные миниатюры пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов. 0 - без пула, в текущем процессе.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Число постов в одном задании процесса.',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 0 or options['chunk_size'] < 1:
+            raise CommandError('Неверное число процессов или размер задания.')
+
+        chunk_size = options['chunk_size']
+        done = 0
+        if options['workers'] == 0:
+            for post_ids in id_windows(chunk_size):
+                done += generate_chunk(post_ids)
+        else:
+            # в пул передается окно на одно задание каждому процессу
+            with ProcessPoolExecutor(options['workers']) as pool:
+                for post_ids in id_windows(chunk_size * options['workers']):
+                    chunks = [post_ids[start:start + chunk_size] for start
+                              in range(0, len(post_ids), chunk_size)]
+                    # дочерние процессы не должны унаследовать открытое
+                    # соединение
+                    connections.close_all()
+                    for count in pool.map(generate_chunk, chunks):
+                        done += count
+                        self.stdout.write(f'обработано постов: {done}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры готовы для {done} постов.'
+        ))
@@ -0,0 +1,109 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import (DEFAULT_BATCH_SIZE, FORMATS, PostImporter,
+                            read_records)
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    return 'jsonl' if extension in ('json', 'ndjson') else extension
+
+
+def read_checkpoint(path):
+    try:
+        with open(path) as checkpoint:
+            return int(checkpoint.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path, position):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as checkpoint:
+        checkpoint.write(str(position))
+    os.replace(tmp_path, path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты из JSONL или CSV (файл или stdin) пачками '
+        'через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Путь к файлу или "-" для чтения из stdin.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат входных данных. По умолчанию по расширению файла.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Число записей в одной транзакции.',
+        )
+        parser.add_argument(
+            '--skip',
+            type=int,
+            default=0,
+            help='Пропустить первые N записей.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с номером последней записанной записи. Если файл '
+                 'существует, импорт продолжается с этой записи.',
+        )
+        parser.add_argument(
+            '--create-authors',
+            action='store_true',
+            help='Создавать отсутствующих авторов без пароля.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path == '-'
+                                    else detect_format(path))
+        if fmt not in FORMATS:
+            raise CommandError(f'Неизвестный формат: {fmt}')
+
+        skip = options['skip']
+        checkpoint = options['checkpoint']
+        if checkpoint:
+            skip = max(skip, read_checkpoint(checkpoint))
+
+        importer = PostImporter(
+            batch_size=options['batch_size'],
+            create_authors=options['create_authors'],
+            on_progress=self.progress,
+            on_checkpoint=(
+                (lambda position: write_checkpoint(checkpoint, position))
+                if checkpoint else None
+            ),
+            on_error=self.record_error,
+        )
+        if path == '-':
+            position = importer.run(read_records(sys.stdin, fmt), skip)
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                position = importer.run(read_records(stream, fmt), skip)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано {importer.imported}, пропущено '
+            f'{importer.skipped}, обработано записей: {position}.'
+        ))
+
+    def progress(self, position, imported, rate):
+        self.stdout.write(
+            f'запись {position}: импортировано {imported} '
+            f'({rate:.0f} в секунду)'
+        )
+
+    def record_error(self, position, message):
+        self.stderr.write(f'запись {position}: {message}')
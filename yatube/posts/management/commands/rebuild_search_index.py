@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересоздает полнотекстовый индекс постов.'
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite.')
+        with transaction.atomic():
+            search.install(connection)
+            search.rebuild(connection)
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс пересоздан.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import RECOUNT_BATCH_SIZE, recount_posts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики постов групп и авторов и подписчиков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=RECOUNT_BATCH_SIZE,
+            help='Размер пачки при вставке счетчиков авторов.',
+        )
+
+    def handle(self, *args, **options):
+        recount_posts(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Счетчики постов пересчитаны.'))
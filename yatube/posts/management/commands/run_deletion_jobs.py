@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import deletion
+from posts.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задания удаления пользователей и групп, которые стоят '
+        'в очереди или были прерваны перезапуском. Каждое задание '
+        'продолжается с места остановки. Задания, которые сейчас '
+        'выполняет другой процесс, не трогаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Число постов в одной транзакции. По умолчанию '
+                 'DELETION_BATCH_SIZE.',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=None,
+            help='Через сколько секунд без обновлений задание в работе '
+                 'считается прерванным. По умолчанию '
+                 'DELETION_STALE_TIMEOUT.',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Выполнить также задания, прерванные ошибкой.',
+        )
+
+    def progress(self, job):
+        self.stdout.write(
+            f'{job}: обработано постов {job.processed} из {job.total}'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size is not None and batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+
+        stale = deletion.reset_stale(options['stale_after'])
+        if stale:
+            self.stdout.write(f'возвращено в очередь прерванных: {stale}')
+        statuses = (DeletionJob.QUEUED,)
+        if options['retry_failed']:
+            statuses += (DeletionJob.FAILED,)
+        jobs = DeletionJob.objects.filter(
+            status__in=statuses
+        ).order_by('pk')
+        done = 0
+        for job in jobs:
+            if job.status == DeletionJob.FAILED:
+                job.status = DeletionJob.QUEUED
+                job.save(update_fields=('status', 'updated_at'))
+            try:
+                finished = deletion.run_job(job.pk, batch_size,
+                                            self.progress)
+            except Exception as error:
+                self.stderr.write(f'{job}: {error!r}')
+                continue
+            # None - задание уже забрал фоновый поток
+            done += finished is not None
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено заданий удаления: {done}.'
+        ))
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.seeding import DEFAULT_BATCH_SIZE, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами и постами '
+        'с неравномерным распределением постов по авторам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100,
+                            help='Число пользователей.')
+        parser.add_argument('--groups', type=int, default=10,
+                            help='Число групп.')
+        parser.add_argument('--posts', type=int, default=10000,
+                            help='Число постов.')
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель закона Ципфа для авторов и групп: 0 дает '
+                 'равномерное распределение, больше 1 - сильный перекос.',
+        )
+        parser.add_argument('--group-share', type=float, default=0.7,
+                            help='Доля постов, опубликованных в группах.')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределить даты постов.')
+        parser.add_argument('--follows', type=int, default=0,
+                            help='Число подписок каждого пользователя.')
+        parser.add_argument('--batch-size', type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help='Число постов в одной вставке.')
+        parser.add_argument('--seed', type=int,
+                            help='Зерно генератора для воспроизводимости.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        if not 0 <= options['group_share'] <= 1:
+            raise CommandError('--group-share должен быть от 0 до 1.')
+
+        started = time.monotonic()
+        created = seed(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            skew=options['skew'],
+            group_share=options['group_share'],
+            days=options['days'],
+            follows=options['follows'],
+            batch_size=options['batch_size'],
+            random_seed=options['seed'],
+            on_progress=lambda count: self.stdout.write(
+                f'создано постов: {count}'
+            ),
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {created} постов за {elapsed:.1f} с.'
+        ))
@@ -0,0 +1,49 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    group_counts = Post.objects.filter(
+        group=OuterRef('pk')
+    ).order_by().values('group').annotate(total=Count('pk')).values('total')
+    Group.objects.update(posts_count=Coalesce(Subquery(group_counts), 0))
+    AuthorStats.objects.bulk_create(
+        AuthorStats(author_id=row['author'], posts_count=row['total'])
+        for row in Post.objects.order_by().values('author').annotate(
+            total=Count('pk'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0006_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(help_text='Автор постов', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.PositiveIntegerField(default=0, help_text='Число постов автора', verbose_name='Число постов')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+            },
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Число постов в группе', verbose_name='Число постов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from posts import search
+
+    if search.fts_available(schema_editor.connection):
+        search.install(schema_editor.connection)
+        search.rebuild(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from posts import search
+
+    if search.fts_available(schema_editor.connection):
+        search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:16
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Дата публикации поста', verbose_name='Дата пуликации'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostStats',
+            fields=[
+                ('post', models.OneToOneField(help_text='Пост', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('views_count', models.PositiveIntegerField(default=0, help_text='Число просмотров поста', verbose_name='Число просмотров')),
+            ],
+            options={
+                'verbose_name': 'Статистика поста',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='poststats',
+            index=models.Index(fields=['-views_count'], name='post_stats_views_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:40
+
+from django.db import migrations
+import sorl.thumbnail.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=sorl.thumbnail.fields.ImageField(blank=True, help_text='Картинка к посту', upload_to='posts/', verbose_name='Картинка'),
+        ),
+    ]
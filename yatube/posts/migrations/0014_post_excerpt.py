@@ -0,0 +1,23 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, help_text='Начало текста поста для лент', verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_truncated',
+            field=models.BooleanField(default=False, editable=False, help_text='Начало текста короче полного текста', verbose_name='Текст обрезан'),
+        ),
+    ]
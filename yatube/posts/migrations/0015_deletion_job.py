@@ -0,0 +1,38 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'Удаление пользователя и его постов'), ('group', 'Удаление группы')], max_length=10, verbose_name='Тип')),
+                ('target_id', models.PositiveIntegerField(help_text='id пользователя или группы', verbose_name='Объект')),
+                ('target_repr', models.CharField(help_text='Имя пользователя или slug группы на момент постановки', max_length=200, verbose_name='Название')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнено'), ('failed', 'Ошибка')], default='queued', max_length=10, verbose_name='Состояние')),
+                ('total', models.PositiveIntegerField(default=0, help_text='Число постов на момент постановки в очередь', verbose_name='Всего постов')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано постов')),
+                ('last_post_id', models.PositiveIntegerField(default=0, verbose_name='Последний обработанный пост')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Изменено')),
+            ],
+            options={
+                'verbose_name': 'Задание удаления',
+                'verbose_name_plural': 'Задания удаления',
+                'ordering': ('-created_at', '-id'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='deletionjob',
+            constraint=models.UniqueConstraint(condition=models.Q(status__in=('queued', 'running')), fields=('kind', 'target_id'), name='deletion_job_active_unique'),
+        ),
+    ]
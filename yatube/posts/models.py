@@ -1,10 +1,31 @@
 import textwrap
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+from sorl.thumbnail import ImageField
 
 User = get_user_model()
 
+EXCERPT_PLACEHOLDER = '…'
+
+
+def make_excerpt(text, length):
+    """
+    Начало текста не длиннее length символов, обрезанное по границе
+    слова, и признак того, что текст обрезан.
+    """
+
+    if len(text) <= length:
+        return text, False
+    excerpt = text[:length - len(EXCERPT_PLACEHOLDER)]
+    boundary = max(excerpt.rfind(' '), excerpt.rfind('\n'))
+    # слово длиннее половины отрывка режется посередине
+    if boundary > len(excerpt) // 2:
+        excerpt = excerpt[:boundary]
+    return excerpt.rstrip() + EXCERPT_PLACEHOLDER, True
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -14,6 +35,12 @@ class Group(models.Model):
     )
     slug = models.SlugField('Адрес', unique=True, help_text='Адрес группы')
     description = models.TextField('Описание', help_text='Описание группы')
+    posts_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0,
+        editable=False,
+        help_text='Число постов в группе'
+    )
 
     class Meta:
         verbose_name = 'Группа'
@@ -26,9 +53,15 @@ class Post(models.Model):
     text = models.TextField('Текст', help_text='Текст поста')
     pub_date = models.DateTimeField(
         'Дата пуликации',
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         help_text='Дата публикации поста'
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        help_text='Дата последнего изменения поста'
+    )
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
@@ -45,10 +78,75 @@ class Post(models.Model):
         related_name='posts',
         help_text='Связанная группа'
     )
+    image = ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+        help_text='Картинка к посту'
+    )
+    # ленты выводят и загружают только начало текста
+    excerpt = models.TextField(
+        'Начало текста',
+        blank=True,
+        editable=False,
+        help_text='Начало текста поста для лент'
+    )
+    is_truncated = models.BooleanField(
+        'Текст обрезан',
+        default=False,
+        editable=False,
+        help_text='Начало текста короче полного текста'
+    )
 
     class Meta:
-        ordering = ('-pub_date', )
+        ordering = ('-pub_date', '-id')
         verbose_name = 'Пост'
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'),
+                         name='post_pub_date_idx'),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=('group', '-pub_date', '-id'),
+                         name='post_group_pub_date_idx'),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # группа на момент загрузки нужна счетчикам при переносе поста
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        return instance
+
+    def fill_excerpt(self):
+        self.excerpt, self.is_truncated = make_excerpt(
+            self.text, settings.POST_EXCERPT_LENGTH
+        )
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None or 'text' in update_fields:
+            self.fill_excerpt()
+            if update_fields is not None:
+                update_fields = {*update_fields, 'excerpt', 'is_truncated'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    # те же атрибуты, что и у строк лент (posts/rows.py): карточка
+    # поста одинаково выводит и экземпляр, и строку
+
+    @property
+    def author_username(self):
+        return self.author.username
+
+    @property
+    def author_full_name(self):
+        return self.author.get_full_name()
+
+    @property
+    def group_slug(self):
+        return self.group.slug if self.group_id else None
+
+    @property
+    def group_title(self):
+        return self.group.title if self.group_id else None
 
     def __str__(self):
         fullname = self.author.get_full_name()
@@ -63,3 +161,234 @@ class Post(models.Model):
         )
         res += f'Текст: {shorten_text}'
         return res
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        verbose_name='Автор',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        help_text='Автор постов'
+    )
+    posts_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0,
+        help_text='Число постов автора'
+    )
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0,
+        help_text='Число подписчиков автора'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+
+    def __str__(self):
+        return f'{self.author_id}: {self.posts_count}'
+
+    @staticmethod
+    def posts_count_of(author):
+        try:
+            return author.stats.posts_count
+        except AuthorStats.DoesNotExist:
+            return 0
+
+    @staticmethod
+    def followers_count_of(author):
+        try:
+            return author.stats.followers_count
+        except AuthorStats.DoesNotExist:
+            return 0
+
+
+class PostStats(models.Model):
+    """
+    Число просмотров поста. Хранится отдельно от поста: счетчик часто
+    меняется (см. posts/viewcounts.py), а индекс по нему дает список
+    самых просматриваемых постов без сортировки всей таблицы.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        verbose_name='Пост',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        help_text='Пост'
+    )
+    views_count = models.PositiveIntegerField(
+        'Число просмотров',
+        default=0,
+        help_text='Число просмотров поста'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика поста'
+        indexes = (
+            models.Index(fields=('-views_count',),
+                         name='post_stats_views_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.post_id}: {self.views_count}'
+
+    @staticmethod
+    def views_count_of(post):
+        try:
+            return post.stats.views_count
+        except PostStats.DoesNotExist:
+            return 0
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='follower',
+        help_text='Пользователь, который подписался'
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='following',
+        help_text='Автор, на которого подписались'
+    )
+    created = models.DateTimeField('Дата подписки', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Подписка'
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'author'),
+                                    name='follow_unique'),
+            models.CheckConstraint(check=~models.Q(user=models.F('author')),
+                                   name='follow_not_self'),
+        )
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Пост в материализованной ленте подписок пользователя. Дата
+    публикации и автор скопированы из поста, чтобы лента читалась
+    одним проходом по индексу (user, -pub_date, -post), а отписка
+    удаляла записи автора без join.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'post'),
+                                    name='timeline_unique'),
+        )
+        indexes = (
+            models.Index(fields=('user', '-pub_date', '-post'),
+                         name='timeline_user_pub_date_idx'),
+            models.Index(fields=('user', 'author'),
+                         name='timeline_user_author_idx'),
+        )
+
+
+class DeletionJob(models.Model):
+    """
+    Фоновое удаление пользователя или группы (см. posts/deletion.py).
+    Посты удаляются или отвязываются пачками по возрастанию id, и
+    last_post_id вместе с processed меняется в той же транзакции, что и
+    пачка, поэтому прерванное задание продолжается с места остановки.
+    """
+
+    USER = 'user'
+    GROUP = 'group'
+    KIND_CHOICES = (
+        (USER, 'Удаление пользователя и его постов'),
+        (GROUP, 'Удаление группы'),
+    )
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнено'),
+        (FAILED, 'Ошибка'),
+    )
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+    kind = models.CharField('Тип', max_length=10, choices=KIND_CHOICES)
+    target_id = models.PositiveIntegerField(
+        'Объект',
+        help_text='id пользователя или группы'
+    )
+    target_repr = models.CharField(
+        'Название',
+        max_length=200,
+        help_text='Имя пользователя или slug группы на момент постановки'
+    )
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED
+    )
+    total = models.PositiveIntegerField(
+        'Всего постов',
+        default=0,
+        help_text='Число постов на момент постановки в очередь'
+    )
+    processed = models.PositiveIntegerField(
+        'Обработано постов',
+        default=0
+    )
+    last_post_id = models.PositiveIntegerField(
+        'Последний обработанный пост',
+        default=0
+    )
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        ordering = ('-created_at', '-id')
+        verbose_name = 'Задание удаления'
+        verbose_name_plural = 'Задания удаления'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('kind', 'target_id'),
+                condition=models.Q(status__in=('queued', 'running')),
+                name='deletion_job_active_unique'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.get_kind_display()}: {self.target_repr}'
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100 if self.status == self.DONE else 0
+        return min(100, self.processed * 100 // self.total)
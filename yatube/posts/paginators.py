@@ -0,0 +1,198 @@
+"""
+Постраничный вывод лент постов.
+
+Классический режим работает через django Paginator и номер страницы
+(`?page=`), что требует COUNT(*) и OFFSET. Курсорный режим (keyset)
+листает ленту по паре (pub_date, id) с непрозрачными токенами
+`?cursor=`, поэтому время ответа не зависит от глубины страницы.
+Режим выбирается для каждой view в settings.PAGINATION_MODES.
+"""
+
+import base64
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+PAGE_PARAM = 'page'
+CURSOR_PARAM = 'cursor'
+
+MODE_PAGE = 'page'
+MODE_CURSOR = 'cursor'
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, post):
+    raw = f'{direction}|{post.pub_date.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(token)
+    if direction not in (FORWARD, BACKWARD) or pub_date is None:
+        raise InvalidCursor(token)
+    return direction, pub_date, pk
+
+
+class CountedPaginator(Paginator):
+    """
+    Пагинатор с заранее известным числом записей (например, из
+    денормализованного счетчика) вместо запроса COUNT(*).
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count
+
+
+class CappedCountPaginator(Paginator):
+    """
+    Пагинатор, который считает записи не дальше count_limit: на больших
+    таблицах точный COUNT(*) с фильтрами читает их целиком, а номера
+    страниц дальше предела все равно никто не листает.
+    """
+
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        return self.object_list.order_by()[:self.count_limit].count()
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset-пагинатор по убыванию (pub_date, id).
+
+    Страница выбирается условием по ключу последней (первой) записи
+    предыдущей выдачи, а не смещением, и не требует подсчета записей.
+    Вторая часть ключа берется из поля pk_field записей queryset.
+    """
+
+    pk_field = 'pk'
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset.order_by('-pub_date', f'-{self.pk_field}')
+        self.per_page = int(per_page)
+
+    def get_window(self, direction=FORWARD, pub_date=None, pk=None):
+        """
+        Записи после (FORWARD) или до (BACKWARD) ключа (pub_date, pk)
+        в порядке выдачи пагинатора.
+        """
+
+        if pub_date is None:
+            return self.queryset
+        if direction == FORWARD:
+            return self.queryset.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, **{f'{self.pk_field}__lt': pk})
+            )
+        return self.queryset.filter(
+            Q(pub_date__gt=pub_date)
+            | Q(pub_date=pub_date, **{f'{self.pk_field}__gt': pk})
+        ).reverse()
+
+    def get_page(self, cursor=None):
+        direction, pub_date, pk = FORWARD, None, None
+        if cursor:
+            try:
+                direction, pub_date, pk = decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+
+        queryset = self.get_window(direction, pub_date, pk)
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+
+        if direction == BACKWARD:
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, pub_date is not None
+
+        if not object_list:
+            return CursorPage(object_list)
+        return CursorPage(
+            object_list,
+            next_cursor=(encode_cursor(FORWARD, object_list[-1])
+                         if has_next else None),
+            previous_cursor=(encode_cursor(BACKWARD, object_list[0])
+                             if has_previous else None),
+        )
+
+
+def get_pagination_mode(request):
+    match = request.resolver_match
+    view_name = match.view_name if match else None
+    return settings.PAGINATION_MODES.get(view_name, MODE_PAGE)
+
+
+def paginate(request, queryset, count=None):
+    """
+    Возвращает страницу ленты в режиме, настроенном для текущей view.
+
+    Ссылки вида `?page=N` обслуживаются классическим пагинатором в любом
+    режиме, поэтому старые адреса неглубоких страниц продолжают работать.
+    Если передан count, классический пагинатор не считает записи сам.
+    """
+
+    per_page = settings.ELEMENTS_PER_PAGE
+    if (get_pagination_mode(request) == MODE_CURSOR
+            and PAGE_PARAM not in request.GET):
+        paginator = CursorPaginator(queryset, per_page)
+        return paginator.get_page(request.GET.get(CURSOR_PARAM))
+    if count is None:
+        paginator = Paginator(queryset, per_page)
+    else:
+        paginator = CountedPaginator(queryset, per_page, count)
+    return paginator.get_page(request.GET.get(PAGE_PARAM))
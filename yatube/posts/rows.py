@@ -0,0 +1,99 @@
+"""
+Легкие строки постов для лент только на чтение.
+
+Ленты выводят несколько полей поста, автора и группы, поэтому вместо
+экземпляров Post, User и Group запрос читает только нужные столбцы
+через values_list() и собирает из них PostRow со __slots__. У строки
+те же атрибуты, что использует карточка поста (см. свойства Post), и
+тот же ключ (pub_date, pk) для курсорной пагинации.
+"""
+
+from django.db.models import Case, TextField, Value, When
+from django.db.models.query import ValuesListIterable
+
+from .models import Post
+
+IMAGE_FIELD = Post._meta.get_field('image')
+
+
+class PostRow:
+    __slots__ = (
+        'pk', 'pub_date', 'excerpt', 'text', 'is_truncated', 'image_name',
+        'author_id', 'author_username', 'author_full_name', 'group_id',
+        'group_slug', 'group_title',
+    )
+
+    def __init__(self, pk, pub_date, excerpt, text, is_truncated,
+                 image_name, author_id, author_username, author_first_name,
+                 author_last_name, group_id, group_slug, group_title):
+        self.pk = pk
+        self.pub_date = pub_date
+        self.excerpt = excerpt
+        self.text = text
+        self.is_truncated = is_truncated
+        self.image_name = image_name
+        self.author_id = author_id
+        self.author_username = author_username
+        self.author_full_name = (
+            f'{author_first_name} {author_last_name}'.strip()
+        )
+        self.group_id = group_id
+        self.group_slug = group_slug
+        self.group_title = group_title
+
+    def __repr__(self):
+        return f'<PostRow {self.pk}>'
+
+    @property
+    def image(self):
+        # файл картинки нужен только постам, у которых она есть
+        if not self.image_name:
+            return None
+        return IMAGE_FIELD.attr_class(None, IMAGE_FIELD, self.image_name)
+
+
+class PostRowIterable(ValuesListIterable):
+    def __iter__(self):
+        for values in super().__iter__():
+            yield PostRow(*values)
+
+
+def fallback_text(prefix=''):
+    """
+    Полный текст поста (через связь prefix) только для постов, у которых
+    еще не заполнено начало текста, иначе пустая строка.
+    """
+
+    return Case(
+        When(**{f'{prefix}excerpt': ''}, then=f'{prefix}text'),
+        default=Value(''),
+        output_field=TextField(),
+    )
+
+
+def fill_text(post, text):
+    """
+    Подставляет отложенный текст поста из fallback_text(), чтобы
+    карточка без начала текста не читала его отдельным запросом.
+    """
+
+    if not post.excerpt:
+        post.text = text
+    return post
+
+
+def post_rows(queryset):
+    """
+    queryset постов, который возвращает PostRow. Полный текст читается
+    только у постов, для которых еще не заполнено начало текста.
+    """
+
+    queryset = queryset.annotate(
+        fallback_text=fallback_text()
+    ).values_list(
+        'pk', 'pub_date', 'excerpt', 'fallback_text', 'is_truncated',
+        'image', 'author_id', 'author__username', 'author__first_name',
+        'author__last_name', 'group_id', 'group__slug', 'group__title',
+    )
+    queryset._iterable_class = PostRowIterable
+    return queryset
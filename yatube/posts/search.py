@@ -0,0 +1,166 @@
+"""
+Полнотекстовый поиск по тексту постов.
+
+На SQLite используется внешний (external content) индекс FTS5
+posts_post_fts над таблицей posts_post, который поддерживают триггеры.
+Пересоздание таблицы posts_post миграциями удаляет триггеры, поэтому
+после каждого migrate они создаются заново (см. apps.py), а полная
+переиндексация доступна командой rebuild_search_index. На других
+СУБД поиск откатывается к icontains.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_TABLE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+CREATE_TRIGGERS_SQL = (
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END''',
+)
+DROP_SQL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+MATCH_SQL = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+
+
+def fts_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def is_installed(using=connection):
+    with using.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def install_triggers(using=connection):
+    with using.cursor() as cursor:
+        for sql in CREATE_TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+def install(using=connection):
+    with using.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+    install_triggers(using)
+
+
+def uninstall(using=connection):
+    with using.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+def rebuild(using=connection):
+    with using.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
+
+
+def build_match_query(query):
+    """
+    Превращает пользовательский ввод в запрос FTS5: каждое слово берется
+    в кавычки (синтаксис FTS5 во вводе не интерпретируется), слова
+    объединяются через AND.
+    """
+
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+class SearchResults:
+    """
+    Ленивая выборка найденных постов в порядке релевантности (bm25).
+    Поддерживает count() и срезы, поэтому подходит для Paginator.
+    """
+
+    def __init__(self, match_query):
+        self.match_query = match_query
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.match_query]
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        limit = -1 if index.stop is None else max(index.stop - start, 0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{MATCH_SQL} ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match_query, limit, start]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    """
+    Посты, подходящие под запрос, от самых релевантных.
+    """
+
+    if not fts_available():
+        return Post.objects.select_related('author', 'group').filter(
+            text__icontains=query
+        )
+    match_query = build_match_query(query)
+    if not match_query:
+        return Post.objects.none()
+    return SearchResults(match_query)
+
+
+def filter_matching(queryset, query):
+    """
+    Ограничивает queryset постами, подходящими под запрос.
+    """
+
+    if not fts_available():
+        return queryset.filter(text__icontains=query)
+    match_query = build_match_query(query)
+    if not match_query:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(MATCH_SQL, (match_query,)))
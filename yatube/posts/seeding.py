@@ -0,0 +1,151 @@
+"""
+Генерация синтетических данных для нагрузочных проверок.
+
+Пользователи, группы и посты вставляются пачками через bulk_create.
+Авторы постов выбираются по закону Ципфа: немногие пишут большую часть
+постов, как на живом сайте, поэтому профили получаются разной длины.
+Даты публикации равномерно распределены по заданному числу дней.
+Подписки выбираются по тому же закону, так что у популярных авторов
+много подписчиков.
+"""
+
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters, timeline
+from .models import Follow, Group, Post
+from .signals import invalidate_feeds
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'seed_user_'
+GROUP_SLUG_PREFIX = 'seed-group-'
+DEFAULT_BATCH_SIZE = 5000
+WORDS = (
+    'пост', 'день', 'город', 'утро', 'кофе', 'книга', 'дорога', 'лето',
+    'работа', 'друг', 'музыка', 'море', 'кот', 'фильм', 'вечер', 'поезд',
+    'снег', 'парк', 'код', 'сад', 'рынок', 'окно', 'дождь', 'письмо',
+)
+WORDS_PER_POST = (5, 60)
+
+
+def zipf_cum_weights(size, skew):
+    """
+    Накопленные веса для random.choices: вес ранга r равен 1 / r**skew.
+    """
+
+    return list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, size + 1)
+    ))
+
+
+def make_text(rng):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(*WORDS_PER_POST)))
+
+
+def create_users(count):
+    # хэш пароля считается один раз: make_password на каждого
+    # пользователя занял бы большую часть времени генерации
+    password = make_password(None)
+    usernames = [f'{USERNAME_PREFIX}{number}' for number in range(count)]
+    User.objects.bulk_create(
+        (User(username=username, password=password)
+         for username in usernames),
+        ignore_conflicts=True
+    )
+    ids = dict(User.objects.filter(
+        username__startswith=USERNAME_PREFIX
+    ).values_list('username', 'pk'))
+    return [ids[username] for username in usernames]
+
+
+def create_groups(count):
+    slugs = [f'{GROUP_SLUG_PREFIX}{number}' for number in range(count)]
+    Group.objects.bulk_create(
+        (Group(title=f'Группа {number}', slug=slug,
+               description=f'Сгенерированная группа {number}')
+         for number, slug in enumerate(slugs)),
+        ignore_conflicts=True
+    )
+    ids = dict(Group.objects.filter(
+        slug__startswith=GROUP_SLUG_PREFIX
+    ).values_list('slug', 'pk'))
+    return [ids[slug] for slug in slugs]
+
+
+def create_follows(rng, author_ids, author_weights, follows):
+    """
+    Каждый пользователь подписывается на follows авторов (без себя и
+    без повторов, поэтому подписок может выйти меньше).
+    """
+
+    rows = (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id in author_ids
+        for author_id in set(rng.choices(author_ids,
+                                         cum_weights=author_weights,
+                                         k=follows))
+        if author_id != user_id
+    )
+    Follow.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def seed(users=100, groups=10, posts=10000, skew=1.1, group_share=0.7,
+         days=365, follows=0, batch_size=DEFAULT_BATCH_SIZE,
+         random_seed=None, on_progress=None):
+    """
+    Создает users пользователей, groups групп, posts постов и до follows
+    подписок на каждого пользователя. Повторный запуск переиспользует
+    уже созданных пользователей и группы и добавляет новые посты.
+    Возвращает число созданных постов.
+    """
+
+    rng = random.Random(random_seed)
+    author_ids = create_users(users)
+    group_ids = create_groups(groups)
+    # ранги авторов перемешаны, чтобы самые активные не шли подряд по id
+    rng.shuffle(author_ids)
+    author_weights = zipf_cum_weights(len(author_ids), skew)
+    group_weights = zipf_cum_weights(len(group_ids), skew)
+    now = timezone.now()
+    period = timedelta(days=days).total_seconds()
+
+    created = 0
+    while created < posts:
+        size = min(batch_size, posts - created)
+        batch = []
+        for _ in range(size):
+            group_id = None
+            if group_ids and rng.random() < group_share:
+                group_id = rng.choices(group_ids,
+                                       cum_weights=group_weights)[0]
+            batch.append(Post(
+                text=make_text(rng),
+                author_id=rng.choices(author_ids,
+                                      cum_weights=author_weights)[0],
+                group_id=group_id,
+                pub_date=now - timedelta(seconds=rng.random() * period),
+            ))
+        # bulk_create не вызывает save(), который заполняет начало текста
+        for post in batch:
+            post.fill_excerpt()
+        with transaction.atomic():
+            Post.objects.bulk_create(batch)
+        created += size
+        if on_progress:
+            on_progress(created)
+
+    if follows:
+        create_follows(rng, author_ids, author_weights, follows)
+    counters.recount_posts()
+    # bulk_create не отправляет сигналы: ленты подписок собираются
+    # заново, а кэшированные ленты сбрасываются
+    timeline.backfill_followers(author_ids)
+    invalidate_feeds(author_ids, group_ids)
+    return created
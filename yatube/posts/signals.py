@@ -0,0 +1,224 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from core.routers import replica_synced
+
+from . import cache, counters, thumbnails, timeline
+from .lookups import groups
+from .models import Follow, Group, Post
+
+User = get_user_model()
+
+# поля, которые выводятся на страницах лент
+USER_DISPLAY_FIELDS = ('username', 'first_name', 'last_name')
+GROUP_DISPLAY_FIELDS = ('title', 'slug', 'description')
+
+
+def invalidate_feeds(author_ids=(), group_ids=(), post_ids=()):
+    """
+    Меняет версии главной ленты, лент профилей авторов author_ids, лент
+    групп group_ids и страниц постов post_ids.
+    """
+
+    group_ids = set(group_ids) - {None}
+    usernames = User.objects.filter(pk__in=set(author_ids)).values_list(
+        'username', flat=True
+    ) if author_ids else ()
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True
+    ) if group_ids else ()
+    cache.bump(
+        cache.INDEX_FEED,
+        *(cache.profile_feed(username) for username in usernames),
+        *(cache.group_feed(slug) for slug in slugs),
+        *(cache.post_feed(post_id) for post_id in post_ids)
+    )
+
+
+def invalidate_post_pages(post, old_group_id=None):
+    invalidate_feeds((post.author_id,), (post.group_id, old_group_id),
+                     (post.pk,))
+
+
+def invalidate_author_pages(author_id, usernames):
+    """
+    Сбрасывает страницы, где выводятся имя и username автора: его
+    профиль (и страницы его постов), главную ленту и ленты групп, в
+    которых он писал.
+    """
+
+    slugs = Group.objects.filter(posts__author_id=author_id).values_list(
+        'slug', flat=True
+    ).distinct()
+    cache.bump(
+        cache.INDEX_FEED, cache.author_version(author_id),
+        *(cache.profile_feed(username) for username in usernames),
+        *(cache.group_feed(slug) for slug in slugs)
+    )
+
+
+def invalidate_group_pages(group_id, slugs):
+    """
+    Сбрасывает страницы, где выводится группа: ее ленту, главную ленту и
+    профили (со страницами постов) авторов, которые в ней писали.
+    """
+
+    usernames = User.objects.filter(posts__group_id=group_id).values_list(
+        'username', flat=True
+    ).distinct()
+    cache.bump(
+        cache.INDEX_FEED, cache.GROUPS, cache.group_version(group_id),
+        *(cache.group_feed(slug) for slug in slugs),
+        *(cache.profile_feed(username) for username in usernames)
+    )
+
+
+def displayed_changed(instance, fields):
+    # старые значения снимаются, чтобы не сравнивать с ними при
+    # следующем сохранении того же экземпляра
+    old = instance.__dict__.pop('_old_displayed', None)
+    return old is not None and old != tuple(
+        getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.post_added(instance)
+    elif (hasattr(instance, '_loaded_group_id')
+            and instance._loaded_group_id != instance.group_id):
+        counters.post_moved(instance._loaded_group_id, instance.group_id)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_pages_on_save(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    invalidate_post_pages(
+        instance, getattr(instance, '_loaded_group_id', None)
+    )
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+def fanout_on_create(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        timeline.fanout_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def generate_thumbnails_on_save(sender, instance, raw, **kwargs):
+    if not raw and instance.image:
+        thumbnails.enqueue(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    counters.post_removed(instance)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_pages_on_delete(sender, instance, **kwargs):
+    invalidate_post_pages(instance)
+
+
+def invalidate_profile(author_id):
+    # число подписчиков выводится в профиле автора
+    username = User.objects.filter(pk=author_id).values_list(
+        'username', flat=True
+    ).first()
+    cache.bump(username and cache.profile_feed(username))
+
+
+@receiver(post_save, sender=Follow)
+def update_timeline_on_follow(sender, instance, created, raw, **kwargs):
+    if raw or not created:
+        return
+    timeline.followed(
+        instance, counters.change_followers_count(instance.author_id, 1)
+    )
+    invalidate_profile(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def update_timeline_on_unfollow(sender, instance, **kwargs):
+    timeline.unfollowed(
+        instance, counters.change_followers_count(instance.author_id, -1)
+    )
+    invalidate_profile(instance.author_id)
+
+
+@receiver(pre_save, sender=Group)
+def remember_old_slug(sender, instance, **kwargs):
+    if instance.pk:
+        old = Group.objects.filter(pk=instance.pk).values_list(
+            *GROUP_DISPLAY_FIELDS
+        ).first()
+        if old is not None:
+            instance._old_displayed = old
+            instance._old_slug = old[GROUP_DISPLAY_FIELDS.index('slug')]
+
+
+@receiver(post_save, sender=Group)
+def invalidate_pages_on_group_save(sender, instance, created, raw,
+                                   **kwargs):
+    changed = displayed_changed(instance, GROUP_DISPLAY_FIELDS)
+    if raw:
+        return
+    if created:
+        # новая группа нужна только в вариантах выбора группы
+        cache.bump(cache.GROUPS)
+    elif changed:
+        invalidate_group_pages(
+            instance.pk, {instance.slug, getattr(instance, '_old_slug', None)}
+        )
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_pages_on_group_delete(sender, instance, **kwargs):
+    # после удаления посты уже отвязаны, и их авторов не найти
+    invalidate_group_pages(instance.pk, {instance.slug})
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_lookups(sender, instance, **kwargs):
+    groups.invalidate(
+        [instance.pk], [instance.slug, getattr(instance, '_old_slug', None)]
+    )
+
+
+@receiver(pre_save, sender=User)
+def remember_displayed_names(sender, instance, update_fields=None,
+                             **kwargs):
+    # вход, смена пароля или прав не меняют того, что выводится
+    if instance.pk and (update_fields is None
+                        or set(update_fields) & set(USER_DISPLAY_FIELDS)):
+        old = User.objects.filter(pk=instance.pk).values_list(
+            *USER_DISPLAY_FIELDS
+        ).first()
+        if old is not None:
+            instance._old_displayed = old
+
+
+@receiver(post_save, sender=User)
+def invalidate_pages_on_user_save(sender, instance, created, raw, **kwargs):
+    old = instance.__dict__.get('_old_displayed')
+    if displayed_changed(instance, USER_DISPLAY_FIELDS) and not raw:
+        invalidate_author_pages(instance.pk, {old[0], instance.username})
+
+
+@receiver(post_delete, sender=User)
+def invalidate_pages_on_user_delete(sender, instance, **kwargs):
+    # посты и подписки удалены каскадом со своими сигналами
+    cache.bump(cache.profile_feed(instance.username))
+
+
+@receiver(replica_synced)
+def invalidate_pages_on_replica_sync(sender, **kwargs):
+    cache.bump(cache.REPLICA)
@@ -0,0 +1,12 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, size):
+    if not post.image:
+        return None
+    return thumbnails.lookup(post, size)
@@ -0,0 +1,81 @@
+"""
+Модуль предназначен для тестирования админки постов.
+"""
+
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from posts.models import Group, Post, User
+from posts.paginators import CappedCountPaginator
+
+POSTS_COUNT = 30
+GROUPS_COUNT = 3
+# сессия, пользователь, подсчет, группы (2), посты, date_hierarchy (2)
+CHANGELIST_QUERY_BUDGET = 8
+
+
+class PostAdminTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(GROUPS_COUNT)
+        ]
+        groups = [
+            Group.objects.create(title=f'Группа {number}',
+                                 slug=f'group-{number}',
+                                 description='Описание')
+            for number in range(GROUPS_COUNT)
+        ]
+        Post.objects.bulk_create(
+            Post(text='Текст', author=authors[number % GROUPS_COUNT],
+                 group=groups[number % GROUPS_COUNT])
+            for number in range(POSTS_COUNT)
+        )
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_changelist_query_budget(self):
+        """
+        Тест проверяет, что число запросов списка постов не зависит
+        от числа строк, а варианты групп берутся из кэша.
+        """
+
+        with self.assertMaxQueries(CHANGELIST_QUERY_BUDGET, self.url):
+            response = self.admin_client.get(self.url)
+        self.assertEqual(len(response.context['cl'].result_list),
+                         POSTS_COUNT)
+        with self.assertMaxQueries(CHANGELIST_QUERY_BUDGET - 2, self.url):
+            self.admin_client.get(self.url)
+
+    def test_group_choices_follow_group_changes(self):
+        """
+        Тест проверяет, что новая группа появляется в списке выбора.
+        """
+
+        self.admin_client.get(self.url)
+        Group.objects.create(title='Новая группа', slug='new-group',
+                             description='Описание')
+        response = self.admin_client.get(self.url)
+        self.assertContains(response, 'Новая группа')
+
+    def test_count_is_capped(self):
+        """
+        Тест проверяет, что пагинатор админки не считает записи дальше
+        предела.
+        """
+
+        with mock.patch.object(CappedCountPaginator, 'count_limit', 5):
+            response = self.admin_client.get(self.url)
+        self.assertEqual(response.context['cl'].result_count, 5)
@@ -0,0 +1,305 @@
+"""
+Модуль предназначен для тестирования кэша страниц для анонимных
+пользователей.
+"""
+
+import shutil
+import tempfile
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from posts.cache import CARD_TEMPLATE
+from posts.models import Group, Post, User
+
+TEST_USER_USERNAME = 'amogus'
+TEST_GROUP_TITLE = 'Заголовок'
+TEST_GROUP_SLUG = 'test-slug'
+TEST_GROUP_DESC = 'Описание'
+TEST_POST_TEXT = 'Текст'
+
+FILE_CACHE_DIR = tempfile.mkdtemp()
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username=TEST_USER_USERNAME)
+        cls.group = Group.objects.create(
+            title=TEST_GROUP_TITLE,
+            description=TEST_GROUP_DESC,
+            slug=TEST_GROUP_SLUG
+        )
+        cls.other_group = Group.objects.create(
+            title=TEST_GROUP_TITLE,
+            description=TEST_GROUP_DESC,
+            slug='other'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text=TEST_POST_TEXT
+        )
+        cls.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group', args=(TEST_GROUP_SLUG,)),
+            'profile': reverse('posts:profile', args=(TEST_USER_USERNAME,)),
+            'post_detail': reverse('posts:post_detail',
+                                   args=(TEST_USER_USERNAME, cls.post.pk)),
+        }
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_anonymous_pages_are_cached(self):
+        """
+        Тест проверяет, что повторный анонимный запрос не обращается к базе.
+        """
+
+        for name, url in self.urls.items():
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+
+    def test_authorized_pages_are_not_cached(self):
+        """
+        Тест проверяет, что страницы авторизованного пользователя
+        не берутся из кэша.
+        """
+
+        url = self.urls['index']
+        self.authorized_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertIsNotNone(response.context)
+
+    def test_new_post_invalidates_feeds(self):
+        """
+        Тест проверяет, что новый пост появляется в закэшированных лентах.
+        """
+
+        for url in self.urls.values():
+            self.guest_client.get(url)
+        Post.objects.create(author=self.user, group=self.group,
+                            text='Свежий пост')
+        for name in ('index', 'group', 'profile'):
+            with self.subTest(name=name):
+                response = self.guest_client.get(self.urls[name])
+                self.assertContains(response, 'Свежий пост')
+
+    def test_edit_moves_post_between_group_feeds(self):
+        """
+        Тест проверяет, что при переносе поста обновляются ленты обеих
+        групп, а страница поста показывает новую группу.
+        """
+
+        other_url = reverse('posts:group', args=('other',))
+        for url in (*self.urls.values(), other_url):
+            self.guest_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:post_edit',
+                    args=(TEST_USER_USERNAME, self.post.pk)),
+            {'text': 'Новый текст', 'group': self.other_group.pk}
+        )
+        self.assertNotContains(self.guest_client.get(self.urls['group']),
+                               'Новый текст')
+        self.assertContains(self.guest_client.get(other_url), 'Новый текст')
+        self.assertContains(self.guest_client.get(self.urls['post_detail']),
+                            'Новый текст')
+
+    def test_group_rename_invalidates_pages(self):
+        """
+        Тест проверяет, что переименование группы видно на страницах,
+        где выводится ее название.
+        """
+
+        for url in self.urls.values():
+            self.guest_client.get(url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        for name in ('index', 'group', 'profile', 'post_detail'):
+            with self.subTest(name=name):
+                response = self.guest_client.get(self.urls[name])
+                self.assertContains(response, 'Новое название')
+
+    def test_author_rename_invalidates_pages(self):
+        """
+        Тест проверяет, что новое имя автора видно на главной, в профиле,
+        на странице поста и в ленте группы, где он писал.
+        """
+
+        for url in self.urls.values():
+            self.guest_client.get(url)
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        for name in ('index', 'group', 'profile', 'post_detail'):
+            with self.subTest(name=name):
+                response = self.guest_client.get(self.urls[name])
+                self.assertContains(response, 'Новое имя')
+
+    def test_other_user_changes_keep_pages(self):
+        """
+        Тест проверяет, что вход, смена пароля и прав, регистрация и
+        изменение невыводимых полей группы не сбрасывают страницы.
+        """
+
+        for url in self.urls.values():
+            self.guest_client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('password')
+        user.save()
+        user.is_staff = True
+        user.save(update_fields=['is_staff'])
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        User.objects.create_user(username='newcomer')
+        Group.objects.get(pk=self.group.pk).save()
+        for name, url in self.urls.items():
+            with self.subTest(name=name), self.assertNumQueries(0):
+                self.guest_client.get(url)
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username=TEST_USER_USERNAME)
+        cls.group = Group.objects.create(
+            title=TEST_GROUP_TITLE,
+            description=TEST_GROUP_DESC,
+            slug=TEST_GROUP_SLUG
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text=TEST_POST_TEXT
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cards_are_rendered_once(self):
+        """
+        Тест проверяет, что карточки постов берутся из кэша для
+        авторизованного пользователя.
+        """
+
+        url = reverse('posts:index')
+        first = self.authorized_client.get(url)
+        self.assertTemplateUsed(first, CARD_TEMPLATE)
+        second = self.authorized_client.get(url)
+        self.assertTemplateNotUsed(second, CARD_TEMPLATE)
+        self.assertEqual(first.content, second.content)
+
+    def test_rename_updates_cards(self):
+        """
+        Тест проверяет, что изменение поста, имени автора и названия
+        группы меняют ключ карточки.
+        """
+
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        changes = (
+            (self.post, 'text', 'Новый текст'),
+            (self.user, 'first_name', 'Амогус'),
+            (self.group, 'title', 'Новое название'),
+        )
+        for instance, field, value in changes:
+            with self.subTest(field=field):
+                setattr(instance, field, value)
+                instance.save()
+                response = self.authorized_client.get(url)
+                self.assertContains(response, value)
+
+    def test_rename_keeps_other_cards(self):
+        """
+        Тест проверяет, что переименование автора меняет ключи только
+        его карточек, а смена пароля не меняет ни одного.
+        """
+
+        other = User.objects.create_user(username='other')
+        Post.objects.create(author=other, text='Чужой пост')
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        author = User.objects.get(pk=other.pk)
+        author.set_password('password')
+        author.save()
+        self.assertTemplateNotUsed(self.authorized_client.get(url),
+                                   CARD_TEMPLATE)
+        author.last_name = 'Другой'
+        author.save()
+        self.assertTemplateUsed(self.authorized_client.get(url),
+                                CARD_TEMPLATE, count=1)
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username=TEST_USER_USERNAME)
+        cls.post = Post.objects.create(author=cls.user, text=TEST_POST_TEXT)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_feed_etag(self):
+        """
+        Тест проверяет, что неизменившаяся лента отдает 304 без запросов
+        к базе, а новый пост меняет ETag.
+        """
+
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        authorized = self.authorized_client.get(url)
+        self.assertNotEqual(authorized['ETag'], etag)
+
+        Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_without_last_modified(self):
+        """
+        Тест проверяет, что страница поста не отдает Last-Modified:
+        она меняется и без изменения поста, например при новом посте
+        автора, и If-Modified-Since не должен давать устаревший 304.
+        """
+
+        url = reverse('posts:post_detail',
+                      args=(TEST_USER_USERNAME, self.post.pk))
+        response = self.guest_client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        Post.objects.create(author=self.user, text='Еще пост')
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<span >2</span>')
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': FILE_CACHE_DIR,
+    }
+})
+class FileBasedPageCacheTest(PageCacheTest):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(FILE_CACHE_DIR, ignore_errors=True)
@@ -0,0 +1,189 @@
+"""
+Модуль предназначен для тестирования management-команд приложения.
+"""
+
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase
+
+from posts.models import (AuthorStats, Follow, Group, Post, TimelineEntry,
+                          User)
+
+
+class ExplainFeedsCommandTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        """
+        Тест проверяет, что запросы лент не читают таблицу постов целиком
+        и не сортируют во временном B-дереве.
+        """
+
+        out = StringIO()
+        call_command('explain_feeds', check=True, stdout=out)
+        self.assertIn('post_pub_date_idx', out.getvalue())
+        self.assertIn('post_group_pub_date_idx', out.getvalue())
+        self.assertIn('post_author_pub_date_idx', out.getvalue())
+
+
+class ImportPostsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='amogus')
+        cls.group = Group.objects.create(title='Заголовок', slug='test-slug',
+                                         description='Описание')
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_file(self, name, content):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def import_posts(self, *args, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', *args, stdout=out, stderr=err,
+                     **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_jsonl(self):
+        """
+        Тест проверяет импорт JSONL: дата публикации сохраняется,
+        счетчики обновляются, ошибочные записи пропускаются.
+        """
+
+        records = [
+            {'text': 'Первый', 'author': 'amogus', 'group': 'test-slug',
+             'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'text': 'Второй', 'author': 'amogus'},
+            {'text': 'Чужой', 'author': 'nobody'},
+            {'text': '', 'author': 'amogus'},
+        ]
+        path = self.write_file('posts.jsonl', '\n'.join(
+            json.dumps(record) for record in records
+        ) + '\nне json\n')
+        out, err = self.import_posts(path, batch_size=2)
+
+        self.assertEqual(Post.objects.count(), 2)
+        post = Post.objects.get(text='Первый')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(AuthorStats.objects.get(author=self.user).posts_count,
+                         2)
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 1)
+        self.assertIn('автор не найден: nobody', err)
+        self.assertEqual(err.count('\n'), 3)
+        self.assertIn('в секунду', out)
+
+    def test_malformed_fields_are_skipped(self):
+        """
+        Тест проверяет, что записи с несуществующей датой и полями не
+        того типа пропускаются, а не прерывают импорт.
+        """
+
+        records = [
+            {'text': 'Месяц 13', 'author': 'amogus',
+             'pub_date': '2020-13-45T00:00:00'},
+            {'text': 'Дата числом', 'author': 'amogus', 'pub_date': 2020},
+            {'text': 'Автор списком', 'author': ['amogus']},
+            {'text': 'Группа словарем', 'author': 'amogus',
+             'group': {'slug': 'test-slug'}},
+            {'text': 'Хороший', 'author': 'amogus'},
+        ]
+        path = self.write_file('posts.jsonl', '\n'.join(
+            json.dumps(record) for record in records
+        ))
+        _, err = self.import_posts(path)
+        self.assertEqual(list(Post.objects.values_list('text', flat=True)),
+                         ['Хороший'])
+        self.assertEqual(err.count('\n'), 4)
+        self.assertIn('month must be in 1..12', err)
+
+    def test_import_csv_from_stdin(self):
+        """
+        Тест проверяет импорт CSV из stdin с созданием новых авторов.
+        """
+
+        content = 'text,author,group\nПривет,newbie,\nПока,amogus,test-slug\n'
+        with mock.patch('sys.stdin', StringIO(content)):
+            self.import_posts('-', format='csv', create_authors=True)
+        self.assertEqual(Post.objects.filter(author__username='newbie')
+                         .count(), 1)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_resume_from_checkpoint(self):
+        """
+        Тест проверяет, что повторный запуск с файлом отметки продолжает
+        импорт с места остановки.
+        """
+
+        path = self.write_file('posts.jsonl', '\n'.join(
+            json.dumps({'text': f'Пост {number}', 'author': 'amogus'})
+            for number in range(5)
+        ))
+        checkpoint = os.path.join(self.tmp_dir.name, 'checkpoint')
+        with open(checkpoint, 'w') as file:
+            file.write('3')
+        self.import_posts(path, checkpoint=checkpoint, batch_size=1)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Пост 3', 'Пост 4']
+        )
+        with open(checkpoint) as file:
+            self.assertEqual(file.read(), '5')
+        self.import_posts(path, checkpoint=checkpoint)
+        self.assertEqual(Post.objects.count(), 2)
+
+
+class SeedCommandTest(TestCase):
+    def test_seed_skewed_posts(self):
+        """
+        Тест проверяет, что seed создает заданные объемы, пересчитывает
+        счетчики и распределяет посты по авторам неравномерно.
+        """
+
+        call_command('seed', users=20, groups=3, posts=500, skew=1.5,
+                     seed=1, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 500)
+        counts = sorted(AuthorStats.objects.values_list('posts_count',
+                                                        flat=True))
+        self.assertEqual(sum(counts), 500)
+        self.assertGreater(counts[-1], 500 / 20 * 3)
+        self.assertEqual(
+            sum(Group.objects.values_list('posts_count', flat=True)),
+            Post.objects.filter(group__isnull=False).count()
+        )
+
+        call_command('seed', users=20, groups=3, posts=10, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Post.objects.count(), 510)
+
+    def test_seed_follows(self):
+        """
+        Тест проверяет, что seed создает подписки, считает подписчиков
+        и собирает ленты подписок.
+        """
+
+        call_command('seed', users=20, groups=0, posts=200, follows=5,
+                     seed=1, stdout=StringIO())
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('followers_count',
+                                                flat=True)),
+            Follow.objects.count()
+        )
+        self.assertTrue(TimelineEntry.objects.exists())
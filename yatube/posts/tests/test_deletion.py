@@ -0,0 +1,228 @@
+"""
+Модуль предназначен для тестирования фонового удаления пользователей и
+групп пачками.
+"""
+
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import deletion
+from posts.models import (AuthorStats, DeletionJob, Follow, Group, Post,
+                          PostStats, TimelineEntry, User)
+
+POSTS_COUNT = 7
+BATCH_SIZE = 3
+
+
+@override_settings(DELETION_BATCH_SIZE=BATCH_SIZE)
+class DeletionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.reader)
+        for number in range(POSTS_COUNT):
+            post = Post.objects.create(text=f'Пост {number}',
+                                       author=cls.author, group=cls.group)
+            PostStats.objects.create(post=post, views_count=number)
+        Post.objects.create(text='Чужой пост', author=cls.reader,
+                            group=cls.group)
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_admin_action_queues_user_deletion(self):
+        """
+        Тест проверяет, что действие админки только ставит удаление в
+        очередь и делает пользователя неактивным.
+        """
+
+        response = self.admin_client.post(
+            reverse('admin:auth_user_changelist'),
+            {'action': 'queue_deletion',
+             '_selected_action': [self.author.pk]}
+        )
+        self.assertEqual(response.status_code, 302)
+        job = DeletionJob.objects.get()
+        self.assertEqual(
+            (job.kind, job.target_repr, job.status, job.total),
+            (DeletionJob.USER, 'author', DeletionJob.QUEUED, POSTS_COUNT)
+        )
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertEqual(self.author.posts.count(), POSTS_COUNT)
+        self.assertContains(
+            self.admin_client.get(
+                reverse('admin:posts_deletionjob_changelist')
+            ),
+            f'0 из {POSTS_COUNT} (0%)'
+        )
+
+        # повторная постановка не создает второе задание
+        deletion.queue_user_deletion(self.author)
+        self.assertEqual(DeletionJob.objects.count(), 1)
+
+    def test_admin_delete_is_queued(self):
+        """
+        Тест проверяет, что в админке нет блокирующего delete_selected, а
+        кнопка "Удалить" формы группы ставит задание вместо удаления.
+        """
+
+        response = self.admin_client.get(
+            reverse('admin:posts_group_changelist')
+        )
+        self.assertNotIn('delete_selected',
+                         dict(response.context['action_form']
+                              .fields['action'].choices))
+        url = reverse('admin:posts_group_delete', args=[self.group.pk])
+        self.assertEqual(self.admin_client.get(url).status_code, 200)
+        response = self.admin_client.post(url, {'post': 'yes'})
+        self.assertRedirects(response,
+                             reverse('admin:posts_group_changelist'))
+        self.assertTrue(Group.objects.filter(pk=self.group.pk).exists())
+        job = DeletionJob.objects.get()
+        self.assertEqual((job.kind, job.status),
+                         (DeletionJob.GROUP, DeletionJob.QUEUED))
+
+    def test_queueing_requires_cascade_permissions(self):
+        """
+        Тест проверяет, что без права на удаление постов и подписок
+        сотрудник не может поставить удаление пользователя ни кнопкой
+        формы, ни действием списка.
+        """
+
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff.user_permissions.set(Permission.objects.filter(
+            codename__in=('view_user', 'delete_user', 'delete_follow')
+        ))
+        client = Client()
+        client.force_login(staff)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        response = client.get(url)
+        self.assertEqual(list(response.context['perms_lacking']), ['Пост'])
+        self.assertEqual(client.post(url, {'post': 'yes'}).status_code, 403)
+        client.post(reverse('admin:auth_user_changelist'),
+                    {'action': 'queue_deletion',
+                     '_selected_action': [self.author.pk]})
+        self.assertFalse(DeletionJob.objects.exists())
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.is_active)
+
+    def test_user_deletion(self):
+        """
+        Тест проверяет, что задание удаляет посты пачками, а затем
+        пользователя, его подписки и ленту.
+        """
+
+        job = deletion.queue_user_deletion(self.author)
+        progress = []
+        deletion.run_job(job.pk, progress=lambda job: progress.append(
+            job.processed
+        ))
+        self.assertEqual(progress, [3, 6, 7])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.progress),
+                         (DeletionJob.DONE, POSTS_COUNT, 100))
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(PostStats.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(AuthorStats.objects.get(author=self.reader)
+                         .followers_count, 0)
+
+    def test_group_deletion(self):
+        """
+        Тест проверяет, что задание отвязывает посты группы и удаляет ее.
+        """
+
+        job = deletion.queue_group_deletion(self.group)
+        deletion.run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed),
+                         (DeletionJob.DONE, POSTS_COUNT + 1))
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group=None).count(),
+                         POSTS_COUNT + 1)
+        self.assertEqual(
+            AuthorStats.posts_count_of(User.objects.get(username='author')),
+            POSTS_COUNT
+        )
+
+    def test_resume_after_failure(self):
+        """
+        Тест проверяет, что прерванное задание сохраняет место
+        остановки и продолжается с него командой.
+        """
+
+        job = deletion.queue_user_deletion(self.author)
+        delete_posts = deletion.delete_posts
+        calls = []
+
+        def fail_second_chunk(rows):
+            calls.append(rows)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            delete_posts(rows)
+
+        with mock.patch.object(deletion, 'delete_posts', fail_second_chunk), \
+                self.assertRaises(RuntimeError):
+            deletion.run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed),
+                         (DeletionJob.FAILED, BATCH_SIZE))
+        self.assertIn('сбой', job.error)
+        self.assertEqual(self.author.posts.count(), POSTS_COUNT - BATCH_SIZE)
+
+        out = StringIO()
+        call_command('run_deletion_jobs', retry_failed=True, stdout=out)
+        self.assertIn('Выполнено заданий удаления: 1', out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed),
+                         (DeletionJob.DONE, POSTS_COUNT))
+        self.assertFalse(User.objects.filter(username='author').exists())
+
+    def test_running_job_is_not_run_twice(self):
+        """
+        Тест проверяет, что задание в работе не выполняется повторно, а
+        команда продолжает только задания без обновлений дольше таймаута.
+        """
+
+        job = deletion.queue_user_deletion(self.author)
+        DeletionJob.objects.filter(pk=job.pk).update(
+            status=DeletionJob.RUNNING
+        )
+        self.assertIsNone(deletion.run_job(job.pk))
+
+        call_command('run_deletion_jobs', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed),
+                         (DeletionJob.RUNNING, 0))
+        self.assertEqual(self.author.posts.count(), POSTS_COUNT)
+
+        DeletionJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        out = StringIO()
+        call_command('run_deletion_jobs', stdout=out)
+        self.assertIn('возвращено в очередь прерванных: 1', out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed),
+                         (DeletionJob.DONE, POSTS_COUNT))
@@ -0,0 +1,150 @@
+"""
+Модуль предназначен для тестирования начала текста постов в лентах.
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Post, PostStats, User, make_excerpt
+
+LONG_TEXT = 'слово ' * 100
+
+
+class MakeExcerptTest(TestCase):
+    def test_short_text_is_kept(self):
+        """
+        Тест проверяет, что короткий текст не обрезается.
+        """
+
+        self.assertEqual(make_excerpt('короткий текст', 20),
+                         ('короткий текст', False))
+
+    def test_cut_at_word_boundary(self):
+        """
+        Тест проверяет, что длинный текст обрезается по границе слова.
+        """
+
+        self.assertEqual(make_excerpt('один два три четыре', 12),
+                         ('один два…', True))
+
+    def test_long_word_is_cut(self):
+        """
+        Тест проверяет, что слово длиннее отрывка режется посередине.
+        """
+
+        excerpt, truncated = make_excerpt('а' * 50, 10)
+        self.assertEqual(excerpt, 'а' * 9 + '…')
+        self.assertTrue(truncated)
+
+
+@override_settings(POST_EXCERPT_LENGTH=50)
+class ExcerptTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='amogus')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_save_fills_excerpt(self):
+        """
+        Тест проверяет, что создание и редактирование поста обновляют
+        начало текста, в том числе при сохранении с update_fields.
+        """
+
+        self.client.post(reverse('posts:post_create'), {'text': LONG_TEXT})
+        post = Post.objects.get()
+        self.assertTrue(post.is_truncated)
+        self.assertLessEqual(len(post.excerpt), 50)
+
+        self.client.post(
+            reverse('posts:post_edit', args=['amogus', post.pk]),
+            {'text': 'Коротко'}
+        )
+        post.refresh_from_db()
+        self.assertEqual((post.excerpt, post.is_truncated),
+                         ('Коротко', False))
+
+        post.text = LONG_TEXT
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertTrue(post.is_truncated)
+
+    def test_feed_shows_excerpt(self):
+        """
+        Тест проверяет, что лента не загружает полный текст и выводит
+        начало текста со ссылкой на пост.
+        """
+
+        post = Post.objects.create(text=LONG_TEXT + 'финал',
+                                   author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        feed_sql = [query['sql'] for query in queries
+                    if 'FROM "posts_post"' in query['sql']]
+        self.assertTrue(feed_sql)
+        # полный текст читается только у постов без начала текста
+        for sql in feed_sql:
+            self.assertNotIn('"posts_post"."text",', sql)
+        self.assertEqual(response.context['page'].object_list[0].text, '')
+        self.assertContains(response, post.excerpt)
+        self.assertNotContains(response, 'финал')
+        self.assertContains(response, 'читать дальше')
+        self.assertContains(
+            response, reverse('posts:post_detail', args=['amogus', post.pk])
+        )
+
+    def test_model_feeds_read_text_in_one_query(self):
+        """
+        Тест проверяет, что лента подписок и популярные посты подставляют
+        полный текст постов без начала текста из того же запроса, а не
+        загружают его для каждого поста.
+        """
+
+        author = User.objects.create_user(username='writer')
+        Post.objects.bulk_create(
+            [Post(text=f'Без начала {number}', author=author)
+             for number in range(3)]
+        )
+        for number, post in enumerate(Post.objects.all()):
+            PostStats.objects.create(post=post, views_count=number + 1)
+        Follow.objects.create(user=self.user, author=author)
+        for name in ('posts:follow_index', 'posts:popular'):
+            with self.subTest(name=name):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(reverse(name))
+                self.assertContains(response, 'Без начала', count=3)
+                for query in queries:
+                    self.assertNotIn('WHERE "posts_post"."id" =',
+                                     query['sql'])
+
+    def test_backfill_command(self):
+        """
+        Тест проверяет, что команда заполняет начало текста постов,
+        вставленных в обход save(), и пересчитывает все с --all, а
+        закэшированная лента показывает новое начало текста.
+        """
+
+        Post.objects.bulk_create(
+            [Post(text=LONG_TEXT, author=self.user) for _ in range(5)]
+            + [Post(text='Коротко', author=self.user)]
+        )
+        call_command('backfill_excerpts', batch_size=2, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(excerpt='').exists())
+        self.assertEqual(Post.objects.filter(is_truncated=True).count(), 5)
+        self.assertContains(self.client.get(reverse('posts:index')),
+                            'читать дальше')
+
+        with self.settings(POST_EXCERPT_LENGTH=1000):
+            call_command('backfill_excerpts', all=True, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(is_truncated=True).exists())
+        self.assertNotContains(self.client.get(reverse('posts:index')),
+                               'читать дальше')
@@ -0,0 +1,95 @@
+"""
+Модуль предназначен для тестирования выгрузки постов.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from posts.exporter import iter_posts
+from posts.models import Group, Post, User
+
+POSTS_COUNT = 7
+
+
+class ExportPostsTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='amogus')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(title='Заголовок', slug='test-slug',
+                                         description='Описание')
+        # одна дата публикации у всех постов проверяет разбор ничьих в ключе
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.user,
+                 group=cls.group if number % 2 else None)
+            for number in range(POSTS_COUNT)
+        )
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+
+    def setUp(self):
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_chunks_cover_all_posts(self):
+        """
+        Тест проверяет, что выгрузка пачками отдает каждый пост один раз
+        и выполняет по запросу на пачку.
+        """
+
+        with self.assertMaxQueries(4):
+            rows = list(iter_posts(Post.objects.all(), chunk_size=2))
+        self.assertEqual(sorted(row[0] for row in rows),
+                         sorted(Post.objects.values_list('pk', flat=True)))
+
+    def test_export_command_jsonl(self):
+        """
+        Тест проверяет, что команда выгружает посты группы в JSONL.
+        """
+
+        out = io.StringIO()
+        call_command('export_posts', group='test-slug', stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(records), POSTS_COUNT // 2)
+        self.assertEqual({record['group'] for record in records},
+                         {'test-slug'})
+        self.assertEqual(records[0]['author'], 'amogus')
+
+    def test_export_command_gzip_csv(self):
+        """
+        Тест проверяет выгрузку в сжатый CSV-файл.
+        """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'posts.csv.gz')
+            call_command('export_posts', output=path, format='csv',
+                         gzip=True, chunk_size=3)
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), POSTS_COUNT)
+
+    def test_export_endpoint(self):
+        """
+        Тест проверяет, что потоковая выгрузка доступна только персоналу.
+        """
+
+        url = reverse('posts:export')
+        response = Client().get(url)
+        self.assertEqual(response.status_code, 302)
+
+        response = self.staff_client.get(url, {'author': 'amogus',
+                                               'gzip': '1'})
+        self.assertTrue(response.streaming)
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(content.decode().splitlines()), POSTS_COUNT)
+        self.assertIn('posts.jsonl.gz', response['Content-Disposition'])
@@ -0,0 +1,103 @@
+"""
+Модуль предназначен для тестирования кэша поиска групп и авторов.
+"""
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.metrics import registry
+from posts.lookups import groups
+from posts.models import Group, Post, User
+from users.lookups import users
+
+
+class LookupsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='amogus')
+        cls.group = Group.objects.create(title='Заголовок', slug='test-slug',
+                                         description='Описание')
+
+    def test_group_lookup(self):
+        """
+        Тест проверяет, что повторный поиск группы не обращается к базе,
+        а сохранение группы сбрасывает запись по старому и новому slug.
+        """
+
+        self.assertEqual(groups.get('test-slug'), self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.get('test-slug').title, 'Заголовок')
+
+        self.group.slug = 'new-slug'
+        self.group.title = 'Новый заголовок'
+        self.group.save()
+        self.assertIsNone(groups.get('test-slug'))
+        self.assertEqual(groups.get('new-slug').title, 'Новый заголовок')
+
+    def test_counters_invalidate(self):
+        """
+        Тест проверяет, что новый пост сбрасывает закэшированные
+        счетчики автора и группы.
+        """
+
+        self.assertEqual(groups.get('test-slug').posts_count, 0)
+        users.get('amogus')
+        Post.objects.create(text='Текст', author=self.user, group=self.group)
+        self.assertEqual(groups.get('test-slug').posts_count, 1)
+        self.assertEqual(users.get('amogus').stats.posts_count, 1)
+
+    def test_missing_user_then_signup(self):
+        """
+        Тест проверяет, что кэшированный результат "не найдено"
+        сбрасывается при создании пользователя.
+        """
+
+        self.assertIsNone(users.get('newbie'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(users.get('newbie'))
+        User.objects.create_user(username='newbie')
+        self.assertIsNotNone(users.get('newbie'))
+
+    def test_session_user_is_cached(self):
+        """
+        Тест проверяет, что пользователь сессии загружается из кэша, а
+        страницы профиля и группы не ищут автора и группу в базе.
+        """
+
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse('posts:group', args=['test-slug']))
+        with self.assertNumQueries(2):
+            # сессия и одна страница постов группы
+            client.get(reverse('posts:group', args=['test-slug']))
+        self.assertIn('cache="user:pk",result="local_hit"',
+                      registry.render())
+
+    def test_model_backend_session(self):
+        """
+        Тест проверяет, что сессии, созданные ModelBackend до появления
+        кэширующего бэкенда, остаются действительными.
+        """
+
+        client = Client()
+        client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_deactivated_user_is_logged_out(self):
+        """
+        Тест проверяет, что отключенный пользователь сразу теряет сессию,
+        даже если он был в кэше.
+        """
+
+        client = Client()
+        client.force_login(self.user)
+        client.get(reverse('posts:follow_index'))
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
@@ -7,7 +7,8 @@ import textwrap
 
 from django.test import TestCase
 
-from posts.models import Group, Post, User
+from posts.counters import recount_posts
+from posts.models import AuthorStats, Group, Post, User
 
 TEST_GROUP_TITLE = 'Отряды Понасенкова'
 TEST_GROUP_SLUG = 'genius'
@@ -114,3 +115,76 @@ class PostModelTest(TestCase):
         post = PostModelTest.post
         text = TEST_POST_STR_FUNC_FORMAT
         self.assertEqual(str(post), text)
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username=TEST_USER_USERNAME)
+        cls.group = Group.objects.create(
+            title=TEST_GROUP_TITLE,
+            slug=TEST_GROUP_SLUG,
+            description=TEST_GROUP_DESC
+        )
+        cls.other_group = Group.objects.create(
+            title=TEST_GROUP_TITLE,
+            slug='other',
+            description=TEST_GROUP_DESC
+        )
+
+    def assertCounters(self, author, group, other_group):
+        self.assertEqual(AuthorStats.objects.get(author=self.user).posts_count,
+                         author)
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count,
+                         group)
+        self.assertEqual(
+            Group.objects.get(pk=self.other_group.pk).posts_count,
+            other_group
+        )
+
+    def test_counters_follow_post_lifecycle(self):
+        """
+        Тест проверяет, что счетчики меняются при создании, переносе
+        в другую группу и удалении поста.
+        """
+
+        post = Post.objects.create(text=TEST_POST_TEXT, author=self.user,
+                                   group=self.group)
+        Post.objects.create(text=TEST_POST_TEXT, author=self.user)
+        self.assertCounters(2, 1, 0)
+
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(2, 0, 1)
+
+        post.delete()
+        self.assertCounters(1, 0, 0)
+
+    def test_drifted_counters_do_not_break_delete(self):
+        """
+        Тест проверяет, что удаление поста при заниженных счетчиках не
+        нарушает CHECK неотрицательного поля, а счетчики остаются нулем.
+        """
+
+        post = Post.objects.create(text=TEST_POST_TEXT, author=self.user,
+                                   group=self.group)
+        AuthorStats.objects.filter(author=self.user).update(posts_count=0)
+        Group.objects.filter(pk=self.group.pk).update(posts_count=0)
+        post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_recount_posts(self):
+        """
+        Тест проверяет, что пересчет восстанавливает счетчики после
+        массовой вставки.
+        """
+
+        Post.objects.bulk_create(
+            Post(text=TEST_POST_TEXT, author=self.user, group=self.group)
+            for _ in range(3)
+        )
+        recount_posts()
+        self.assertCounters(3, 3, 0)
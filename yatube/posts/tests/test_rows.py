@@ -0,0 +1,70 @@
+"""
+Модуль предназначен для тестирования легких строк постов в лентах.
+"""
+
+from django.template.loader import render_to_string
+from django.test import TestCase
+
+from posts.cache import CARD_TEMPLATE
+from posts.models import Group, Post, User
+from posts.rows import PostRow, post_rows
+from posts.tests.test_thumbnails import make_image
+
+
+class PostRowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(
+            username='amogus', first_name='Амогус', last_name='Сус'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def test_rows_have_no_dict(self):
+        """
+        Тест проверяет, что лента возвращает строки со __slots__ и
+        полями автора и группы.
+        """
+
+        Post.objects.create(text='Текст', author=self.user, group=self.group)
+        row = post_rows(Post.objects.all()).get()
+        self.assertIsInstance(row, PostRow)
+        self.assertFalse(hasattr(row, '__dict__'))
+        self.assertEqual(
+            (row.author_username, row.author_full_name,
+             row.group_slug, row.group_title, row.excerpt, row.text),
+            ('amogus', 'Амогус Сус', 'group', 'Группа', 'Текст', '')
+        )
+
+    def test_text_without_excerpt(self):
+        """
+        Тест проверяет, что полный текст читается только у постов без
+        начала текста.
+        """
+
+        Post.objects.bulk_create([Post(text='Без начала', author=self.user)])
+        row = post_rows(Post.objects.all()).get()
+        self.assertEqual((row.excerpt, row.text), ('', 'Без начала'))
+
+    def test_card_matches_instance(self):
+        """
+        Тест проверяет, что карточка строки совпадает с карточкой
+        экземпляра поста: с группой, без группы и с картинкой.
+        """
+
+        Post.objects.create(text='С группой', author=self.user,
+                            group=self.group)
+        Post.objects.create(text='Без группы', author=self.user)
+        Post.objects.create(text='С картинкой', author=self.user,
+                            image=make_image())
+        rows = list(post_rows(Post.objects.all()))
+        posts = list(Post.objects.all())
+        self.assertEqual(len(rows), 3)
+        for row, post in zip(rows, posts):
+            with self.subTest(post=post.pk):
+                context = {'show_group': True}
+                self.assertHTMLEqual(
+                    render_to_string(CARD_TEMPLATE, {**context, 'post': row}),
+                    render_to_string(CARD_TEMPLATE, {**context, 'post': post})
+                )
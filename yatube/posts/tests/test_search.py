@@ -0,0 +1,105 @@
+"""
+Модуль предназначен для тестирования полнотекстового поиска.
+"""
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+
+TEST_USER_USERNAME = 'amogus'
+POST_PER_PAGE_COUNT = 10
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username=TEST_USER_USERNAME)
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.rare = Post.objects.create(
+            author=cls.user, text='Котики и собаки'
+        )
+        cls.frequent = Post.objects.create(
+            author=cls.user, text='Котики котики котики'
+        )
+        Post.objects.create(author=cls.user, text='Про погоду')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def search(self, query, **params):
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+        return [post.pk for post in response.context['page'].object_list]
+
+    def test_search_ranks_results(self):
+        """
+        Тест проверяет, что поиск находит посты по словам без учета
+        регистра и сортирует их по релевантности.
+        """
+
+        self.assertEqual(self.search('КОТИКИ'),
+                         [self.frequent.pk, self.rare.pk])
+        self.assertEqual(self.search('котики собаки'), [self.rare.pk])
+        self.assertEqual(self.search('слон'), [])
+
+    def test_search_ignores_query_syntax(self):
+        """
+        Тест проверяет, что операторы FTS5 во вводе не ломают поиск.
+        """
+
+        for query in ('"котики', 'котики OR погоду', 'NEAR(', '*', '-'):
+            with self.subTest(query=query):
+                response = self.guest_client.get(reverse('posts:search'),
+                                                 {'q': query})
+                self.assertEqual(response.status_code, 200)
+
+    def test_index_follows_changes(self):
+        """
+        Тест проверяет, что индекс обновляется при изменении и удалении
+        постов.
+        """
+
+        post = Post.objects.get(pk=self.rare.pk)
+        post.text = 'Только собаки'
+        post.save()
+        self.assertEqual(self.search('котики'), [self.frequent.pk])
+        self.assertEqual(self.search('собаки'), [self.rare.pk])
+        post.delete()
+        self.assertEqual(self.search('собаки'), [])
+
+    def test_search_pagination(self):
+        """
+        Тест проверяет, что результаты поиска разбиты на страницы,
+        а ссылки пагинатора сохраняют запрос.
+        """
+
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Слон номер {number}')
+            for number in range(POST_PER_PAGE_COUNT + 2)
+        )
+        self.assertEqual(len(self.search('слон')), POST_PER_PAGE_COUNT)
+        self.assertEqual(len(self.search('слон', page=2)), 2)
+        response = self.guest_client.get(reverse('posts:search'),
+                                         {'q': 'слон'})
+        self.assertContains(response, '?q=%D1%81%D0%BB%D0%BE%D0%BD&amp;page=2')
+
+    def test_admin_search(self):
+        """
+        Тест проверяет поиск в админке через полнотекстовый индекс.
+        """
+
+        response = self.admin_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собаки'}
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['cl'].result_list],
+            [self.rare.pk]
+        )
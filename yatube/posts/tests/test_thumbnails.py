@@ -0,0 +1,132 @@
+"""
+Модуль предназначен для тестирования картинок постов и их миниатюр.
+"""
+
+import io
+import os
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post, User
+
+
+def make_image(name='picture.png', size=(1200, 800)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='amogus')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self):
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'С картинкой',
+            'image': make_image(),
+        })
+        return Post.objects.get()
+
+    def thumbnail_files(self):
+        cache_dir = os.path.join(settings.MEDIA_ROOT, 'cache')
+        return [name for _, _, files in os.walk(cache_dir)
+                for name in files]
+
+    def test_render_never_generates(self):
+        """
+        Тест проверяет, что страницы с картинкой без миниатюр выводят
+        исходную картинку и не создают миниатюры сами.
+        """
+
+        post = self.create_post()
+        self.assertTrue(post.image.name.startswith('posts/'))
+        for url in (reverse('posts:index'),
+                    reverse('posts:post_detail', args=['amogus', post.pk])):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, post.image.url)
+        self.assertEqual(self.thumbnail_files(), [])
+
+    def test_pregenerated_thumbnails_are_used(self):
+        """
+        Тест проверяет, что после создания миниатюр страницы выводят их
+        вместо исходной картинки.
+        """
+
+        post = self.create_post()
+        self.client.get(reverse('posts:index'))
+        self.assertTrue(thumbnails.generate(post.pk))
+        self.assertEqual(len(self.thumbnail_files()),
+                         len(settings.POST_THUMBNAIL_SIZES))
+
+        card = thumbnails.lookup(post, 'card')
+        self.assertEqual((card.width, card.height), (960, 339))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, card.url)
+        self.assertNotContains(response, post.image.url)
+        detail = thumbnails.lookup(post, 'detail')
+        response = self.client.get(
+            reverse('posts:post_detail', args=['amogus', post.pk])
+        )
+        self.assertContains(response, detail.url)
+
+    @override_settings(POST_THUMBNAILS_ASYNC=True)
+    def test_missing_thumbnail_is_queued(self):
+        """
+        Тест проверяет, что отсутствующая миниатюра ставится в очередь.
+        """
+
+        post = Post.objects.create(text='Текст', author=self.user,
+                                   image=make_image())
+        with mock.patch.object(thumbnails, 'put') as put:
+            self.assertIsNone(thumbnails.lookup(post, 'card'))
+        put.assert_called_once_with(post.pk)
+
+    def test_command(self):
+        """
+        Тест проверяет, что команда создает миниатюры всех постов с
+        картинками, читая их id окнами меньше числа постов.
+        """
+
+        posts = [
+            Post.objects.create(text=f'Пост {number}', author=self.user,
+                                image=make_image(f'picture{number}.png'))
+            for number in range(3)
+        ]
+        Post.objects.create(text='Без картинки', author=self.user)
+        call_command('generate_thumbnails', workers=0, chunk_size=2,
+                     stdout=io.StringIO())
+        for post in posts:
+            with self.subTest(post=post.pk):
+                self.assertIsNotNone(thumbnails.lookup(post, 'card'))
+                self.assertIsNotNone(thumbnails.lookup(post, 'detail'))
+
+    def test_edit_clears_image(self):
+        """
+        Тест проверяет, что редактирование без новой картинки сохраняет
+        старую, а отметка "очистить" удаляет ее.
+        """
+
+        post = self.create_post()
+        url = reverse('posts:post_edit', args=['amogus', post.pk])
+        self.client.post(url, {'text': 'Новый текст'})
+        post.refresh_from_db()
+        self.assertTrue(post.image)
+        self.client.post(url, {'text': 'Новый текст', 'image-clear': 'on'})
+        post.refresh_from_db()
+        self.assertFalse(post.image)
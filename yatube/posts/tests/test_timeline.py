@@ -0,0 +1,163 @@
+"""
+Модуль предназначен для тестирования подписок и ленты подписок.
+"""
+
+import datetime as dt
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.counters import recount_posts
+from posts.models import AuthorStats, Follow, Post, TimelineEntry, User
+
+POST_PER_PAGE_COUNT = 10
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.star = User.objects.create_user(username='star')
+        now = timezone.now()
+        # посты двух авторов чередуются по времени
+        for number in range(12):
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=cls.author if number % 2 else cls.star,
+                pub_date=now - dt.timedelta(minutes=number)
+            )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self, author):
+        return self.client.post(
+            reverse('posts:profile_follow', args=[author.username])
+        )
+
+    def feed_texts(self):
+        texts = []
+        cursor = None
+        while True:
+            response = self.client.get(reverse('posts:follow_index'),
+                                       {'cursor': cursor} if cursor else {})
+            page = response.context['page']
+            texts.extend(post.text for post in page)
+            if not page.has_next():
+                return texts
+            cursor = page.next_cursor
+
+    def test_follow_and_unfollow(self):
+        """
+        Тест проверяет, что подписка добавляет в ленту посты автора и
+        меняет счетчик подписчиков, а отписка убирает их.
+        """
+
+        response = self.follow(self.author)
+        self.assertRedirects(
+            response, reverse('posts:profile', args=['author'])
+        )
+        self.follow(self.author)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(AuthorStats.followers_count_of(
+            User.objects.get(pk=self.author.pk)), 1)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader)
+                         .count(), 6)
+
+        self.client.post(
+            reverse('posts:profile_unfollow', args=['author'])
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(AuthorStats.followers_count_of(
+            User.objects.get(pk=self.author.pk)), 0)
+
+    def test_cannot_follow_self(self):
+        """
+        Тест проверяет, что подписка на себя не создается.
+        """
+
+        self.client.post(reverse('posts:profile_follow', args=['reader']))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_fans_out(self):
+        """
+        Тест проверяет, что новый пост попадает в ленты подписчиков
+        автора и выводится первым.
+        """
+
+        self.follow(self.author)
+        Post.objects.create(text='Свежий', author=self.author)
+        self.assertEqual(self.feed_texts()[0], 'Свежий')
+        self.assertEqual(len(self.feed_texts()), 7)
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_fanin_posts_are_merged(self):
+        """
+        Тест проверяет, что посты авторов fan-in не записываются в ленты,
+        но выводятся вместе с остальными по порядку и без повторов.
+        """
+
+        Follow.objects.create(user=self.author, author=self.star)
+        with self.settings(TIMELINE_FANOUT_MAX_FOLLOWERS=1):
+            self.follow(self.author)
+        self.follow(self.star)
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader, author=self.star).exists())
+
+        expected = list(Post.objects.values_list('text', flat=True))
+        self.assertEqual(self.feed_texts(), expected)
+
+        response = self.client.get(reverse('posts:follow_index'))
+        next_cursor = response.context['page'].next_cursor
+        response = self.client.get(reverse('posts:follow_index'),
+                                   {'cursor': next_cursor})
+        previous_cursor = response.context['page'].previous_cursor
+        response = self.client.get(reverse('posts:follow_index'),
+                                   {'cursor': previous_cursor})
+        self.assertEqual([post.text for post in response.context['page']],
+                         expected[:POST_PER_PAGE_COUNT])
+
+    def test_feed_queries(self):
+        """
+        Тест проверяет, что без авторов fan-in страница ленты читается
+        одним запросом к записям ленты.
+        """
+
+        self.follow(self.author)
+        self.follow(self.star)
+        self.client.get(reverse('posts:follow_index'))
+        with self.assertNumQueries(2):
+            # сессия и страница ленты: пользователь и список авторов
+            # fan-in читаются из кэша
+            self.client.get(reverse('posts:follow_index'))
+
+    def test_recount_keeps_followers(self):
+        """
+        Тест проверяет, что пересчет счетчиков учитывает подписчиков.
+        """
+
+        self.follow(self.author)
+        recount_posts()
+        stats = AuthorStats.objects.get(author=self.author)
+        self.assertEqual((stats.posts_count, stats.followers_count), (6, 1))
+
+    def test_backfill_command(self):
+        """
+        Тест проверяет, что команда пересобирает ленту, заполненную в
+        обход сигналов.
+        """
+
+        Follow.objects.bulk_create(
+            [Follow(user=self.reader, author=self.author)]
+        )
+        call_command('backfill_timelines', stdout=StringIO())
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader)
+                         .count(), 6)
@@ -0,0 +1,139 @@
+"""
+Модуль предназначен для тестирования счетчиков просмотров постов.
+"""
+
+import time
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import viewcounts
+from posts.models import Post, PostStats, User
+
+
+class ViewCountsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.user = User.objects.create_user(username='amogus')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.user)
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+
+    def view(self, post, **headers):
+        return self.client.get(
+            reverse('posts:post_detail', args=['amogus', post.pk]),
+            **headers
+        )
+
+    def test_views_are_counted_and_flushed(self):
+        """
+        Тест проверяет, что просмотры копятся в памяти, включая ответы
+        из кэша и 304, и записываются в базу одним сбросом.
+        """
+
+        first, second, _ = self.posts
+        response = self.view(first)
+        self.view(first)
+        self.view(first, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.view(second)
+        self.client.get(reverse('posts:post_detail', args=['amogus', 999]))
+        self.assertEqual(viewcounts.pending(), {first.pk: 3, second.pk: 1})
+        self.assertFalse(PostStats.objects.exists())
+
+        self.assertEqual(viewcounts.flush(), 2)
+        self.view(first)
+        viewcounts.flush()
+        self.assertEqual(
+            dict(PostStats.objects.values_list('post_id', 'views_count')),
+            {first.pk: 4, second.pk: 1}
+        )
+        self.assertEqual(viewcounts.pending(), {})
+
+    def test_flush_refreshes_cached_page(self):
+        """
+        Тест проверяет, что после сброса закэшированная страница поста и
+        ее ETag показывают новое число просмотров, но не чаще
+        VIEW_COUNTS_PAGE_REFRESH.
+        """
+
+        post = self.posts[0]
+        response = self.view(post)
+        self.assertContains(response, 'Просмотров:  <span >0</span>')
+        viewcounts.flush()
+        response = self.view(post, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Просмотров:  <span >1</span>')
+
+        viewcounts.flush()
+        self.assertEqual(
+            self.view(post, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            304
+        )
+        with mock.patch('time.monotonic',
+                        return_value=time.monotonic() + 3600):
+            viewcounts.flush()
+        self.assertContains(self.view(post), 'Просмотров:  <span >3</span>')
+
+    def test_deleted_post_is_skipped(self):
+        """
+        Тест проверяет, что просмотры удаленного поста не ломают сброс.
+        """
+
+        post = Post.objects.create(text='Удаляемый', author=self.user)
+        viewcounts.record_view(post.pk)
+        viewcounts.record_view(self.posts[0].pk)
+        post.delete()
+        viewcounts.flush()
+        self.assertEqual(list(PostStats.objects.values_list('post_id',
+                                                            flat=True)),
+                         [self.posts[0].pk])
+
+    def test_failed_flush_keeps_deltas(self):
+        """
+        Тест проверяет, что при ошибке записи просмотры остаются в
+        очереди до следующего сброса.
+        """
+
+        viewcounts.record_view(self.posts[0].pk)
+        with mock.patch.object(viewcounts, 'apply_deltas',
+                               side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                viewcounts.flush()
+        self.assertEqual(viewcounts.pending(), {self.posts[0].pk: 1})
+
+    def test_flusher_started_once(self):
+        """
+        Тест проверяет, что фоновый поток записи запускается один раз
+        на процесс.
+        """
+
+        with self.settings(VIEW_COUNTS_FLUSHER=True), \
+                mock.patch.object(viewcounts, '_flusher_pid', None), \
+                mock.patch.object(viewcounts.threading, 'Thread') as thread:
+            viewcounts.record_view(self.posts[0].pk)
+            viewcounts.record_view(self.posts[1].pk)
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+
+    def test_popular(self):
+        """
+        Тест проверяет, что страница популярных постов выводит посты по
+        убыванию числа просмотров.
+        """
+
+        for post, views in zip(self.posts, (2, 5, 1)):
+            for _ in range(views):
+                viewcounts.record_view(post.pk)
+        viewcounts.flush()
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(
+            [post.pk for post in response.context['page']],
+            [self.posts[1].pk, self.posts[0].pk, self.posts[2].pk]
+        )
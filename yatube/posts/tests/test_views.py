@@ -9,6 +9,8 @@ from django import forms
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from core.testing import QueryBudgetMixin
+from posts.counters import recount_posts
 from posts.models import Group, Post, User
 
 # меньше 1 рабоать не будет :)
@@ -49,8 +51,19 @@ REQUEST_TEMPLATE_DICT = {
                             }), 'posts/post_detail.html')
 }
 
+# Максимум SQL-запросов на страницу для авторизованного пользователя,
+# включая загрузку сессии и пользователя. Не зависит от числа постов.
+QUERY_BUDGETS = {
+    'homepage': 3,
+    'group': 4,
+    'profile': 4,
+    'post_detail': 5,
+    'new_post': 3,
+    'post_edit': 6,
+}
+
 
-class PostPagesTest(TestCase):
+class PostPagesTest(QueryBudgetMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -66,10 +79,12 @@ class PostPagesTest(TestCase):
             description=TEST_GROUP_DESC,
             slug=TEST_EMPTY_GROUP_SLUG
         )
-        posts = [
-            Post(author=cls.user, group=cls.group, text=TEST_POST_TEXT)
-        ] * POSTS_COUNT
-        Post.objects.bulk_create(posts)
+        post = Post(author=cls.user, group=cls.group, text=TEST_POST_TEXT)
+        # bulk_create не вызывает save() и не отправляет сигналы:
+        # начало текста и счетчики заполняем явно
+        post.fill_excerpt()
+        Post.objects.bulk_create([post] * POSTS_COUNT)
+        recount_posts()
 
     def setUp(self):
         self.guest_client = Client()
@@ -179,9 +194,9 @@ class PostPagesTest(TestCase):
             with self.subTest(request=request):
                 response = self.authorized_client.get(request)
                 post = response.context['page'].object_list[0]
-                self.assertEqual(post.text, TEST_POST_TEXT)
-                self.assertEqual(post.group.title, TEST_GROUP_TITLE)
-                self.assertEqual(post.author.username, TEST_USER_USERNAME)
+                self.assertEqual(post.excerpt, TEST_POST_TEXT)
+                self.assertEqual(post.group_title, TEST_GROUP_TITLE)
+                self.assertEqual(post.author_username, TEST_USER_USERNAME)
                 self.assertEqual(post.pub_date.date(),
                                  dt.datetime.now().date())
 
@@ -209,3 +224,65 @@ class PostPagesTest(TestCase):
         self.assertEqual(
             len(response.context['page'].object_list), 0
         )
+
+    def test_cursor_paginator(self):
+        """
+        Тест проверяет, что курсорная пагинация проходит ленту целиком
+        без повторов и возвращается назад по токену.
+        """
+
+        view_names = (
+            'homepage',
+            'group',
+            'profile',
+        )
+        for view_name in view_names:
+            request = REQUEST_TEMPLATE_DICT[view_name][0]
+            with self.subTest(request=request):
+                first = self.authorized_client.get(request).context['page']
+                self.assertEqual(len(first.object_list), POST_PER_PAGE_COUNT)
+                self.assertFalse(first.has_previous())
+                self.assertTrue(first.has_next())
+
+                second = self.authorized_client.get(
+                    request, {'cursor': first.next_cursor}
+                ).context['page']
+                self.assertEqual(len(second.object_list),
+                                 POSTS_COUNT - POST_PER_PAGE_COUNT)
+                self.assertFalse(second.has_next())
+                seen = [post.pk for post in first] + [
+                    post.pk for post in second
+                ]
+                self.assertEqual(len(set(seen)), POSTS_COUNT)
+
+                back = self.authorized_client.get(
+                    request, {'cursor': second.previous_cursor}
+                ).context['page']
+                self.assertEqual([post.pk for post in back],
+                                 [post.pk for post in first])
+                self.assertFalse(back.has_previous())
+
+    def test_cursor_paginator_invalid_token(self):
+        """
+        Тест проверяет, что испорченный курсор открывает первую страницу.
+        """
+
+        request = REQUEST_TEMPLATE_DICT['homepage'][0]
+        response = self.authorized_client.get(request, {'cursor': 'мусор'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page'].object_list),
+                         POST_PER_PAGE_COUNT)
+
+    def test_query_budgets(self):
+        """
+        Тест проверяет, что страницы укладываются в бюджет SQL-запросов
+        и число запросов не растет с числом постов на странице.
+        """
+
+        for view_name, budget in QUERY_BUDGETS.items():
+            request = REQUEST_TEMPLATE_DICT[view_name][0]
+            with self.subTest(request=request):
+                with self.assertMaxQueries(budget, request):
+                    self.authorized_client.get(request)
+                with self.assertMaxQueries(budget + 1, request):
+                    self.authorized_client.get(request + '?page=2')
@@ -0,0 +1,144 @@
+"""
+Миниатюры картинок постов.
+
+Все размеры из POST_THUMBNAIL_SIZES создаются заранее: после сохранения
+поста с картинкой его id ставится в очередь, которую разбирает фоновый
+поток процесса, а для уже загруженных картинок есть команда
+generate_thumbnails. Шаблоны только читают готовые миниатюры из
+хранилища метаданных sorl-thumbnail и никогда не создают их сами: если
+миниатюры еще нет, выводится исходная картинка, а пост ставится в
+очередь. Создание миниатюр меняет версию поста, и кэшированные
+карточки перерисовываются уже с ними.
+"""
+
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import cache
+from .models import Post
+
+logger = logging.getLogger('yatube.thumbnails')
+
+_queue = queue.Queue()
+_queued = set()
+_lock = threading.Lock()
+_worker_pid = None
+
+
+class PregeneratedBackend(ThumbnailBackend):
+    def get_existing(self, file_, geometry_string, **options):
+        """
+        Готовая миниатюра из хранилища метаданных или None. Файл и
+        исходная картинка не читаются.
+        """
+
+        source = ImageFile(file_)
+        # те же опции по умолчанию, что и в get_thumbnail: от них
+        # зависит имя файла миниатюры
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def get_size(size):
+    geometry, options = settings.POST_THUMBNAIL_SIZES[size]
+    return geometry, dict(options)
+
+
+def lookup(post, size):
+    """
+    Готовая миниатюра картинки поста или None. Отсутствующая миниатюра
+    ставится в очередь на создание, но не создается во время рендера.
+    """
+
+    geometry, options = get_size(size)
+    thumbnail = default.backend.get_existing(post.image, geometry, **options)
+    if thumbnail is None and settings.POST_THUMBNAILS_ASYNC:
+        put(post.pk)
+    return thumbnail
+
+
+def generate(post_id):
+    """
+    Создает все размеры миниатюр картинки поста. Возвращает True, если
+    у поста есть картинка.
+    """
+
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return False
+    for geometry, options in settings.POST_THUMBNAIL_SIZES.values():
+        default.backend.get_thumbnail(post.image, geometry, **options)
+    cache.bump(cache.post_feed(post_id))
+    return True
+
+
+def run_worker():
+    while True:
+        post_id = _queue.get()
+        with _lock:
+            _queued.discard(post_id)
+        try:
+            generate(post_id)
+        except Exception:
+            logger.exception('не удалось создать миниатюры поста %s',
+                             post_id)
+        finally:
+            connection.close()
+
+
+def ensure_worker():
+    """
+    Запускает поток очереди в текущем процессе. После fork очередь
+    родителя разбирает он сам.
+    """
+
+    global _worker_pid
+    if _worker_pid == os.getpid():
+        return
+    with _lock:
+        if _worker_pid == os.getpid():
+            return
+        if _worker_pid is not None:
+            _queued.clear()
+        _worker_pid = os.getpid()
+        threading.Thread(target=run_worker, daemon=True,
+                         name='thumbnails-worker').start()
+
+
+def put(post_id):
+    ensure_worker()
+    with _lock:
+        if post_id in _queued:
+            return
+        _queued.add(post_id)
+    _queue.put(post_id)
+
+
+def enqueue(post_id):
+    """
+    Ставит создание миниатюр поста в очередь после коммита текущей
+    транзакции: до него поток не увидел бы картинку.
+    """
+
+    if settings.POST_THUMBNAILS_ASYNC:
+        transaction.on_commit(lambda: put(post_id))
+    else:
+        transaction.on_commit(lambda: generate(post_id))
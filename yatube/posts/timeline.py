@@ -0,0 +1,242 @@
+"""
+Лента подписок пользователя.
+
+Лента материализована в таблице TimelineEntry: новый пост сразу
+раскладывается по лентам подписчиков автора (fan-out на записи), а
+чтение страницы - один проход по индексу (user, -pub_date, -post).
+
+Посты авторов, у которых больше TIMELINE_FANOUT_MAX_FOLLOWERS
+подписчиков, не раскладываются: каждая их запись стоила бы тысяч
+вставок. Такие посты читаются при показе ленты прямо из Post (fan-in)
+и сливаются с материализованной частью.
+
+Подписка добавляет в ленту до TIMELINE_BACKFILL_LIMIT последних постов
+автора, отписка удаляет его посты из ленты. Посты, вставленные в обход
+сигналов, раскладываются пересборкой лент (import_posts и seed делают
+это сами, для остальных случаев есть команда backfill_timelines).
+"""
+
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import cache
+from .models import Follow, Post, TimelineEntry
+from .paginators import FORWARD, CursorPaginator
+from .rows import fallback_text, fill_text
+
+User = get_user_model()
+
+FANIN_AUTHORS_KEY = 'timeline:fanin_authors'
+FANOUT_BATCH_SIZE = 500
+
+
+def fanin_authors():
+    """
+    id авторов, посты которых читаются при показе ленты. Список общий
+    для всех лент и хранится в кэше.
+    """
+
+    authors = cache.get_cache().get(FANIN_AUTHORS_KEY)
+    if authors is None:
+        authors = frozenset(User.objects.filter(
+            stats__followers_count__gt=settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+        ).values_list('pk', flat=True))
+        cache.get_cache().set(FANIN_AUTHORS_KEY, authors,
+                              settings.TIMELINE_FANIN_CACHE_TIMEOUT)
+    return authors
+
+
+def reset_fanin_authors():
+    cache.get_cache().delete(FANIN_AUTHORS_KEY)
+    transaction.on_commit(
+        lambda: cache.get_cache().delete(FANIN_AUTHORS_KEY)
+    )
+
+
+def insert_entries(rows):
+    """
+    Вставляет записи ленты из пар (id пользователя, пост) пачками.
+    Повторная вставка того же поста в ту же ленту пропускается.
+    """
+
+    rows = iter(rows)
+    while True:
+        batch = [
+            TimelineEntry(user_id=user_id, post_id=post.pk,
+                          author_id=post.author_id, pub_date=post.pub_date)
+            for user_id, post in islice(rows, FANOUT_BATCH_SIZE)
+        ]
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fanout_post(post):
+    if post.author_id in fanin_authors():
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    insert_entries((user_id, post) for user_id in followers.iterator())
+
+
+def recent_posts(author_ids):
+    return Post.objects.filter(author_id__in=author_ids).only(
+        'pk', 'author_id', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL_LIMIT]
+
+
+def followed(follow, followers_count):
+    """
+    Подписка: followers_count - число подписчиков автора с ее учетом.
+    """
+
+    limit = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    if followers_count == limit + 1:
+        # автор перешел в fan-in; записи в уже собранных лентах
+        # остаются и отсеиваются при слиянии
+        reset_fanin_authors()
+    if followers_count <= limit:
+        insert_entries((follow.user_id, post)
+                       for post in recent_posts([follow.author_id]))
+
+
+def unfollowed(follow, followers_count):
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id, author_id=follow.author_id
+    ).delete()
+    if followers_count == settings.TIMELINE_FANOUT_MAX_FOLLOWERS:
+        # автор вернулся к fan-out: его посты больше не читаются при
+        # показе ленты и должны быть в лентах оставшихся подписчиков
+        reset_fanin_authors()
+        backfill_author(follow.author_id)
+
+
+def backfill_author(author_id):
+    posts = list(recent_posts([author_id]))
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    insert_entries((user_id, post)
+                   for user_id in followers.iterator() for post in posts)
+
+
+def backfill(user_id):
+    """
+    Пересобирает ленту пользователя: последние TIMELINE_BACKFILL_LIMIT
+    постов авторов, на которых он подписан, кроме авторов fan-in.
+    """
+
+    author_ids = set(Follow.objects.filter(
+        user_id=user_id
+    ).values_list('author_id', flat=True)) - fanin_authors()
+    with transaction.atomic():
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+        insert_entries((user_id, post) for post in recent_posts(author_ids))
+
+
+def backfill_many(user_ids, on_progress=None):
+    for number, user_id in enumerate(user_ids, 1):
+        backfill(user_id)
+        if on_progress:
+            on_progress(number)
+
+
+def backfill_followers(author_ids):
+    """
+    Пересобирает ленты подписчиков авторов author_ids: нужно после
+    вставки постов в обход сигналов.
+    """
+
+    author_ids = list(author_ids)
+    user_ids = set()
+    for start in range(0, len(author_ids), FANOUT_BATCH_SIZE):
+        user_ids.update(Follow.objects.filter(
+            author_id__in=author_ids[start:start + FANOUT_BATCH_SIZE]
+        ).values_list('user_id', flat=True))
+    backfill_many(sorted(user_ids))
+
+
+class MergedWindow:
+    """
+    Срез окна ленты: записи материализованной части и посты авторов
+    fan-in, слитые в порядке выдачи без повторов.
+    """
+
+    def __init__(self, entries, fanin_posts, descending):
+        self.entries = entries
+        self.fanin_posts = fanin_posts
+        self.descending = descending
+
+    def __getitem__(self, index):
+        limit = index.stop
+        sources = [[fill_text(entry.post, entry.fallback_text)
+                    for entry in self.entries[:limit]]]
+        if self.fanin_posts is not None:
+            sources.append([fill_text(post, post.fallback_text)
+                            for post in self.fanin_posts[:limit]])
+        merged = heapq.merge(
+            *sources, key=lambda post: (post.pub_date, post.pk),
+            reverse=self.descending
+        )
+        seen = set()
+        posts = []
+        for post in merged:
+            if post.pk not in seen:
+                seen.add(post.pk)
+                posts.append(post)
+        return posts[index]
+
+
+def entries_of(user):
+    # полный текст нужен только постам без начала текста
+    return TimelineEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    ).defer('post__text').annotate(fallback_text=fallback_text('post__'))
+
+
+class EntryPaginator(CursorPaginator):
+    """
+    Курсорный пагинатор записей ленты. Ключ записи - те же (pub_date,
+    id поста), что и у постов, поэтому курсоры общие.
+    """
+
+    pk_field = 'post_id'
+
+
+class TimelinePaginator(EntryPaginator):
+    """
+    Лента подписок: записи TimelineEntry вместе с постами авторов
+    fan-in, на которых подписан пользователь. Если таких авторов нет,
+    страница читается одним запросом.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(entries_of(user), per_page)
+        self.fanin = None
+        followed_fanin = fanin_authors()
+        if followed_fanin:
+            followed_fanin = set(Follow.objects.filter(
+                user=user, author_id__in=followed_fanin
+            ).values_list('author_id', flat=True))
+        if followed_fanin:
+            self.fanin = CursorPaginator(
+                Post.objects.filter(
+                    author_id__in=followed_fanin
+                ).select_related('author', 'group').defer('text').annotate(
+                    fallback_text=fallback_text()
+                ),
+                per_page
+            )
+
+    def get_window(self, direction=FORWARD, pub_date=None, pk=None):
+        args = (direction, pub_date, pk)
+        return MergedWindow(
+            super().get_window(*args),
+            self.fanin.get_window(*args) if self.fanin else None,
+            descending=direction == FORWARD,
+        )
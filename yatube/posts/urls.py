@@ -8,7 +8,14 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
     path('new/', views.post_create, name='post_create'),
+    path('search/', views.search, name='search'),
+    path('export/', views.export, name='export'),
+    path('follow/', views.follow_index, name='follow_index'),
+    path('popular/', views.popular, name='popular'),
     path('<username>/', views.profile, name='profile'),
+    path('<username>/follow/', views.profile_follow, name='profile_follow'),
+    path('<username>/unfollow/', views.profile_unfollow,
+         name='profile_unfollow'),
     path('<username>/<int:post_id>/', views.post_detail, name='post_detail'),
     path('<username>/<int:post_id>/edit/', views.post_edit, name='post_edit')
 ]
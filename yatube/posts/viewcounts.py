@@ -0,0 +1,204 @@
+"""
+Счетчики просмотров постов с отложенной записью.
+
+Просмотр только увеличивает счетчик в памяти процесса. Фоновый поток
+раз в VIEW_COUNTS_FLUSH_INTERVAL секунд переносит накопленные приросты
+в PostStats одной транзакцией, поэтому чтение страниц не встает в
+очередь пишущих транзакций SQLite. Приросты, не записанные из-за
+ошибки, возвращаются в очередь; при остановке процесса очередь
+сбрасывается в базу. Теряются только просмотры последних секунд перед
+аварийным завершением, поэтому счетчики приблизительные.
+
+Страница поста со счетчиком кэшируется и отдается с ETag, поэтому после
+записи меняется версия просмотров поста (cache.post_views), но не чаще
+раза в VIEW_COUNTS_PAGE_REFRESH секунд на пост: популярный пост иначе
+собирался бы заново после каждого сброса.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+
+from core.sqlite import atomic_with_retry
+
+from . import cache
+from .models import Post, PostStats
+from .rows import fallback_text, fill_text
+
+logger = logging.getLogger('yatube.viewcounts')
+
+_pending = Counter()
+# посты с записанными, но еще не показанными просмотрами и время
+# последней смены версии их страниц
+_unrefreshed = set()
+_refreshed_at = {}
+_lock = threading.Lock()
+_flusher_pid = None
+
+
+def record_view(post_id):
+    ensure_flusher()
+    with _lock:
+        _pending[post_id] += 1
+
+
+def pending():
+    with _lock:
+        return dict(_pending)
+
+
+def clear():
+    with _lock:
+        _pending.clear()
+        _unrefreshed.clear()
+        _refreshed_at.clear()
+
+
+def apply_deltas(deltas):
+    """
+    Прибавляет приросты к PostStats. Посты с одинаковым приростом
+    обновляются одним UPDATE, недостающие строки создаются одной
+    вставкой. Удаленные посты пропускаются.
+    """
+
+    existing = set(PostStats.objects.filter(
+        post_id__in=list(deltas)
+    ).values_list('post_id', flat=True))
+    by_delta = defaultdict(list)
+    for post_id in existing:
+        by_delta[deltas[post_id]].append(post_id)
+    for delta, post_ids in by_delta.items():
+        PostStats.objects.filter(post_id__in=post_ids).update(
+            views_count=F('views_count') + delta
+        )
+    missing = Post.objects.filter(
+        pk__in=[post_id for post_id in deltas if post_id not in existing]
+    ).values_list('pk', flat=True)
+    PostStats.objects.bulk_create(
+        [PostStats(post_id=post_id, views_count=deltas[post_id])
+         for post_id in missing]
+    )
+
+
+def flush():
+    """
+    Записывает накопленные просмотры. Возвращает число постов.
+    """
+
+    with _lock:
+        deltas = dict(_pending)
+        _pending.clear()
+    if not deltas:
+        refresh_pages(())
+        return 0
+    batch_size = settings.VIEW_COUNTS_BATCH_SIZE
+    post_ids = sorted(deltas)
+    for start in range(0, len(post_ids), batch_size):
+        batch = {post_id: deltas[post_id]
+                 for post_id in post_ids[start:start + batch_size]}
+        try:
+            atomic_with_retry(apply_deltas, batch)
+        except Exception:
+            with _lock:
+                for post_id in post_ids[start:]:
+                    _pending[post_id] += deltas[post_id]
+            raise
+        refresh_pages(batch)
+    return len(deltas)
+
+
+def refresh_pages(post_ids):
+    """
+    Меняет версии просмотров постов post_ids и отложенных ранее, у
+    которых прошло VIEW_COUNTS_PAGE_REFRESH секунд с прошлой смены.
+    """
+
+    now = time.monotonic()
+    interval = settings.VIEW_COUNTS_PAGE_REFRESH
+    with _lock:
+        _unrefreshed.update(post_ids)
+        due = [post_id for post_id in _unrefreshed
+               if now - _refreshed_at.get(post_id, now - interval) >= interval]
+        _unrefreshed.difference_update(due)
+        for post_id, refreshed_at in list(_refreshed_at.items()):
+            if now - refreshed_at >= interval:
+                del _refreshed_at[post_id]
+        _refreshed_at.update(dict.fromkeys(due, now))
+    cache.bump(*(cache.post_views(post_id) for post_id in due))
+
+
+def run_flusher():
+    while True:
+        time.sleep(settings.VIEW_COUNTS_FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.exception('не удалось записать просмотры постов')
+        finally:
+            # соединение потока не должно держать снимок WAL
+            connection.close()
+
+
+def ensure_flusher():
+    """
+    Запускает поток записи в текущем процессе. После fork счетчики
+    родителя уже учтены им самим и обнуляются.
+    """
+
+    global _flusher_pid
+    if not settings.VIEW_COUNTS_FLUSHER or _flusher_pid == os.getpid():
+        return
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        if _flusher_pid is not None:
+            _pending.clear()
+        _flusher_pid = os.getpid()
+        threading.Thread(target=run_flusher, daemon=True,
+                         name='viewcounts-flusher').start()
+
+
+@atexit.register
+def flush_on_exit():
+    if _flusher_pid == os.getpid():
+        try:
+            flush()
+        except Exception:
+            logger.exception('не удалось записать просмотры постов')
+
+
+def count_views(view):
+    """
+    Декоратор view поста: считает успешные GET-запросы, в том числе
+    отданные из кэша страниц и ответы 304.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if request.method == 'GET' and response.status_code in (200, 304):
+            record_view(kwargs['post_id'])
+        return response
+    return wrapper
+
+
+def most_viewed_stats(limit):
+    # полный текст нужен только постам без начала текста
+    return PostStats.objects.select_related(
+        'post__author', 'post__group'
+    ).defer('post__text').annotate(
+        fallback_text=fallback_text('post__')
+    ).order_by('-views_count')[:limit]
+
+
+def most_viewed(limit):
+    return [fill_text(stats.post, stats.fallback_text)
+            for stats in most_viewed_stats(limit)]
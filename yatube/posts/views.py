@@ -1,34 +1,60 @@
-from django.contrib.auth import get_user_model
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition, require_POST
 
-from .forms import PostForm
-from .models import Group, Post
-from yatube.settings import ELEMENTS_PER_PAGE
+from core.sqlite import atomic_with_retry
+from users.lookups import get_user_or_404
 
-User = get_user_model()
+from . import cache, exporter, viewcounts
+from .forms import PostForm
+from .lookups import get_group_or_404
+from .models import AuthorStats, Follow, Post, PostStats
+from .paginators import CURSOR_PARAM, PAGE_PARAM, paginate
+from .rows import post_rows
+from .search import search_posts
+from .timeline import TimelinePaginator
 
 
+@condition(etag_func=cache.feed_etag(cache.index_dependencies))
+@cache.cache_page_for_anonymous(cache.index_dependencies)
 def index(request):
     template = 'posts/index.html'
-    posts = Post.objects.all()
-    paginator = Paginator(posts, ELEMENTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = post_rows(Post.objects.all())
+    page = paginate(request, posts)
     context = {
         'page': page
     }
     return render(request, template, context)
 
 
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    page = None
+    if query:
+        paginator = Paginator(search_posts(query), settings.ELEMENTS_PER_PAGE)
+        page = paginator.get_page(request.GET.get(PAGE_PARAM))
+    context = {
+        'query': query,
+        'page': page,
+        'extra_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, template, context)
+
+
+@condition(etag_func=cache.feed_etag(cache.group_dependencies))
+@cache.cache_page_for_anonymous(cache.group_dependencies)
 def group_posts(request, slug):
     template = 'posts/group.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, ELEMENTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group = get_group_or_404(slug)
+    posts = post_rows(group.posts.all())
+    page = paginate(request, posts, group.posts_count)
     context = {
         'group': group,
         'page': page
@@ -36,60 +62,139 @@ def group_posts(request, slug):
     return render(request, template, context)
 
 
+@condition(etag_func=cache.feed_etag(cache.profile_dependencies))
+@cache.cache_page_for_anonymous(cache.profile_dependencies)
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, ELEMENTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = get_user_or_404(username)
+    posts_count = AuthorStats.posts_count_of(author)
+    posts = post_rows(author.posts.all())
+    page = paginate(request, posts, posts_count)
+
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=author
+    ).exists()
 
     context = {
         'author': author,
+        'posts_count': posts_count,
+        'followers_count': AuthorStats.followers_count_of(author),
+        'following': following,
         'page': page,
     }
     return render(request, template, context)
 
 
+@viewcounts.count_views
+# без Last-Modified: страница зависит не только от поста (счетчики,
+# имена автора и группы), и это учитывает только ETag по версиям лент
+@condition(etag_func=cache.feed_etag(cache.post_dependencies))
+@cache.cache_page_for_anonymous(cache.post_dependencies)
 def post_detail(request, username, post_id):
     template = 'posts/post_detail.html'
-    author = get_object_or_404(User, username=username)
-    post = get_object_or_404(author.posts, pk=post_id)
+    author = get_user_or_404(username)
+    post = get_object_or_404(author.posts.select_related('group', 'stats'),
+                             pk=post_id)
     context = {
         'author': author,
+        'posts_count': AuthorStats.posts_count_of(author),
+        'views_count': PostStats.views_count_of(post),
         'post': post
     }
     return render(request, template, context)
 
 
+def popular(request):
+    template = 'posts/popular.html'
+    paginator = Paginator(viewcounts.most_viewed(settings.POPULAR_POSTS_LIMIT),
+                          settings.ELEMENTS_PER_PAGE)
+    context = {
+        'page': paginator.get_page(request.GET.get(PAGE_PARAM))
+    }
+    return render(request, template, context)
+
+
+@login_required
+def follow_index(request):
+    template = 'posts/follow.html'
+    paginator = TimelinePaginator(request.user, settings.ELEMENTS_PER_PAGE)
+    context = {
+        'page': paginator.get_page(request.GET.get(CURSOR_PARAM))
+    }
+    return render(request, template, context)
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    author = get_user_or_404(username)
+    if author != request.user:
+        atomic_with_retry(Follow.objects.get_or_create,
+                          user=request.user, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    author = get_user_or_404(username)
+    atomic_with_retry(
+        Follow.objects.filter(user=request.user, author=author).delete
+    )
+    return redirect('posts:profile', username)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST' and form.is_valid():
-        Post.objects.create(
+        atomic_with_retry(
+            Post.objects.create,
             text=form.cleaned_data['text'],
             author=request.user,
-            group=form.cleaned_data['group'])
+            group=form.cleaned_data['group'],
+            image=form.cleaned_data['image'] or '')
         return redirect('posts:index')
     return render(request, 'posts/create_post.html', {'form': form})
 
 
 @login_required
 def post_edit(request, username, post_id):
-    author = get_object_or_404(User, username=username)
+    author = get_user_or_404(username)
     post = get_object_or_404(author.posts, pk=post_id)
     if request.user != author:
         return redirect('posts:post_detail', author.username, post_id)
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'GET':
         form.fields['text'].initial = post.text
         form.fields['group'].initial = post.group
+        form.fields['image'].initial = post.image
         return render(request, 'posts/create_post.html',
                       {'is_edit': True, 'form': form})
     if form.is_valid():
         post.text = form.cleaned_data['text']
         post.group = form.cleaned_data['group']
-        post.save()
+        # None - картинку не меняли, False - отметили "очистить"
+        if form.cleaned_data['image'] is not None:
+            post.image = form.cleaned_data['image'] or ''
+        atomic_with_retry(post.save)
         return redirect('posts:post_detail', author.username, post_id)
     return render(request, 'posts/create_post.html',
                   {'is_edit': True, 'form': form})
+
+
+@staff_member_required
+def export(request):
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in exporter.FORMATS:
+        fmt = 'jsonl'
+    compress = request.GET.get('gzip') == '1'
+    posts = exporter.posts_for_export(request.GET.get('group'),
+                                      request.GET.get('author'))
+    response = StreamingHttpResponse(
+        exporter.export_posts(posts, fmt, compress),
+        content_type=exporter.CONTENT_TYPES[fmt]
+    )
+    filename = f'posts.{fmt}' + ('.gz' if compress else '')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,14 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .lookups import users
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend, который загружает пользователя сессии через кэш
+    users.lookups вместо запроса к базе на каждый запрос.
+    """
+
+    def get_user(self, user_id):
+        user = users.get_by_pk(user_id)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.checks import Tags, Warning, register
+from django.db import DatabaseError
+
+from .validators import fixed_segments, is_reserved
+
+User = get_user_model()
+
+
+@register(Tags.database)
+def check_reserved_usernames(app_configs, **kwargs):
+    """
+    Находит уже зарегистрированных пользователей, чей профиль закрыт
+    адресом сайта. Проверка обращается к базе, поэтому запускается
+    командой migrate или check --tag database.
+    """
+
+    try:
+        usernames = list(User.objects.filter(
+            username__in=fixed_segments()
+        ).values_list('username', flat=True))
+    except DatabaseError:
+        # таблицы пользователей еще нет
+        return []
+    return [
+        Warning(
+            f'Профиль пользователя {username} закрыт адресом '
+            f'/{username}/.',
+            hint='Переименуйте пользователя.',
+            id='users.W001',
+        )
+        for username in usernames if is_reserved(username)
+    ]
@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.http import Http404
+
+from core.lookups import ModelLookup
+
+User = get_user_model()
+
+# stats - счетчик постов автора, который выводится в профиле и посте
+users = ModelLookup('user', User.objects.select_related('stats'),
+                    'username')
+
+
+def get_user_or_404(username):
+    user = users.get(username)
+    if user is None:
+        raise Http404('Пользователь не найден')
+    return user
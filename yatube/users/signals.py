@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .lookups import users
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=User)
+def remember_old_username(sender, instance, update_fields=None, **kwargs):
+    if instance.pk and (update_fields is None or 'username' in update_fields):
+        instance._old_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_lookups(sender, instance, **kwargs):
+    users.invalidate(
+        [instance.pk],
+        [instance.username, getattr(instance, '_old_username', None)]
+    )
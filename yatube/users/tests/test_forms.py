@@ -0,0 +1,52 @@
+"""
+Модуль предназначен для тестирования регистрации пользователей.
+"""
+
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import User
+from users.checks import check_reserved_usernames
+
+PASSWORD = 'Pa55w0rd-for-tests'
+
+
+class SignUpTest(TestCase):
+    def signup(self, username):
+        return self.client.post(reverse('users:signup'), {
+            'username': username,
+            'password1': PASSWORD,
+            'password2': PASSWORD,
+        })
+
+    def test_reserved_usernames(self):
+        """
+        Тест проверяет, что имена, чей профиль закрыт адресами сайта,
+        нельзя зарегистрировать, а остальные можно.
+        """
+
+        for username in ('follow', 'popular', 'search', 'export', 'new',
+                         'group'):
+            with self.subTest(username=username):
+                response = self.signup(username)
+                self.assertFormError(
+                    response, 'form', 'username',
+                    'Это имя занято адресом сайта, выберите другое.'
+                )
+        self.assertRedirects(self.signup('about'), reverse('login'))
+        self.assertEqual(list(User.objects.values_list('username',
+                                                       flat=True)),
+                         ['about'])
+
+    def test_existing_reserved_usernames(self):
+        """
+        Тест проверяет, что проверка базы находит уже
+        зарегистрированных пользователей с занятыми именами.
+        """
+
+        User.objects.create_user(username='amogus')
+        self.assertEqual(check_reserved_usernames(None), [])
+        User.objects.create_user(username='follow')
+        [warning] = check_reserved_usernames(None)
+        self.assertEqual(warning.id, 'users.W001')
+        self.assertIn('follow', warning.msg)
@@ -0,0 +1,67 @@
+"""
+Имена пользователей, профиль которых закрыт адресами сайта.
+
+Профиль и страницы постов автора лежат в корне сайта (/<username>/), а
+постоянные адреса вроде /follow/ или /group/<slug>/ объявлены раньше.
+Пользователь с таким именем не смог бы открыть свой профиль или
+подписаться на него. Имя проверяется по тем же url, что и запросы.
+"""
+
+import re
+
+from django.core.exceptions import ValidationError
+from django.urls import (NoReverseMatch, Resolver404, get_resolver, resolve,
+                         reverse)
+
+# url автора и аргументы после имени пользователя
+PROFILE_URLS = (
+    ('posts:profile', ()),
+    ('posts:profile_follow', ()),
+    ('posts:profile_unfollow', ()),
+    ('posts:post_detail', (1,)),
+    ('posts:post_edit', (1,)),
+)
+SEGMENT_RE = re.compile(r'^\^?([\w.@+-]+)(?:/|$)')
+
+
+def is_reserved(username):
+    """
+    True, если хотя бы один url автора с этим именем ведет не на свой
+    view.
+    """
+
+    for name, args in PROFILE_URLS:
+        try:
+            match = resolve(reverse(name, args=(username, *args)))
+        except (NoReverseMatch, Resolver404):
+            return True
+        if match.view_name != name:
+            return True
+    return False
+
+
+def validate_username(username):
+    if is_reserved(username):
+        raise ValidationError(
+            'Это имя занято адресом сайта, выберите другое.',
+            code='reserved',
+        )
+
+
+def fixed_segments(patterns=None):
+    """
+    Первые части постоянных адресов сайта: только с ними имя
+    пользователя может совпасть.
+    """
+
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    segments = set()
+    for pattern in patterns:
+        match = SEGMENT_RE.match(str(pattern.pattern))
+        if match:
+            segments.add(match.group(1))
+        elif hasattr(pattern, 'url_patterns'):
+            # пустой префикс include: адреса начинаются внутри
+            segments |= fixed_segments(pattern.url_patterns)
+    return segments
@@ -24,16 +24,21 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.routers.ReplicaMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -41,7 +46,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR, ],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -65,6 +70,124 @@ DATABASES = {
     }
 }
 
+# PRAGMA для каждого соединения SQLite (см. core/sqlite.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # отрицательное значение - размер в КиБ
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+# Повторы пишущих транзакций при "database is locked"
+SQLITE_WRITE_RETRIES = 5
+SQLITE_RETRY_BASE_DELAY = 0.02
+
+# YATUBE_REPLICAS - файлы SQLite-реплик через запятую (например,
+# replica.sqlite3). Реплики заполняются командой sync_replica. Кэш
+# страниц при этом должен быть общим для процессов (YATUBE_CACHE=file):
+# версию страниц после синхронизации меняет процесс sync_replica.
+REPLICA_DATABASES = []
+for number, name in enumerate(
+        filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, name),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# url, которые читают с реплик, и окно закрепления за основной базой
+# после записи
+REPLICA_READ_VIEWS = {
+    'posts:index',
+    'posts:group',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+    'posts:popular',
+    'about:me',
+    'about:tech',
+}
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+# YATUBE_CACHE=file включает файловый кэш вместо кэша в памяти процесса
+if os.environ.get('YATUBE_CACHE') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(BASE_DIR, 'cache'),
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Двухуровневый кэш поиска групп и пользователей (core/lookups.py)
+LOOKUP_CACHE_ALIAS = 'default'
+LOOKUP_LOCAL_SIZE = 1024
+LOOKUP_LOCAL_TTL = 5
+LOOKUP_SHARED_TTL = 60 * 5
+
+# Кэш страниц для анонимных пользователей
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = 60 * 15
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Доля запросов с заголовком Server-Timing и строкой лога yatube.timing
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.environ.get('YATUBE_TIMING_SAMPLE_RATE', 1 if DEBUG else 0.05)
+)
+
+# Метрики /metrics: url этих пространств имен получают свои ряды.
+# YATUBE_METRICS_DIR включает общий для процессов каталог файлов метрик.
+METRICS_NAMESPACES = ('posts', 'users', 'about')
+METRICS_MULTIPROC_DIR = os.environ.get('YATUBE_METRICS_DIR')
+# Адреса, с которых /metrics отдается без входа сотрудника
+# (через запятую в YATUBE_METRICS_ALLOWED_IPS)
+METRICS_ALLOWED_IPS = os.environ.get(
+    'YATUBE_METRICS_ALLOWED_IPS', '127.0.0.1,::1'
+).split(',')
+
+# Профилирование медленных запросов (страница /staff/profiles/)
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILER_SAMPLE_RATE = float(
+    os.environ.get('YATUBE_PROFILER_SAMPLE_RATE', 0.01)
+)
+PROFILER_THRESHOLD = float(os.environ.get('YATUBE_PROFILER_THRESHOLD', 1))
+PROFILER_FLAG = '__profile'
+PROFILER_MAX_CAPTURES = 200
+PROFILER_SLOWEST_PER_VIEW = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yatube': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# ModelBackend остается для сессий, в которых сохранен его путь
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -94,6 +217,22 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Миниатюры картинок постов (posts/thumbnails.py) создаются заранее:
+# очередью после сохранения поста и командой generate_thumbnails.
+# Метаданные миниатюр хранятся в таблице thumbnail_kvstore с кэшем.
+THUMBNAIL_BACKEND = 'posts.thumbnails.PregeneratedBackend'
+THUMBNAIL_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+THUMBNAIL_CACHE = 'default'
+POST_THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+    'detail': ('960', {'upscale': False}),
+}
+# False - миниатюры создаются сразу после коммита в том же потоке
+POST_THUMBNAILS_ASYNC = True
+
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = '/'
 # LOGOUT_REDIRECT_URL = '/'
@@ -102,3 +241,38 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 ELEMENTS_PER_PAGE = 10
+
+# Длина начала текста поста в лентах (Post.excerpt), в символах
+POST_EXCERPT_LENGTH = 300
+
+# Лента подписок (posts/timeline.py): посты авторов с большим числом
+# подписчиков не раскладываются по лентам, а читаются при показе
+TIMELINE_FANOUT_MAX_FOLLOWERS = 1000
+TIMELINE_BACKFILL_LIMIT = 500
+TIMELINE_FANIN_CACHE_TIMEOUT = 60
+
+# Просмотры постов (posts/viewcounts.py): копятся в памяти процесса и
+# записываются фоновым потоком пачками раз в несколько секунд
+VIEW_COUNTS_FLUSHER = True
+VIEW_COUNTS_FLUSH_INTERVAL = 5
+VIEW_COUNTS_BATCH_SIZE = 500
+# не чаще чем раз в столько секунд страница поста пересобирается ради
+# нового числа просмотров
+VIEW_COUNTS_PAGE_REFRESH = 60
+POPULAR_POSTS_LIMIT = 50
+
+# Удаление пользователей и групп (posts/deletion.py): посты удаляются или
+# отвязываются фоновым потоком пачками, каждая своей транзакцией. Пачка
+# попадает в IN (...), поэтому больше 999 ее делать нельзя из-за SQLite.
+DELETION_JOBS_ASYNC = True
+DELETION_BATCH_SIZE = 500
+# Задание в работе без обновлений дольше этого времени (в секундах)
+# считается прерванным, и run_deletion_jobs его продолжает
+DELETION_STALE_TIMEOUT = 600
+
+# Режим пагинации лент по имени url: 'page' (?page=N) или 'cursor' (keyset)
+PAGINATION_MODES = {
+    'posts:index': 'cursor',
+    'posts:group': 'cursor',
+    'posts:profile': 'cursor',
+}